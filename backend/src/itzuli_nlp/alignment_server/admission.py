@@ -0,0 +1,226 @@
+"""Admission control for the slow stages of alignment generation."""
+
+import logging
+import math
+import os
+import threading
+from typing import Callable, Dict, Mapping, Optional
+
+import anyio
+
+from .executor import STAGE_CONCURRENCY, average_duration
+from .metrics import ADMISSION_IN_FLIGHT, ADMISSION_REJECTED
+
+logger = logging.getLogger(__name__)
+
+# Work admitted beyond the pool size that may wait for a worker thread, per stage
+STAGE_MAX_QUEUE: Dict[str, int] = {
+    "analysis": int(os.environ.get("ALIGNMENT_ANALYSIS_MAX_QUEUE", 32)),
+    "alignment": int(os.environ.get("ALIGNMENT_GENERATION_MAX_QUEUE", 64)),
+}
+
+# Longest expected queue wait (seconds) before new work is turned away, per stage
+STAGE_TARGET_WAIT: Dict[str, float] = {
+    "analysis": float(os.environ.get("ALIGNMENT_ANALYSIS_TARGET_WAIT", 10)),
+    "alignment": float(os.environ.get("ALIGNMENT_GENERATION_TARGET_WAIT", 60)),
+}
+
+# Assumed call duration until the stage has run once
+INITIAL_DURATION: Dict[str, float] = {"analysis": 2.0, "alignment": 30.0}
+
+
+class Overloaded(Exception):
+    """Raised when a stage cannot take more work within its queue bound (`queue_full`) or wait target."""
+
+    def __init__(self, stage: str, reason: str, retry_after: float, queue_full: bool = False):
+        super().__init__(f"{stage} stage overloaded: {reason}")
+        self.stage = stage
+        self.retry_after = retry_after
+        self.queue_full = queue_full
+
+    @property
+    def retry_after_header(self) -> str:
+        """Retry-After value in whole seconds (at least 1)."""
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class StageGate:
+    """Bounded queue in front of one pipeline stage.
+
+    Counts units of work admitted to the stage but not yet finished with it. With
+    `capacity` units running at once and each taking `duration()` seconds on average,
+    a new unit waits about (units ahead of it beyond capacity / capacity) * duration.
+    Work is rejected when the bounded queue is full or that wait exceeds the target,
+    so requests fail fast instead of timing out after the server has started on them.
+    """
+
+    def __init__(
+        self,
+        stage: str,
+        capacity: int,
+        max_queue: int,
+        target_wait: float,
+        duration: Callable[[], float],
+    ):
+        """Initialize gate for a stage with the given pool size and limits."""
+        self.stage = stage
+        self.capacity = max(1, capacity)
+        self.max_queue = max_queue
+        self.target_wait = target_wait
+        self._duration = duration
+        self._lock = threading.Lock()
+        self.in_flight = 0
+
+    def expected_wait(self, units: int = 1) -> float:
+        """Seconds the last of `units` newly admitted units is expected to wait for a worker."""
+        ahead = self.in_flight + units - self.capacity
+        return max(0, ahead) / self.capacity * self._duration()
+
+    def acquire(self, units: int = 1) -> None:
+        """Admit `units` of work or raise Overloaded."""
+        with self._lock:
+            self._check(units)
+            self.in_flight += units
+        ADMISSION_IN_FLIGHT.labels(self.stage).inc(units)
+
+    def try_acquire(self, units: int = 1) -> bool:
+        """Admit `units` of work if the stage can take it now. Returns whether it did."""
+        with self._lock:
+            try:
+                self._check(units)
+            except Overloaded:
+                return False
+            self.in_flight += units
+        ADMISSION_IN_FLIGHT.labels(self.stage).inc(units)
+        return True
+
+    def release(self, units: int = 1) -> None:
+        """Mark `units` of admitted work as finished with this stage."""
+        with self._lock:
+            self.in_flight -= units
+        ADMISSION_IN_FLIGHT.labels(self.stage).dec(units)
+
+    def _check(self, units: int) -> None:
+        # Caller holds the lock. An idle stage always takes the work, so a batch
+        # larger than the whole queue can still run when nothing else is waiting.
+        if self.in_flight == 0:
+            return
+
+        duration = self._duration()
+        wait = self.expected_wait(units)
+        # Retry-After is the time until the units would be admitted, with work draining
+        # at `capacity` units per `duration`: once enough has finished to make room in
+        # the queue and bring the expected wait under the target, or once the stage is
+        # idle, whichever comes first
+        until_idle = self.in_flight / self.capacity * duration
+        excess = self.in_flight + units - (self.capacity + self.max_queue)
+        until_room = max(0, excess) / self.capacity * duration
+        retry_after = min(until_idle, max(until_room, wait - self.target_wait))
+        if excess > 0:
+            raise Overloaded(self.stage, f"queue full ({self.in_flight} in flight)", retry_after, queue_full=True)
+        if wait > self.target_wait:
+            raise Overloaded(self.stage, f"expected wait {wait:.1f}s exceeds {self.target_wait:.1f}s", retry_after)
+
+
+class Ticket:
+    """Admitted work across one or more stages, released stage by stage as the request progresses."""
+
+    def __init__(self, gates: Mapping[str, StageGate], units: Mapping[str, int]):
+        self._gates = gates
+        self._held = dict(units)
+
+    def release(self, stage: str, units: Optional[int] = None) -> None:
+        """Release `units` (default: all) of this request's hold on a stage. Releasing more than is held is a no-op."""
+        held = self._held.get(stage, 0)
+        units = held if units is None else min(units, held)
+        if units <= 0:
+            return
+        if units == held:
+            del self._held[stage]
+        else:
+            self._held[stage] = held - units
+        self._gates[stage].release(units)
+
+    async def extend(self, stage: str, units: int = 1, max_held: Optional[int] = None, poll: float = 0.5) -> None:
+        """
+        Wait until a stage takes `units` more of this request's work, then hold them.
+
+        For work admitted in parts, e.g. a large batch that holds at most `max_held`
+        units at once. Unlike admit, it never rejects: the caller has already been
+        admitted, so later parts wait for room instead.
+        """
+        delay = 0.05
+        while True:
+            held = self._held.get(stage, 0)
+            if (max_held is None or held + units <= max_held) and self._gates[stage].try_acquire(units):
+                break
+            await anyio.sleep(delay)
+            delay = min(delay * 2, poll)
+        self._held[stage] = self._held.get(stage, 0) + units
+
+    def close(self) -> None:
+        """Release every stage still held."""
+        for stage in list(self._held):
+            self.release(stage)
+
+    def __enter__(self) -> "Ticket":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _stage_duration(stage: str) -> Callable[[], float]:
+    return lambda: average_duration(stage) or INITIAL_DURATION[stage]
+
+
+_gates: Dict[str, StageGate] = {
+    stage: StageGate(
+        stage,
+        capacity=STAGE_CONCURRENCY[stage],
+        max_queue=STAGE_MAX_QUEUE[stage],
+        target_wait=STAGE_TARGET_WAIT[stage],
+        duration=_stage_duration(stage),
+    )
+    for stage in STAGE_MAX_QUEUE
+}
+
+
+def get_gate(stage: str) -> StageGate:
+    """Return the admission gate for a pipeline stage."""
+    try:
+        return _gates[stage]
+    except KeyError:
+        raise ValueError(f"Unknown pipeline stage: {stage}") from None
+
+
+def admit(units: Mapping[str, int]) -> Ticket:
+    """
+    Admit a request's work on every stage it needs before any of it starts.
+
+    Checking all stages up front means a request is never turned away halfway
+    through, after translation and analysis have already been paid for.
+
+    Args:
+        units: Units of work per stage, e.g. {"analysis": 1, "alignment": 1}
+
+    Returns:
+        Ticket to release each stage as the request finishes with it
+
+    Raises:
+        Overloaded: If any stage cannot take the work
+    """
+    acquired: Dict[str, int] = {}
+    try:
+        for stage, count in units.items():
+            if count <= 0:
+                continue
+            get_gate(stage).acquire(count)
+            acquired[stage] = count
+    except Overloaded as e:
+        for stage, count in acquired.items():
+            _gates[stage].release(count)
+        ADMISSION_REJECTED.labels(e.stage).inc()
+        logger.warning(f"Shedding load: {e}")
+        raise
+    return Ticket(_gates, acquired)
@@ -1,22 +1,29 @@
 """Service for generating alignment data from scaffold using Claude API."""
 
 import logging
-from typing import List
+from typing import List, Optional
 
 from ..core.types import AnalysisRow
-from .claude_client import ClaudeClient
+from .claude_client import LAYER_NAMES, ClaudeClient
+from .stage_cache import LayerCheckpointer, StageCache, load_layers
 from .types import AlignmentData, SentencePair, AlignmentLayers
 
 logger = logging.getLogger(__name__)
 
 
-def generate_alignments_for_scaffold(scaffold_data: AlignmentData, claude_api_key: str = None) -> AlignmentData:
+def generate_alignments_for_scaffold(
+    scaffold_data: AlignmentData,
+    claude_api_key: str = None,
+    checkpoints: Optional[StageCache] = None
+) -> AlignmentData:
     """
     Generate alignment layers for scaffold data using Claude API.
     
     Args:
         scaffold_data: AlignmentData with empty alignment layers
         claude_api_key: Optional Claude API key (uses env var if not provided)
+        checkpoints: Optional store of layers generated earlier for the same scaffold;
+            Claude is only asked for the missing layers, and new ones are added to it
     
     Returns:
         AlignmentData with populated alignment layers
@@ -35,15 +42,27 @@ def generate_alignments_for_scaffold(scaffold_data: AlignmentData, claude_api_ke
             
             logger.info(f"Source tokens: {len(source_tokens)}, Target tokens: {len(target_tokens)}")
             
-            # Generate alignments using Claude
-            alignment_layers = claude_client.generate_alignments(
-                source_tokens=source_tokens,
-                target_tokens=target_tokens,
-                source_lang=sentence_pair.source.lang,
-                target_lang=sentence_pair.target.lang,
-                source_text=sentence_pair.source.text,
-                target_text=sentence_pair.target.text
-            )
+            layers = load_layers(checkpoints, sentence_pair)
+            missing = tuple(layer_name for layer_name in LAYER_NAMES if layer_name not in layers)
+            if missing:
+                # Generate alignments using Claude
+                generated = claude_client.generate_alignments(
+                    source_tokens=source_tokens,
+                    target_tokens=target_tokens,
+                    source_lang=sentence_pair.source.lang,
+                    target_lang=sentence_pair.target.lang,
+                    source_text=sentence_pair.source.text,
+                    target_text=sentence_pair.target.text,
+                    layers=missing
+                )
+                checkpointer = LayerCheckpointer(checkpoints, sentence_pair)
+                for layer_name in missing:
+                    layers[layer_name] = getattr(generated, layer_name)
+                    checkpointer.add(layer_name, layers[layer_name])
+                checkpointer.finish()
+            else:
+                logger.info(f"All alignment layers for {sentence_pair.id} were generated earlier")
+            alignment_layers = AlignmentLayers(**layers)
             
             logger.info(f"Generated alignments - Lexical: {len(alignment_layers.lexical)}, "
                        f"Grammatical: {len(alignment_layers.grammatical_relations)}, "
@@ -76,7 +95,8 @@ def create_enriched_alignment_data(
     source_text: str,
     target_text: str,
     sentence_id: str,
-    claude_api_key: str = None
+    claude_api_key: str = None,
+    checkpoints: Optional[StageCache] = None
 ) -> AlignmentData:
     """
     Create complete alignment data with Claude-generated alignments.
@@ -90,6 +110,7 @@ def create_enriched_alignment_data(
         target_text: Translated text
         sentence_id: Unique ID for sentence pair
         claude_api_key: Optional Claude API key
+        checkpoints: Optional store of alignment layers generated earlier
     
     Returns:
         AlignmentData with populated alignment layers
@@ -109,4 +130,4 @@ def create_enriched_alignment_data(
     )
     
     # Then enrich with Claude-generated alignments
-    return generate_alignments_for_scaffold(scaffold_data, claude_api_key)
\ No newline at end of file
+    return generate_alignments_for_scaffold(scaffold_data, claude_api_key, checkpoints)
\ No newline at end of file
@@ -1,70 +1,728 @@
-"""File-based JSON cache for alignment data."""
+"""Alignment data cache: shared lookup logic, the file backend and backend selection."""
 
 import hashlib
-import json
 import logging
 import os
+import shutil
+import threading
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
-from .types import AlignmentData
+from .cache_format import (
+    CACHE_FORMAT,
+    CACHE_FORMATS,
+    check_format,
+    decode,
+    encode,
+    entry_json,
+    format_of,
+    pair_json,
+    with_sentence_id,
+)
+from .cache_index import CacheIndex
+from .cache_version import CACHE_VERSION
+from .executor import run_stage
+from .memory_cache import MemoryCache
+from .metrics import CACHE_REQUESTS, CACHE_TIER_HITS
+from .normalize import normalize_text
+from .stage_cache import StageCache
+from .types import AlignmentData, SentencePair
 
 logger = logging.getLogger(__name__)
 
+MEMORY_CACHE_ENTRIES = int(os.environ.get("ALIGNMENT_MEMORY_CACHE_ENTRIES", 10000))
+MEMORY_CACHE_BYTES = int(os.environ.get("ALIGNMENT_MEMORY_CACHE_BYTES", 128 * 1024 * 1024))
+# Entries older than this are treated as missing (0 keeps them forever)
+CACHE_TTL_SECONDS = float(os.environ.get("ALIGNMENT_CACHE_TTL_SECONDS", 0))
+# Total size budget for stored entries; 0 means unbounded
+CACHE_MAX_BYTES = int(os.environ.get("ALIGNMENT_CACHE_MAX_BYTES", 0))
+CACHE_BACKENDS = ("file", "sqlite")
+EVICTION_POLICIES = ("lru", "lfu")
 
-class AlignmentCache:
-    """Simple file-based cache for alignment data."""
+# Reads of an entry are written back at most this often per process, so hits stay read-mostly
+ACCESS_RESOLUTION_SECONDS = 60.0
+# Writes between eviction passes
+EVICTION_INTERVAL = 100
+# Bound on the per-process record of pending access write-backs
+MAX_TRACKED_ACCESSES = 100_000
+# Entry files live in subdirectories named after the first characters of their key
+SHARD_PREFIX_LENGTH = 2
+
+
+def _eviction_policy() -> str:
+    value = os.environ.get("ALIGNMENT_CACHE_EVICTION", "lru").strip().lower()
+    if value not in EVICTION_POLICIES:
+        raise ValueError(f"ALIGNMENT_CACHE_EVICTION must be one of {', '.join(EVICTION_POLICIES)}, got {value!r}")
+    return value
+
+
+CACHE_EVICTION_POLICY = _eviction_policy()
+
+
+class _Remembered:
+    """An entry in the in-memory tier: parsed data, the JSON of its sentence pair, or both.
+
+    Each form is filled in the first time a lookup needs it, so entries that are only
+    ever served as raw JSON are never parsed.
+    """
     
-    def __init__(self, cache_dir: Optional[str] = None):
-        """Initialize cache with directory path."""
-        self.cache_dir = Path(cache_dir or os.environ.get("ALIGNMENT_CACHE_DIR", ".cache/alignments"))
-        self.cache_dir.mkdir(parents=True, exist_ok=True)
+    __slots__ = ("data", "pair", "created_at")
     
-    def _get_cache_key(self, text: str, source_lang: str, target_lang: str) -> str:
-        """Generate cache key from request parameters."""
-        key_string = f"{text}:{source_lang}:{target_lang}"
+    def __init__(self, data: Optional[AlignmentData], pair: Optional[bytes], created_at: float):
+        self.data = data
+        self.pair = pair
+        self.created_at = created_at
+
+
+class BaseAlignmentCache:
+    """Lookup logic shared by the alignment cache backends.
+    
+    Hot entries are kept as parsed AlignmentData in a per-process LRU tier, read
+    through on a miss and written through on set, so repeated hits skip the storage
+    read, JSON parsing and validation. Values returned from the cache are shared and
+    must be treated as read-only (use model_copy to change them).
+    
+    get_response serves the same entries as response-ready JSON bytes instead, sliced
+    from the stored JSON without parsing or validating it.
+    
+    The `a`-prefixed methods are the async interface for the server: each runs its
+    blocking counterpart on the "cache" worker pool, so slow disks or network mounts
+    never stall the event loop. While an aset is in flight, lookups in this process
+    are answered from the data being written.
+    
+    Reads are counted per entry and written back to storage in batches, giving
+    backends the access time and hit count they need for LRU or LFU eviction.
+    
+    Keys include the version of the pipeline (prompt, Claude model and Stanza
+    processors, see cache_version), so a pipeline change turns every lookup into a
+    miss without clearing anything. Entries of other versions stay readable through
+    get_stale until they are rewritten for the current version, which replaces them.
+    
+    Backends implement _load, _load_json, _write_access, _find_stale, set, clear, evict
+    and list_entries, and keep intermediate pipeline results in `stages` (see StageCache).
+    """
+    
+    def __init__(
+        self,
+        memory_entries: Optional[int] = None,
+        memory_bytes: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        eviction_policy: Optional[str] = None,
+        version: Optional[str] = None,
+    ):
+        """Initialize the in-memory tier bounds, entry time-to-live and size budget (0 disables each)."""
+        self.memory = MemoryCache(
+            max_entries=MEMORY_CACHE_ENTRIES if memory_entries is None else memory_entries,
+            max_bytes=MEMORY_CACHE_BYTES if memory_bytes is None else memory_bytes,
+        )
+        self.ttl_seconds = CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.max_bytes = CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.eviction_policy = eviction_policy or CACHE_EVICTION_POLICY
+        self.version = version or CACHE_VERSION
+        if self.eviction_policy not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy: {self.eviction_policy}. Supported: {', '.join(EVICTION_POLICIES)}")
+        self._lock = threading.Lock()
+        self._writes_since_eviction = 0
+        # Key -> (time of the last write-back, reads since then)
+        self._accesses: Dict[str, Tuple[float, int]] = {}
+        # Key -> data of an aset that has not reached storage yet
+        self._pending: Dict[str, AlignmentData] = {}
+    
+    def _get_base_key(self, text: str, source_lang: str, target_lang: str) -> str:
+        """Generate the version-independent key of an input, after canonicalizing the text.
+        
+        Entries written before keys were versioned are stored under this key.
+        """
+        key_string = f"{normalize_text(text)}:{source_lang}:{target_lang}"
         return hashlib.sha256(key_string.encode()).hexdigest()
     
-    def _get_cache_path(self, cache_key: str) -> Path:
-        """Get file path for cache key."""
-        return self.cache_dir / f"{cache_key}.json"
+    def _get_cache_key(self, text: str, source_lang: str, target_lang: str) -> str:
+        """Generate cache key from request parameters and the pipeline version."""
+        base_key = self._get_base_key(text, source_lang, target_lang)
+        return hashlib.sha256(f"{base_key}:{self.version}".encode()).hexdigest()
     
     def get(self, text: str, source_lang: str, target_lang: str) -> Optional[AlignmentData]:
         """Retrieve cached alignment data."""
         try:
             cache_key = self._get_cache_key(text, source_lang, target_lang)
-            cache_path = self._get_cache_path(cache_key)
+            data = self.get_by_key(cache_key)
+            CACHE_REQUESTS.labels("hit" if data is not None else "miss").inc()
+            return data
+            
+        except Exception as e:
+            logger.warning(f"Cache retrieval failed: {e}")
+            CACHE_REQUESTS.labels("error").inc()
+            return None
+    
+    def get_response(self, text: str, source_lang: str, target_lang: str, sentence_id: str) -> Optional[bytes]:
+        """
+        Retrieve the cached sentence pair as JSON bytes ready to send, carrying the given id.
+        
+        Skips parsing and validation on hits: the pair is sliced out of the stored JSON
+        and only its id is replaced.
+        """
+        try:
+            cache_key = self._get_cache_key(text, source_lang, target_lang)
+        except Exception as e:
+            logger.warning(f"Cache retrieval failed: {e}")
+            CACHE_REQUESTS.labels("error").inc()
+            return None
+        return self.get_response_by_key(cache_key, sentence_id)
+    
+    def get_response_by_key(self, cache_key: str, sentence_id: str) -> Optional[bytes]:
+        """Like get_response, for an entry identified by its cache key."""
+        try:
+            pair = self._lookup_pair(cache_key)
+            CACHE_REQUESTS.labels("hit" if pair is not None else "miss").inc()
+            return with_sentence_id(pair, sentence_id) if pair is not None else None
+            
+        except Exception as e:
+            logger.warning(f"Cache retrieval failed: {e}")
+            CACHE_REQUESTS.labels("error").inc()
+            return None
+    
+    def get_stale(self, text: str, source_lang: str, target_lang: str) -> Optional[Tuple[AlignmentData, str]]:
+        """
+        Retrieve alignment data cached for the same input by another pipeline version.
+        
+        Returns:
+            Tuple of (alignment data, version that wrote it; "" before versioning), or None
+        """
+        try:
+            found = self._find_stale(self._get_base_key(text, source_lang, target_lang))
+            if found is None:
+                return None
+            cache_key, version = found
+            data = self._lookup(cache_key, promote=False)
+            if data is None:
+                return None
+            CACHE_REQUESTS.labels("stale").inc()
+            return data, version
+            
+        except Exception as e:
+            logger.warning(f"Stale cache retrieval failed: {e}")
+            return None
+    
+    def get_by_key(self, cache_key: str) -> Optional[AlignmentData]:
+        """Retrieve cached alignment data by cache key, from memory if it is hot."""
+        return self._lookup(cache_key, promote=True)
+    
+    def get_many(self, texts: List[str], source_lang: str, target_lang: str) -> List[Optional[AlignmentData]]:
+        """Retrieve cached alignment data for several texts sharing a language pair, in input order."""
+        return [self.get(text, source_lang, target_lang) for text in texts]
+    
+    def get_many_by_key(self, cache_keys: List[str]) -> List[Optional[AlignmentData]]:
+        """Retrieve cached alignment data for several cache keys, in input order.
+        
+        Used for bulk listing, so entries read from storage are not promoted into memory
+        where they would push out the entries that are actually hot, and the reads do not
+        count as accesses for eviction.
+        """
+        return [self._lookup(cache_key, promote=False, record=False) for cache_key in cache_keys]
+    
+    def set(self, text: str, source_lang: str, target_lang: str, alignment_data: AlignmentData) -> None:
+        """Store alignment data in cache."""
+        raise NotImplementedError
+    
+    async def aget(self, text: str, source_lang: str, target_lang: str) -> Optional[AlignmentData]:
+        """Async get, run on the cache worker pool."""
+        return await run_stage("cache", self.get, text, source_lang, target_lang)
+    
+    async def aget_response(
+        self, text: str, source_lang: str, target_lang: str, sentence_id: str
+    ) -> Optional[bytes]:
+        """Async get_response, run on the cache worker pool."""
+        return await run_stage("cache", self.get_response, text, source_lang, target_lang, sentence_id)
+    
+    async def aget_response_by_key(self, cache_key: str, sentence_id: str) -> Optional[bytes]:
+        """Async get_response_by_key, run on the cache worker pool."""
+        return await run_stage("cache", self.get_response_by_key, cache_key, sentence_id)
+    
+    async def aget_stale(self, text: str, source_lang: str, target_lang: str) -> Optional[Tuple[AlignmentData, str]]:
+        """Async get_stale, run on the cache worker pool."""
+        return await run_stage("cache", self.get_stale, text, source_lang, target_lang)
+    
+    async def aget_many(self, texts: List[str], source_lang: str, target_lang: str) -> List[Optional[AlignmentData]]:
+        """Async get_many, run on the cache worker pool."""
+        return await run_stage("cache", self.get_many, texts, source_lang, target_lang)
+    
+    async def aget_many_by_key(self, cache_keys: List[str]) -> List[Optional[AlignmentData]]:
+        """Async get_many_by_key, run on the cache worker pool."""
+        return await run_stage("cache", self.get_many_by_key, cache_keys)
+    
+    async def alist_entries(
+        self,
+        after: int = -1,
+        limit: int = 50,
+        source_lang: Optional[str] = None,
+        target_lang: Optional[str] = None,
+    ) -> Tuple[List[dict], Optional[int]]:
+        """Async list_entries, run on the cache worker pool."""
+        return await run_stage(
+            "cache", self.list_entries, after=after, limit=limit, source_lang=source_lang, target_lang=target_lang
+        )
+    
+    async def aset(self, text: str, source_lang: str, target_lang: str, alignment_data: AlignmentData) -> None:
+        """Async set, run on the cache worker pool; lookups see the data before the write completes."""
+        cache_key = self._get_cache_key(text, source_lang, target_lang)
+        self._pending[cache_key] = alignment_data
+        try:
+            await run_stage("cache", self.set, text, source_lang, target_lang, alignment_data)
+        finally:
+            # A later aset of the same key may have replaced this one in the meantime
+            if self._pending.get(cache_key) is alignment_data:
+                del self._pending[cache_key]
+    
+    def clear(self) -> None:
+        """Clear all cached data."""
+        raise NotImplementedError
+    
+    def evict(self) -> int:
+        """
+        Drop expired entries, then the least recently (lru) or least frequently (lfu)
+        used entries until the size budget is met.
+        
+        Returns:
+            Number of entries removed
+        """
+        raise NotImplementedError
+    
+    def list_entries(
+        self,
+        after: int = -1,
+        limit: int = 50,
+        source_lang: Optional[str] = None,
+        target_lang: Optional[str] = None,
+    ) -> Tuple[List[dict], Optional[int]]:
+        """
+        List entries in insertion order for cursor pagination.
+        
+        Returns:
+            Tuple of (entries with at least key, seq, text, source_lang and target_lang,
+            sequence number to resume after or None at the end)
+        """
+        raise NotImplementedError
+    
+    def _load(self, cache_key: str) -> Optional[Tuple[AlignmentData, int, float]]:
+        """Read an entry from storage as (data, size of its uncompressed JSON in bytes, creation time), or None."""
+        raise NotImplementedError
+    
+    def _load_json(self, cache_key: str) -> Optional[Tuple[bytes, int, float]]:
+        """Read an entry from storage as (unvalidated JSON, its size in bytes, creation time), or None."""
+        raise NotImplementedError
+    
+    def _write_access(self, cache_key: str, hits: int) -> None:
+        """Add `hits` reads to a stored entry and set its last access time to now."""
+        raise NotImplementedError
+    
+    def _find_stale(self, base_key: str) -> Optional[Tuple[str, str]]:
+        """Find an entry for an input written by a version other than the current one, as (key, version)."""
+        raise NotImplementedError
+    
+    def _record_access(self, cache_key: str) -> None:
+        now = time.time()
+        with self._lock:
+            last_written, pending = self._accesses.get(cache_key, (0.0, 0))
+            pending += 1
+            if now - last_written <= ACCESS_RESOLUTION_SECONDS:
+                self._accesses[cache_key] = (last_written, pending)
+                return
+            if len(self._accesses) >= MAX_TRACKED_ACCESSES:
+                self._accesses.clear()
+            self._accesses[cache_key] = (now, 0)
+        
+        try:
+            self._write_access(cache_key, pending)
+        except Exception as e:
+            logger.debug(f"Could not record cache access: {e}")
+    
+    def _after_write(self) -> None:
+        """Run an eviction pass every EVICTION_INTERVAL writes."""
+        with self._lock:
+            self._writes_since_eviction += 1
+            due = self._writes_since_eviction >= EVICTION_INTERVAL
+            if due:
+                self._writes_since_eviction = 0
+        if due:
+            self.evict()
+    
+    def _remember(
+        self,
+        cache_key: str,
+        alignment_data: Optional[AlignmentData],
+        size: int,
+        created_at: float,
+        pair: Optional[bytes] = None,
+    ) -> None:
+        self.memory.put(cache_key, _Remembered(alignment_data, pair, created_at), size)
+    
+    def _expired(self, created_at: float) -> bool:
+        return self.ttl_seconds > 0 and time.time() - created_at > self.ttl_seconds
+    
+    def _recall(self, cache_key: str, record: bool = True) -> Optional[_Remembered]:
+        """Return an unexpired entry of the in-memory tier, counting the hit (and the access, if `record`)."""
+        remembered = self.memory.get(cache_key)
+        if remembered is None:
+            return None
+        if self._expired(remembered.created_at):
+            self.memory.discard(cache_key)
+            return None
+        CACHE_TIER_HITS.labels("memory").inc()
+        if record:
+            self._record_access(cache_key)
+        return remembered
+    
+    def _lookup(self, cache_key: str, promote: bool, record: bool = True) -> Optional[AlignmentData]:
+        pending = self._pending.get(cache_key)
+        if pending is not None:
+            return pending
+        
+        remembered = self._recall(cache_key, record)
+        if remembered is not None:
+            if remembered.data is None:
+                # Only served as raw JSON so far
+                remembered.data = AlignmentData(sentences=[SentencePair.model_validate_json(remembered.pair)])
+            return remembered.data
+        
+        loaded = self._load(cache_key)
+        if loaded is None:
+            return None
+        data, size, created_at = loaded
+        if self._expired(created_at):
+            return None
+        CACHE_TIER_HITS.labels("disk").inc()
+        if record:
+            self._record_access(cache_key)
+        if promote:
+            self._remember(cache_key, data, size, created_at)
+        return data
+    
+    def _lookup_pair(self, cache_key: str) -> Optional[bytes]:
+        pending = self._pending.get(cache_key)
+        if pending is not None:
+            return pending.sentences[0].model_dump_json().encode("utf-8") if pending.sentences else None
+        
+        remembered = self._recall(cache_key)
+        if remembered is not None:
+            if remembered.pair is None:
+                if not remembered.data.sentences:
+                    return None
+                remembered.pair = remembered.data.sentences[0].model_dump_json().encode("utf-8")
+            return remembered.pair
+        
+        loaded = self._load_json(cache_key)
+        if loaded is None:
+            return None
+        content, size, created_at = loaded
+        if self._expired(created_at):
+            return None
+        pair = pair_json(content)
+        if pair is None:
+            return None
+        CACHE_TIER_HITS.labels("disk").inc()
+        self._record_access(cache_key)
+        self._remember(cache_key, None, size, created_at, pair)
+        return pair
+
+
+class AlignmentCache(BaseAlignmentCache):
+    """File-based cache for alignment data, one file per entry.
+    
+    Entries are stored in the configured format (compact JSON by default, optionally
+    gzip/zstd-compressed or msgpack), named <key>.<format> so entries written in any
+    format stay readable. Files are spread over subdirectories named after the first
+    two hex digits of their key (<cache_dir>/ab/ab12....json), so no directory grows
+    past a few thousand entries. Files from the older flat layout are still found and moved into their
+    shard on first read. Entries are written to a temporary file and renamed into
+    place, so concurrent readers never see a partial file. Sizes, access times and
+    hit counts are kept in the index, so eviction never scans the cache directory.
+    """
+    
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        memory_entries: Optional[int] = None,
+        memory_bytes: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        eviction_policy: Optional[str] = None,
+        cache_format: Optional[str] = None,
+        version: Optional[str] = None,
+    ):
+        """Initialize cache with directory path and optional memory tier, TTL, size budget, format and version settings."""
+        super().__init__(
+            memory_entries=memory_entries,
+            memory_bytes=memory_bytes,
+            ttl_seconds=ttl_seconds,
+            max_bytes=max_bytes,
+            eviction_policy=eviction_policy,
+            version=version,
+        )
+        self.format = cache_format or CACHE_FORMAT
+        check_format(self.format)
+        # Look for entries in the configured format first
+        self._read_formats = (self.format, *(other for other in CACHE_FORMATS if other != self.format))
+        self.cache_dir = Path(cache_dir or os.environ.get("ALIGNMENT_CACHE_DIR", ".cache/alignments"))
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.index = CacheIndex(self.cache_dir / "index.jsonl")
+        self.stages = StageCache(self.cache_dir)
+        if not self.index.exists():
+            self._rebuild_index()
+        self.evict()
+    
+    def _get_cache_path(self, cache_key: str, cache_format: Optional[str] = None) -> Path:
+        """Get file path for cache key in the given format (default: the configured one)."""
+        return self.cache_dir / cache_key[:SHARD_PREFIX_LENGTH] / f"{cache_key}.{cache_format or self.format}"
+    
+    def _get_legacy_path(self, cache_key: str) -> Path:
+        """Get file path for cache key in the flat layout used before sharding."""
+        return self.cache_dir / f"{cache_key}.json"
+    
+    def _load(self, cache_key: str) -> Optional[Tuple[AlignmentData, int, float]]:
+        try:
+            found = self._find(cache_key)
+            if found is None:
+                return None
+            
+            cache_path, cache_format, modified_at = found
+            content = cache_path.read_bytes()
+            if cache_format == "msgpack":
+                alignment_data = decode(content, cache_format)
+                return alignment_data, len(alignment_data.model_dump_json().encode("utf-8")), modified_at
+            # The memory tier is charged for the JSON, not the compressed bytes on disk
+            content = entry_json(content, cache_format)
+            return AlignmentData.model_validate_json(content), len(content), modified_at
             
-            if not cache_path.exists():
+        except Exception as e:
+            logger.warning(f"Cache retrieval failed: {e}")
+            return None
+    
+    def _load_json(self, cache_key: str) -> Optional[Tuple[bytes, int, float]]:
+        try:
+            found = self._find(cache_key)
+            if found is None:
                 return None
             
-            json_content = cache_path.read_text(encoding="utf-8")
-            data = json.loads(json_content)
-            return AlignmentData.model_validate(data)
+            cache_path, cache_format, modified_at = found
+            content = entry_json(cache_path.read_bytes(), cache_format)
+            return content, len(content), modified_at
             
         except Exception as e:
             logger.warning(f"Cache retrieval failed: {e}")
             return None
     
+    def _find(self, cache_key: str) -> Optional[Tuple[Path, str, float]]:
+        """Locate an entry file as (path, format, modification time), or None."""
+        for cache_format in self._read_formats:
+            cache_path = self._get_cache_path(cache_key, cache_format)
+            try:
+                return cache_path, cache_format, cache_path.stat().st_mtime
+            except FileNotFoundError:
+                continue
+        
+        if self._migrate_legacy(cache_key):
+            cache_path = self._get_cache_path(cache_key, "json")
+            return cache_path, "json", cache_path.stat().st_mtime
+        return None
+    
+    def _migrate_legacy(self, cache_key: str) -> bool:
+        """Move an entry from the flat layout into its shard; False if there is none."""
+        cache_path = self._get_cache_path(cache_key, "json")
+        try:
+            cache_path.parent.mkdir(exist_ok=True)
+            os.replace(self._get_legacy_path(cache_key), cache_path)
+        except FileNotFoundError:
+            # Not cached, or another process moved it first
+            return cache_path.exists()
+        return True
+    
+    def _write_access(self, cache_key: str, hits: int) -> None:
+        self.index.touch(cache_key, hits=hits)
+    
+    def _find_stale(self, base_key: str) -> Optional[Tuple[str, str]]:
+        entry = self.index.find_base(base_key)
+        if entry is None or entry.get("version", "") == self.version:
+            return None
+        return entry["key"], entry.get("version", "")
+    
     def set(self, text: str, source_lang: str, target_lang: str, alignment_data: AlignmentData) -> None:
         """Store alignment data in cache."""
         try:
+            base_key = self._get_base_key(text, source_lang, target_lang)
             cache_key = self._get_cache_key(text, source_lang, target_lang)
             cache_path = self._get_cache_path(cache_key)
+            previous = self.index.get(cache_key)
+            replaced = self.index.find_base(base_key)
             
-            json_content = alignment_data.model_dump_json(indent=2)
-            cache_path.write_text(json_content, encoding="utf-8")
+            content = encode(alignment_data, self.format)
+            cache_path.parent.mkdir(exist_ok=True)
+            # Write-then-rename so other workers never read a half-written entry
+            tmp_path = cache_path.with_name(f".{cache_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(content)
+            os.replace(tmp_path, cache_path)
+            if previous is not None and previous.get("format", "json") != self.format:
+                # Rewritten in a new format: drop the copy in the old one
+                self._get_cache_path(cache_key, previous.get("format", "json")).unlink(missing_ok=True)
+            if replaced is not None and replaced["key"] != cache_key:
+                # The entry of an earlier pipeline version for this input is superseded
+                self._remove(replaced["key"])
             
+            # The memory tier holds the parsed entry, so it is charged for the JSON rather than the stored bytes
+            json_size = len(content) if self.format == "json" else len(alignment_data.model_dump_json().encode("utf-8"))
+            self._remember(cache_key, alignment_data, json_size, time.time())
+            self.index.add(
+                cache_key,
+                text=text,
+                source_lang=source_lang,
+                target_lang=target_lang,
+                size=len(content),
+                format=self.format,
+                base_key=base_key,
+                version=self.version,
+            )
             logger.info(f"Cached alignment data for key: {cache_key}")
             
+            self._after_write()
+            
         except Exception as e:
             logger.warning(f"Cache storage failed: {e}")
     
     def clear(self) -> None:
         """Clear all cached data."""
         try:
-            for cache_file in self.cache_dir.glob("*.json"):
-                cache_file.unlink()
+            self.memory.clear()
+            for path in self.cache_dir.iterdir():
+                if path.is_dir() and _is_shard(path.name):
+                    shutil.rmtree(path, ignore_errors=True)
+                elif format_of(path.name):
+                    path.unlink(missing_ok=True)
+            self.index.reset()
+            self.stages.clear()
             logger.info("Cache cleared")
         except Exception as e:
-            logger.warning(f"Cache clear failed: {e}")
\ No newline at end of file
+            logger.warning(f"Cache clear failed: {e}")
+    
+    def evict(self) -> int:
+        """
+        Drop expired entries, then the least recently (lru) or least frequently (lfu)
+        used entries until the size budget is met.
+        
+        Returns:
+            Number of entries removed
+        """
+        if self.ttl_seconds <= 0 and self.max_bytes <= 0:
+            return 0
+        
+        removed = 0
+        try:
+            entries = self.index.snapshot()
+            if self.ttl_seconds > 0:
+                expired = [entry for entry in entries if self._expired(entry.get("created_at", 0.0))]
+                for entry in expired:
+                    self._remove(entry["key"])
+                removed += len(expired)
+                entries = [entry for entry in entries if not self._expired(entry.get("created_at", 0.0))]
+            
+            if self.max_bytes > 0:
+                sizes = {entry["key"]: self._entry_size(entry) for entry in entries}
+                total = sum(sizes.values())
+                for entry in sorted(entries, key=self._eviction_rank):
+                    if total <= self.max_bytes:
+                        break
+                    self._remove(entry["key"])
+                    total -= sizes[entry["key"]]
+                    removed += 1
+        except Exception as e:
+            logger.warning(f"Cache eviction failed: {e}")
+        
+        if removed:
+            logger.info(f"Evicted {removed} cache entries")
+        return removed
+    
+    def _eviction_rank(self, entry: dict) -> tuple:
+        # Entries that sort first are evicted first
+        accessed_at = entry.get("accessed_at", entry.get("created_at", 0.0))
+        if self.eviction_policy == "lfu":
+            return entry.get("hits", 0), accessed_at, entry["seq"]
+        return accessed_at, entry["seq"]
+    
+    def _entry_size(self, entry: dict) -> int:
+        if "size" in entry:
+            return entry["size"]
+        # Indexed before sizes were recorded
+        found = self._find(entry["key"])
+        return found[0].stat().st_size if found else 0
+    
+    def _remove(self, cache_key: str) -> None:
+        self.memory.discard(cache_key)
+        for cache_format in CACHE_FORMATS:
+            self._get_cache_path(cache_key, cache_format).unlink(missing_ok=True)
+        self._get_legacy_path(cache_key).unlink(missing_ok=True)
+        self.index.remove(cache_key)
+    
+    def list_entries(
+        self,
+        after: int = -1,
+        limit: int = 50,
+        source_lang: Optional[str] = None,
+        target_lang: Optional[str] = None,
+    ) -> Tuple[List[dict], Optional[int]]:
+        """List index entries in insertion order for cursor pagination (see CacheIndex.page)."""
+        return self.index.page(after=after, limit=limit, source_lang=source_lang, target_lang=target_lang)
+    
+    def _rebuild_index(self) -> None:
+        """Index cache files written before the index existed, oldest first."""
+        cache_files = [
+            path for path in [*self.cache_dir.glob("*.*"), *self.cache_dir.glob("*/*.*")] if format_of(path.name)
+        ]
+        cache_files.sort(key=lambda path: path.stat().st_mtime)
+        if not cache_files:
+            return
+        
+        logger.info(f"Rebuilding cache index from {len(cache_files)} files")
+        for cache_file in cache_files:
+            cache_key = cache_file.name.partition(".")[0]
+            loaded = self._load(cache_key)
+            if loaded is None or not loaded[0].sentences:
+                continue
+            pair = loaded[0].sentences[0]
+            base_key = self._get_base_key(pair.source.text, pair.source.lang, pair.target.lang)
+            # Only the current version's key can be recognized; others count as unversioned
+            current = cache_key == self._get_cache_key(pair.source.text, pair.source.lang, pair.target.lang)
+            self.index.add(
+                cache_key,
+                text=pair.source.text,
+                source_lang=pair.source.lang,
+                target_lang=pair.target.lang,
+                size=cache_file.stat().st_size,
+                format=format_of(cache_file.name),
+                base_key=base_key,
+                version=self.version if current else "",
+            )
+
+
+def _is_shard(name: str) -> bool:
+    return len(name) == SHARD_PREFIX_LENGTH and all(char in "0123456789abcdef" for char in name)
+
+
+def create_cache(backend: Optional[str] = None, cache_dir: Optional[str] = None) -> BaseAlignmentCache:
+    """
+    Create the alignment cache backend selected by ALIGNMENT_CACHE_BACKEND.
+    
+    Args:
+        backend: "file" (one JSON file per entry) or "sqlite" (single WAL-mode database)
+        cache_dir: Directory for the cache files or database (defaults to ALIGNMENT_CACHE_DIR)
+    
+    Returns:
+        The cache backend
+    """
+    backend = (backend or os.environ.get("ALIGNMENT_CACHE_BACKEND", "file")).strip().lower()
+    if backend == "file":
+        return AlignmentCache(cache_dir=cache_dir)
+    if backend == "sqlite":
+        from .sqlite_cache import SQLiteAlignmentCache
+        
+        return SQLiteAlignmentCache(cache_dir=cache_dir)
+    raise ValueError(f"Unknown cache backend: {backend}. Supported: {', '.join(CACHE_BACKENDS)}")
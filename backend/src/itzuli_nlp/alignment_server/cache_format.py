@@ -0,0 +1,135 @@
+"""Encodings for stored alignment cache entries."""
+
+import gzip
+import importlib.util
+import json
+import os
+from typing import Dict, Optional
+
+from .types import AlignmentData
+
+# Each format is also the file extension of the entries it writes (<key>.<format>),
+# so entries written in any format stay readable after the setting changes
+CACHE_FORMATS = ("json", "json.gz", "json.zst", "msgpack")
+
+# Packages needed by the optional formats
+_REQUIRED_PACKAGES: Dict[str, str] = {"json.zst": "zstandard", "msgpack": "msgpack"}
+
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+# How compact JSON of a cache entry (one sentence pair) starts and ends, and how a pair starts
+_ENTRY_PREFIX = b'{"sentences":['
+_ENTRY_SUFFIX = b']}'
+_PAIR_ID_PREFIX = '{"id":'
+
+
+def _format_setting() -> str:
+    value = os.environ.get("ALIGNMENT_CACHE_FORMAT", "json").strip().lower()
+    if value not in CACHE_FORMATS:
+        raise ValueError(f"ALIGNMENT_CACHE_FORMAT must be one of {', '.join(CACHE_FORMATS)}, got {value!r}")
+    return value
+
+
+CACHE_FORMAT = _format_setting()
+
+
+def format_available(cache_format: str) -> bool:
+    """Whether the package a format needs (if any) is installed."""
+    package = _REQUIRED_PACKAGES.get(cache_format)
+    return package is None or importlib.util.find_spec(package) is not None
+
+
+def check_format(cache_format: str) -> None:
+    """
+    Raise ValueError if a format is unknown or its package is not installed.
+
+    Args:
+        cache_format: One of CACHE_FORMATS
+    """
+    if cache_format not in CACHE_FORMATS:
+        raise ValueError(f"Unknown cache format: {cache_format}. Supported: {', '.join(CACHE_FORMATS)}")
+    if not format_available(cache_format):
+        raise ValueError(f"Cache format {cache_format} requires the {_REQUIRED_PACKAGES[cache_format]} package")
+
+
+def format_of(filename: str) -> Optional[str]:
+    """Return the format of an entry file from its name (<key>.<format>), or None if it is not an entry."""
+    if filename.startswith("."):
+        # Temporary file of an in-progress write
+        return None
+    _, _, extension = filename.partition(".")
+    return extension if extension in CACHE_FORMATS else None
+
+
+def encode(alignment_data: AlignmentData, cache_format: str) -> bytes:
+    """Serialize alignment data without indentation, then compress or pack it for the format."""
+    if cache_format == "msgpack":
+        import msgpack
+
+        return msgpack.packb(alignment_data.model_dump(mode="json"), use_bin_type=True)
+
+    content = alignment_data.model_dump_json().encode("utf-8")
+    if cache_format == "json.gz":
+        # mtime=0 keeps the output deterministic for identical entries
+        return gzip.compress(content, compresslevel=GZIP_LEVEL, mtime=0)
+    if cache_format == "json.zst":
+        import zstandard
+
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(content)
+    return content
+
+
+def decode(content: bytes, cache_format: str) -> AlignmentData:
+    """Parse and validate an entry stored in the given format."""
+    if cache_format == "msgpack":
+        import msgpack
+
+        return AlignmentData.model_validate(msgpack.unpackb(content, raw=False))
+
+    if cache_format == "json.gz":
+        content = gzip.decompress(content)
+    elif cache_format == "json.zst":
+        import zstandard
+
+        content = zstandard.ZstdDecompressor().decompress(content)
+    return AlignmentData.model_validate_json(content)
+
+
+def entry_json(content: bytes, cache_format: str) -> bytes:
+    """Return the JSON of an entry stored in the given format, without validating it."""
+    if cache_format == "msgpack":
+        return decode(content, cache_format).model_dump_json().encode("utf-8")
+    if cache_format == "json.gz":
+        return gzip.decompress(content)
+    if cache_format == "json.zst":
+        import zstandard
+
+        return zstandard.ZstdDecompressor().decompress(content)
+    return content
+
+
+def pair_json(content: bytes) -> Optional[bytes]:
+    """
+    Return the JSON of the sentence pair in an entry's JSON, or None if it has none.
+
+    Entries written as compact JSON are sliced without parsing; others (e.g. indented
+    entries from before compact storage) are parsed and re-serialized.
+    """
+    if content.startswith(_ENTRY_PREFIX) and content.endswith(_ENTRY_SUFFIX):
+        return content[len(_ENTRY_PREFIX):-len(_ENTRY_SUFFIX)] or None
+    alignment_data = AlignmentData.model_validate_json(content)
+    if not alignment_data.sentences:
+        return None
+    return alignment_data.sentences[0].model_dump_json().encode("utf-8")
+
+
+def with_sentence_id(pair: bytes, sentence_id: str) -> bytes:
+    """Replace the id of a serialized sentence pair without parsing the rest of it."""
+    text = pair.decode("utf-8")
+    if not text.startswith(_PAIR_ID_PREFIX + '"'):
+        raise ValueError("Serialized sentence pair does not start with its id")
+    # Position just past the closing quote of the current id
+    _, end = json.decoder.scanstring(text, len(_PAIR_ID_PREFIX) + 1)
+    new_id = json.dumps(sentence_id, ensure_ascii=False)
+    return f"{_PAIR_ID_PREFIX}{new_id}{text[end:]}".encode("utf-8")
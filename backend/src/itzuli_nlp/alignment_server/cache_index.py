@@ -0,0 +1,275 @@
+"""Append-only index of alignment cache entries for listing and pagination."""
+
+import bisect
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Superseded lines (tombstones, touches, replaced entries) needed before the file is compacted
+COMPACTION_MIN_DEAD_LINES = int(os.environ.get("ALIGNMENT_CACHE_INDEX_COMPACT_MIN", 1000))
+
+
+class CacheIndex:
+    """In-memory view of an append-only JSON Lines index file.
+
+    Every cache write appends one record, deletions append a tombstone and batched reads
+    append a touch record with the access time and hit count used for eviction, so
+    several server processes can share the file. Each record's line number is its
+    sequence number, which gives a stable insertion order for cursor pagination. The
+    file is re-read incrementally from the last offset seen, so listing and eviction
+    never touch the cache entries themselves.
+
+    Entries also record the version-independent `base_key` of their input, so an
+    entry written by an earlier pipeline version can be found for the same input.
+    Entries indexed before versioning have no base_key; their key is the base key.
+
+    Once superseded lines outnumber live entries (and at least `compact_min_dead_lines`),
+    the file is compacted: live entries, with their access stats folded in, are written
+    to a temporary file that replaces the index. Compacted entries keep their sequence
+    number and a header line carries the next one, so cursors stay valid. Appends hold a
+    shared lock on the file and compaction an exclusive one, and other processes reload
+    when the file is replaced.
+    """
+
+    def __init__(self, path: Path, compact_min_dead_lines: int = COMPACTION_MIN_DEAD_LINES):
+        """Initialize index backed by the given JSON Lines file."""
+        self.path = path
+        self.compact_min_dead_lines = compact_min_dead_lines
+        self._lock = threading.Lock()
+        self._inode: Optional[int] = None
+        self._offset = 0
+        self._next_seq = 0
+        # Lines read from the current file, live or not
+        self._line_count = 0
+        self._entries: Dict[str, dict] = {}
+        self._seqs: List[int] = []
+        self._by_seq: Dict[int, str] = {}
+        # Base key -> key of the latest entry for that input
+        self._by_base: Dict[str, str] = {}
+
+    def exists(self) -> bool:
+        """Whether the index file has been created."""
+        return self.path.exists()
+
+    def add(self, key: str, **metadata) -> None:
+        """Record a new or replaced cache entry."""
+        self._append({"key": key, "created_at": time.time(), **metadata})
+
+    def remove(self, key: str) -> None:
+        """Record that a cache entry was deleted."""
+        self._append({"key": key, "deleted": True})
+
+    def touch(self, key: str, hits: int = 1) -> None:
+        """Record reads of an entry, updating its last access time and hit count but not its position."""
+        self._append({"key": key, "touched": time.time(), "hits": hits})
+
+    def reset(self) -> None:
+        """Drop all index records."""
+        with self._lock:
+            self.path.unlink(missing_ok=True)
+            self._forget()
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return the live index entry for a key, if any."""
+        with self._lock:
+            self._refresh()
+            return self._entries.get(key)
+
+    def find_base(self, base_key: str) -> Optional[dict]:
+        """Return the latest live entry for an input, whatever pipeline version wrote it."""
+        with self._lock:
+            self._refresh()
+            key = self._by_base.get(base_key)
+            return self._entries.get(key) if key is not None else None
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._entries)
+
+    def snapshot(self) -> List[dict]:
+        """Return copies of all live entries in insertion order."""
+        with self._lock:
+            self._refresh()
+            return [dict(self._entries[self._by_seq[seq]]) for seq in self._seqs]
+
+    def page(
+        self,
+        after: int = -1,
+        limit: int = 50,
+        source_lang: Optional[str] = None,
+        target_lang: Optional[str] = None,
+    ) -> Tuple[List[dict], Optional[int]]:
+        """
+        Return up to `limit` live entries with a sequence number greater than `after`.
+
+        Args:
+            after: Sequence number of the last entry already seen (-1 to start at the beginning)
+            limit: Maximum number of entries to return
+            source_lang: Only include entries with this source language
+            target_lang: Only include entries with this target language
+
+        Returns:
+            Tuple of (entries in insertion order, sequence number to resume after or None at the end)
+        """
+        with self._lock:
+            self._refresh()
+            page: List[dict] = []
+            start = bisect.bisect_right(self._seqs, after)
+            for position in range(start, len(self._seqs)):
+                entry = self._entries[self._by_seq[self._seqs[position]]]
+                if source_lang and entry.get("source_lang") != source_lang:
+                    continue
+                if target_lang and entry.get("target_lang") != target_lang:
+                    continue
+                if len(page) == limit:
+                    return page, page[-1]["seq"]
+                page.append(entry)
+            return page, None
+
+    def compact(self) -> bool:
+        """Rewrite the file with only live entries. Returns False if another process replaced it first."""
+        with self._lock:
+            return self._compact()
+
+    def _append(self, record: dict) -> None:
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            while True:
+                # A single O_APPEND write keeps lines from concurrent processes intact
+                fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_SH)
+                    # Compacted while waiting for the lock: append to the new file instead
+                    if self._is_current(fd):
+                        os.write(fd, line.encode("utf-8"))
+                        break
+                finally:
+                    os.close(fd)
+            self._refresh()
+            dead = self._line_count - len(self._entries)
+            if dead >= self.compact_min_dead_lines and dead > len(self._entries):
+                self._compact()
+
+    def _is_current(self, fd: int) -> bool:
+        try:
+            return os.fstat(fd).st_ino == self.path.stat().st_ino
+        except FileNotFoundError:
+            return False
+
+    def _compact(self) -> bool:
+        # Caller holds the lock
+        try:
+            fd = os.open(self.path, os.O_RDONLY)
+        except FileNotFoundError:
+            return False
+        try:
+            # Waits for appends in progress and keeps new ones out until the file is replaced
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            if not self._is_current(fd):
+                return False
+            self._refresh()
+            live = len(self._entries)
+            tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(json.dumps({"next_seq": self._next_seq}) + "\n")
+                for seq in self._seqs:
+                    f.write(json.dumps(self._entries[self._by_seq[seq]], ensure_ascii=False) + "\n")
+            os.replace(tmp_path, self.path)
+        finally:
+            os.close(fd)
+        logger.info(f"Compacted cache index to {live} entries")
+        self._forget()
+        self._refresh()
+        return True
+
+    def _refresh(self) -> None:
+        # Caller holds the lock
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            # Index was removed by another process
+            self._forget()
+            return
+
+        size = stat.st_size
+        if stat.st_ino != self._inode or size < self._offset:
+            # Compacted, truncated or recreated: reload from scratch
+            self._forget()
+            self._inode = stat.st_ino
+        if size == self._offset:
+            return
+
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read()
+
+        # Leave a partially written trailing line for the next refresh
+        complete = data.rfind(b"\n") + 1
+        for raw_line in data[:complete].splitlines():
+            self._line_count += 1
+            try:
+                record = json.loads(raw_line)
+                if "next_seq" in record:
+                    # Header of a compacted file
+                    self._next_seq = record["next_seq"]
+                    self._line_count -= 1
+                    continue
+                key = record["key"]
+            except (ValueError, KeyError, TypeError) as e:
+                logger.warning(f"Skipping malformed cache index line {self._line_count - 1}: {e}")
+                self._next_seq += 1
+                continue
+            # Compacted entries keep the sequence number they were first given
+            seq = record.pop("seq", None)
+            if seq is None:
+                seq = self._next_seq
+                self._next_seq += 1
+            self._apply(seq, key, record)
+        self._offset += complete
+
+    def _forget(self) -> None:
+        self._inode = None
+        self._offset = 0
+        self._next_seq = 0
+        self._line_count = 0
+        self._entries.clear()
+        self._seqs.clear()
+        self._by_seq.clear()
+        self._by_base.clear()
+
+    def _apply(self, seq: int, key: str, record: dict) -> None:
+        if "touched" in record:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry["accessed_at"] = max(entry.get("accessed_at", 0.0), record["touched"])
+                entry["hits"] = entry.get("hits", 0) + record.get("hits", 1)
+            return
+
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._by_seq.pop(previous["seq"], None)
+            position = bisect.bisect_left(self._seqs, previous["seq"])
+            if position < len(self._seqs) and self._seqs[position] == previous["seq"]:
+                del self._seqs[position]
+            base_key = previous.get("base_key", key)
+            if self._by_base.get(base_key) == key:
+                del self._by_base[base_key]
+
+        if record.get("deleted"):
+            return
+
+        entry = {**record, "seq": seq}
+        self._entries[key] = entry
+        self._by_seq[seq] = key
+        self._by_base[record.get("base_key", key)] = key
+        # Sequence numbers only grow, so appending keeps the list sorted
+        self._seqs.append(seq)
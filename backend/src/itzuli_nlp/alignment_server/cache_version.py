@@ -0,0 +1,57 @@
+"""Version fingerprint of the pipeline that produces alignment cache entries."""
+
+import hashlib
+import json
+import os
+from typing import Optional
+
+from ..core.nlp import PIPELINE_PROCESSORS
+from .claude_client import ALIGNMENT_MAX_TOKENS, ALIGNMENT_MODEL, ALIGNMENT_TEMPERATURE, ClaudeClient
+
+# Length of each half of a version string, in hex digits
+FINGERPRINT_LENGTH = 8
+
+
+def _fingerprint(settings: dict) -> str:
+    content = json.dumps(settings, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(content.encode()).hexdigest()[:FINGERPRINT_LENGTH]
+
+
+def analysis_fingerprint() -> str:
+    """Fingerprint of the settings that decide the tokens and analyses of a sentence pair."""
+    return _fingerprint({"processors": PIPELINE_PROCESSORS})
+
+
+def alignment_fingerprint() -> str:
+    """Fingerprint of the settings that decide the alignment layers Claude generates for a scaffold."""
+    # The prompt with placeholder inputs changes exactly when its instructions do
+    prompt = ClaudeClient._build_full_prompt(
+        [], [], "{source_lang}", "{target_lang}", "{source_text}", "{target_text}"
+    )
+    return _fingerprint({
+        "model": ALIGNMENT_MODEL,
+        "max_tokens": ALIGNMENT_MAX_TOKENS,
+        "temperature": ALIGNMENT_TEMPERATURE,
+        "prompt": prompt,
+    })
+
+
+def cache_version() -> str:
+    """
+    Version of the current pipeline, as "<analysis fingerprint>-<alignment fingerprint>".
+
+    ALIGNMENT_CACHE_VERSION overrides the computed version, e.g. to keep serving
+    existing entries as current after a change that does not affect the results.
+    """
+    return os.environ.get("ALIGNMENT_CACHE_VERSION") or f"{analysis_fingerprint()}-{alignment_fingerprint()}"
+
+
+def same_analysis(version: Optional[str], other: Optional[str]) -> bool:
+    """Whether two versions share the analysis stage, so only the alignment layers differ."""
+    if not version or not other:
+        # Entries written before versioning: nothing is known about how they were made
+        return False
+    return version.partition("-")[0] == other.partition("-")[0]
+
+
+CACHE_VERSION = cache_version()
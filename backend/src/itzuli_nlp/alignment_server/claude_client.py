@@ -3,15 +3,21 @@
 import json
 import logging
 import os
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, List, Tuple
 
 import anthropic
 from anthropic import Anthropic
 
+from .metrics import track_stage
 from .types import AlignmentLayers, Alignment
 
 logger = logging.getLogger(__name__)
 
+ALIGNMENT_MODEL = "claude-opus-4-6"
+ALIGNMENT_MAX_TOKENS = 4000
+ALIGNMENT_TEMPERATURE = 0.1
+LAYER_NAMES = ("lexical", "grammatical_relations", "features")
+
 
 class ClaudeClient:
     """Client for interacting with Claude API to generate alignment data."""
@@ -31,25 +37,27 @@ class ClaudeClient:
         source_lang: str,
         target_lang: str,
         source_text: str,
-        target_text: str
+        target_text: str,
+        layers: Tuple[str, ...] = LAYER_NAMES
     ) -> AlignmentLayers:
-        """Generate all three alignment layers using Claude."""
+        """Generate alignment layers using Claude (all three unless `layers` names a subset; others stay empty)."""
 
         prompt = self._build_alignment_prompt(
-            source_tokens, target_tokens, source_lang, target_lang, source_text, target_text
+            source_tokens, target_tokens, source_lang, target_lang, source_text, target_text, layers
         )
 
         try:
             logger.info("Calling Claude API for alignment generation")
-            response = self.client.messages.create(
-                model="claude-opus-4-6",
-                max_tokens=4000,
-                temperature=0.1,
-                messages=[{
-                    "role": "user",
-                    "content": prompt
-                }]
-            )
+            with track_stage("claude"):
+                response = self.client.messages.create(
+                    model=ALIGNMENT_MODEL,
+                    max_tokens=ALIGNMENT_MAX_TOKENS,
+                    temperature=ALIGNMENT_TEMPERATURE,
+                    messages=[{
+                        "role": "user",
+                        "content": prompt
+                    }]
+                )
 
             content = response.content[0].text if response.content else ""
             logger.info(f"Claude response received, length: {len(content)}")
@@ -59,16 +67,63 @@ class ClaudeClient:
                        f"Grammatical: {len(alignments_data.get('grammatical_relations', []))}, "
                        f"Features: {len(alignments_data.get('features', []))}")
 
-            return AlignmentLayers(
-                lexical=alignments_data.get("lexical", []),
-                grammatical_relations=alignments_data.get("grammatical_relations", []),
-                features=alignments_data.get("features", [])
-            )
+            return AlignmentLayers(**{layer_name: alignments_data.get(layer_name, []) for layer_name in layers})
 
         except Exception as e:
             logger.error(f"Claude API error: {e}")
             return AlignmentLayers()
 
+    def stream_alignment_layers(
+        self,
+        source_tokens: list[Dict[str, Any]],
+        target_tokens: list[Dict[str, Any]],
+        source_lang: str,
+        target_lang: str,
+        source_text: str,
+        target_text: str,
+        layers: Tuple[str, ...] = LAYER_NAMES
+    ) -> Iterator[Tuple[str, list[Alignment]]]:
+        """Stream the alignment response, yielding (layer_name, alignments) as each layer's JSON array completes.
+
+        Every requested layer (all three by default) is yielded exactly once, in the order Claude
+        writes them; layers missing from the response are yielded empty at the end. API errors
+        propagate to the caller.
+        """
+        prompt = self._build_alignment_prompt(
+            source_tokens, target_tokens, source_lang, target_lang, source_text, target_text, layers
+        )
+
+        parser = LayerStreamParser(layers)
+        emitted = set()
+        logger.info("Streaming Claude API response for alignment generation")
+        with track_stage("claude"), self.client.messages.stream(
+            model=ALIGNMENT_MODEL,
+            max_tokens=ALIGNMENT_MAX_TOKENS,
+            temperature=ALIGNMENT_TEMPERATURE,
+            messages=[{
+                "role": "user",
+                "content": prompt
+            }]
+        ) as stream:
+            for text in stream.text_stream:
+                for layer_name, items in parser.feed(text):
+                    emitted.add(layer_name)
+                    yield layer_name, self._to_alignments(layer_name, items)
+
+        if len(emitted) < len(layers):
+            # Fall back to whole-response parsing for anything the incremental parser missed
+            remaining = self._parse_alignment_response(parser.text)
+            for layer_name in layers:
+                if layer_name not in emitted:
+                    yield layer_name, remaining.get(layer_name, [])
+
+    def _to_alignments(self, layer_name: str, items: list) -> list[Alignment]:
+        try:
+            return [Alignment(source=item["source"], target=item["target"], label=item["label"]) for item in items]
+        except (KeyError, TypeError) as e:
+            logger.error(f"Failed to parse streamed {layer_name} layer: {e}")
+            return []
+
     def _build_alignment_prompt(
         self,
         source_tokens: list[Dict[str, Any]],
@@ -76,10 +131,32 @@ class ClaudeClient:
         source_lang: str,
         target_lang: str,
         source_text: str,
-        target_text: str
+        target_text: str,
+        layers: Tuple[str, ...] = LAYER_NAMES
     ) -> str:
-        """Build structured prompt for alignment generation."""
+        """Build structured prompt for alignment generation, optionally asking for only some layers."""
 
+        prompt = self._build_full_prompt(
+            source_tokens, target_tokens, source_lang, target_lang, source_text, target_text
+        )
+        if tuple(layers) == LAYER_NAMES:
+            return prompt
+        # Only part of the layers are missing (the rest were generated earlier); the full
+        # instructions stay, so the requested layers come out the same as in a full run
+        return prompt + (
+            f"\n\nOnly these layers are needed this time: {', '.join(layers)}. "
+            "Include only those keys in the JSON object."
+        )
+
+    @staticmethod
+    def _build_full_prompt(
+        source_tokens: list[Dict[str, Any]],
+        target_tokens: list[Dict[str, Any]],
+        source_lang: str,
+        target_lang: str,
+        source_text: str,
+        target_text: str
+    ) -> str:
         return f"""You are a linguist generating translation alignments between {source_lang} and {target_lang} for an interactive visualization tool.
 
 ## Sentence pair
@@ -224,4 +301,83 @@ Use only token IDs from the provided lists. Do not include any text outside the
 
         except (json.JSONDecodeError, KeyError, TypeError) as e:
             logger.error(f"Failed to parse Claude response: {e}")
-            return {"lexical": [], "grammatical_relations": [], "features": []}
\ No newline at end of file
+            return {"lexical": [], "grammatical_relations": [], "features": []}
+
+
+class LayerStreamParser:
+    """Incrementally extracts top-level layer arrays from a streamed JSON object.
+
+    Text before the first "{" (e.g. a sentence of explanation) is ignored, as in
+    ClaudeClient._parse_alignment_response.
+    """
+
+    def __init__(self, layer_names: Tuple[str, ...] = LAYER_NAMES):
+        """Initialize parser for the given top-level keys."""
+        self.layer_names = set(layer_names)
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._started = False
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_key = None
+        self._array_start = None
+        self._array_key = None
+
+    @property
+    def text(self) -> str:
+        """All text fed so far."""
+        return self._buffer
+
+    def feed(self, chunk: str) -> List[Tuple[str, list]]:
+        """Consume a chunk of streamed text and return any layers that completed in it."""
+        self._buffer += chunk
+        completed = []
+        buffer = self._buffer
+
+        for i in range(self._pos, len(buffer)):
+            char = buffer[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._array_start is None:
+                        self._last_key = json.loads(buffer[self._string_start:i + 1])
+                continue
+
+            if not self._started:
+                if char == "{":
+                    self._started = True
+                    self._depth = 1
+                continue
+
+            if self._depth == 0:
+                # Top-level object already closed
+                break
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = i
+            elif char in "{[":
+                if char == "[" and self._depth == 1 and self._last_key in self.layer_names:
+                    self._array_start = i
+                    self._array_key = self._last_key
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if char == "]" and self._depth == 1 and self._array_start is not None:
+                    try:
+                        completed.append((self._array_key, json.loads(buffer[self._array_start:i + 1])))
+                    except json.JSONDecodeError as e:
+                        logger.warning(f"Could not parse streamed {self._array_key} layer: {e}")
+                    self._array_start = None
+                    self._last_key = None
+
+        self._pos = len(buffer)
+        return completed
+
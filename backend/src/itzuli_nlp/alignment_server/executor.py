@@ -0,0 +1,100 @@
+"""Bounded worker pools for the blocking stages of alignment generation."""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional
+
+import anyio
+
+from .metrics import POOL_RUNNING, POOL_WAIT_SECONDS, POOL_WAITING
+
+logger = logging.getLogger(__name__)
+
+# Each stage gets its own pool size so slow Claude calls cannot starve translation/analysis or cache reads.
+# Stanza calls are additionally serialized per language inside the analysis stage.
+STAGE_CONCURRENCY: Dict[str, int] = {
+    "analysis": int(os.environ.get("ALIGNMENT_ANALYSIS_CONCURRENCY", 4)),
+    "alignment": int(os.environ.get("ALIGNMENT_GENERATION_CONCURRENCY", 8)),
+    "cache": int(os.environ.get("ALIGNMENT_CACHE_IO_CONCURRENCY", 16)),
+}
+
+_limiters: Dict[str, anyio.CapacityLimiter] = {
+    stage: anyio.CapacityLimiter(limit) for stage, limit in STAGE_CONCURRENCY.items()
+}
+
+# Weight of the newest sample in the moving average of call durations
+DURATION_SMOOTHING = 0.2
+
+_durations: Dict[str, float] = {}
+_durations_lock = threading.Lock()
+
+
+def get_limiter(stage: str) -> anyio.CapacityLimiter:
+    """Return the capacity limiter for a pipeline stage."""
+    try:
+        return _limiters[stage]
+    except KeyError:
+        raise ValueError(f"Unknown pipeline stage: {stage}") from None
+
+
+def average_duration(stage: str) -> Optional[float]:
+    """Exponentially weighted average run time of the stage's calls, or None before the first call."""
+    return _durations.get(stage)
+
+
+def _record_duration(stage: str, seconds: float) -> None:
+    with _durations_lock:
+        previous = _durations.get(stage)
+        if previous is None:
+            _durations[stage] = seconds
+        else:
+            _durations[stage] = previous + DURATION_SMOOTHING * (seconds - previous)
+
+
+async def run_stage(stage: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking stage function in a worker thread bounded by the stage's pool size."""
+    limiter = get_limiter(stage)
+    queued_at = time.perf_counter()
+    started = False
+
+    def call():
+        nonlocal started
+        started = True
+        POOL_WAITING.labels(stage).dec()
+        POOL_WAIT_SECONDS.labels(stage).observe(time.perf_counter() - queued_at)
+        POOL_RUNNING.labels(stage).inc()
+        started_at = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _record_duration(stage, time.perf_counter() - started_at)
+            POOL_RUNNING.labels(stage).dec()
+
+    POOL_WAITING.labels(stage).inc()
+    try:
+        return await anyio.to_thread.run_sync(call, limiter=limiter)
+    finally:
+        if not started:
+            # Cancelled while still waiting for a worker thread
+            POOL_WAITING.labels(stage).dec()
+
+
+async def iterate_stage(stage: str, iterator: Iterator[Any]) -> AsyncIterator[Any]:
+    """Drive a blocking iterator from async code, fetching each item in a worker thread of the stage's pool."""
+    done = object()
+    try:
+        while True:
+            item = await run_stage(stage, next, iterator, done)
+            if item is done:
+                return
+            yield item
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            # Release resources held by an abandoned generator (e.g. an open HTTP stream),
+            # even when we got here because the request was cancelled
+            with anyio.CancelScope(shield=True):
+                await run_stage(stage, close)
+
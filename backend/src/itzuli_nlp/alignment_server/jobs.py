@@ -0,0 +1,286 @@
+"""Job queue for slow alignment generation, with job state shared between worker processes."""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from enum import Enum
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+from .types import AlignmentData
+
+logger = logging.getLogger(__name__)
+
+# Job ids are uuid4 hex strings; anything else is never a stored job
+JOB_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+# Saves between sweeps for expired job records
+SWEEP_INTERVAL = 500
+
+
+class JobStatus(str, Enum):
+    """Lifecycle of an alignment job."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class JobQueueFull(Exception):
+    """Raised when too many jobs are already waiting to run."""
+
+
+@dataclass
+class Job:
+    """One alignment generation request and its outcome."""
+
+    id: str
+    text: str
+    source_lang: str
+    target_lang: str
+    sentence_id: str
+    status: JobStatus = JobStatus.QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[AlignmentData] = None
+    error: Optional[str] = None
+    _done: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        """Whether the job has succeeded or failed."""
+        return self.status in (JobStatus.SUCCEEDED, JobStatus.FAILED)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the job finishes or the timeout expires. Returns whether it finished."""
+        return self._done.wait(timeout)
+
+
+class JobStore:
+    """Job records as JSON files in <cache_dir>/jobs, so every worker process can answer for any job.
+
+    Under the pre-fork launcher a job runs in the worker that accepted its submission,
+    but the client's polls may land on any worker. Each state change is written
+    atomically to <job id>.json, and workers that do not hold a job in memory read it
+    from there. Records older than the TTL are swept periodically.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, ttl_seconds: float = 3600.0):
+        """Initialize store under <cache_dir>/jobs (cache_dir defaults to ALIGNMENT_CACHE_DIR)."""
+        cache_dir = Path(cache_dir or os.environ.get("ALIGNMENT_CACHE_DIR", ".cache/alignments"))
+        self.root = cache_dir / "jobs"
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._saves_since_sweep = 0
+
+    def save(self, job: "Job") -> None:
+        """Write the current state of a job."""
+        record = {
+            "id": job.id,
+            "text": job.text,
+            "source_lang": job.source_lang,
+            "target_lang": job.target_lang,
+            "sentence_id": job.sentence_id,
+            "status": job.status.value,
+            "created_at": job.created_at,
+            "started_at": job.started_at,
+            "finished_at": job.finished_at,
+            "result": job.result.model_dump(mode="json") if job.result is not None else None,
+            "error": job.error,
+        }
+        path = self.root / f"{job.id}.json"
+        try:
+            # Write-then-rename so other workers never read a half-written record
+            tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.write_text(json.dumps(record, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Job record write failed: {e}")
+            return
+
+        with self._lock:
+            self._saves_since_sweep += 1
+            due = self._saves_since_sweep >= SWEEP_INTERVAL
+            if due:
+                self._saves_since_sweep = 0
+        if due:
+            self.sweep()
+
+    def load(self, job_id: str) -> Optional["Job"]:
+        """Read a job written by any worker, or None if it is unknown or expired."""
+        if not JOB_ID_PATTERN.fullmatch(job_id):
+            return None
+        path = self.root / f"{job_id}.json"
+        try:
+            if time.time() - path.stat().st_mtime > self.ttl_seconds:
+                return None
+            record = json.loads(path.read_bytes())
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Job record read failed: {e}")
+            return None
+
+        result = record.pop("result")
+        status = JobStatus(record.pop("status"))
+        job = Job(
+            **record,
+            status=status,
+            result=AlignmentData.model_validate(result) if result is not None else None,
+        )
+        if job.finished:
+            job._done.set()
+        return job
+
+    def sweep(self) -> int:
+        """
+        Delete job records not updated within the TTL.
+
+        Returns:
+            Number of records removed
+        """
+        cutoff = time.time() - self.ttl_seconds
+        removed = 0
+        for path in self.root.glob("*.json"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                continue
+        return removed
+
+
+class JobManager:
+    """Runs alignment jobs on a bounded worker pool, independently of the requests that submitted them.
+
+    Submitting the same text and language pair while an earlier job for it is still
+    queued or running in this process returns the existing job. Finished jobs are kept
+    for `ttl_seconds` so clients can collect results; the results themselves also land
+    in the alignment cache. With a `store`, every state change is also written there,
+    and get() finds jobs submitted to other processes sharing it.
+    """
+
+    def __init__(
+        self,
+        run_job: Callable[[Job], AlignmentData],
+        max_workers: int = 2,
+        max_pending: int = 1000,
+        ttl_seconds: float = 3600.0,
+        clock: Callable[[], float] = time.time,
+        store: Optional[JobStore] = None,
+    ):
+        """Initialize manager with the function that does the work for one job."""
+        self._run_job = run_job
+        self.store = store
+        self.max_pending = max_pending
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="alignment-job")
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Job] = {}
+        self._active: Dict[Tuple[str, str, str], Job] = {}
+
+    def submit(self, text: str, source_lang: str, target_lang: str, sentence_id: str) -> Job:
+        """Queue a job, or return the unfinished job already running for the same input."""
+        key = (text, source_lang, target_lang)
+        with self._lock:
+            self._prune()
+            existing = self._active.get(key)
+            if existing is not None:
+                return existing
+
+            pending = sum(1 for job in self._active.values() if job.status == JobStatus.QUEUED)
+            if pending >= self.max_pending:
+                raise JobQueueFull(f"Too many pending jobs ({pending})")
+
+            job = Job(
+                id=uuid.uuid4().hex,
+                text=text,
+                source_lang=source_lang,
+                target_lang=target_lang,
+                sentence_id=sentence_id,
+                created_at=self._clock(),
+            )
+            self._jobs[job.id] = job
+            self._active[key] = job
+
+        self._save(job)
+        self._executor.submit(self._execute, job)
+        logger.info(f"Queued alignment job {job.id}")
+        return job
+
+    def complete(self, text: str, source_lang: str, target_lang: str, sentence_id: str, result: AlignmentData) -> Job:
+        """Record an already-available result (e.g. a cache hit) as a finished job."""
+        now = self._clock()
+        job = Job(
+            id=uuid.uuid4().hex,
+            text=text,
+            source_lang=source_lang,
+            target_lang=target_lang,
+            sentence_id=sentence_id,
+            status=JobStatus.SUCCEEDED,
+            created_at=now,
+            started_at=now,
+            finished_at=now,
+            result=result,
+        )
+        job._done.set()
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        self._save(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Look up a job by id, in this process or else in the shared store."""
+        with self._lock:
+            self._prune()
+            job = self._jobs.get(job_id)
+        if job is None and self.store is not None:
+            # Submitted to another worker; this is a snapshot, so poll get() for updates
+            job = self.store.load(job_id)
+        return job
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting work and optionally wait for running jobs."""
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def _save(self, job: Job) -> None:
+        if self.store is not None:
+            self.store.save(job)
+
+    def _execute(self, job: Job) -> None:
+        job.status = JobStatus.RUNNING
+        job.started_at = self._clock()
+        self._save(job)
+        try:
+            job.result = self._run_job(job)
+            job.status = JobStatus.SUCCEEDED
+            logger.info(f"Alignment job {job.id} succeeded")
+        except Exception as e:
+            job.error = str(e)
+            job.status = JobStatus.FAILED
+            logger.error(f"Alignment job {job.id} failed: {e}")
+        finally:
+            job.finished_at = self._clock()
+            with self._lock:
+                self._active.pop((job.text, job.source_lang, job.target_lang), None)
+            # Saved before waiters are released, so any worker they poll next sees the outcome
+            self._save(job)
+            job._done.set()
+
+    def _prune(self) -> None:
+        # Caller holds the lock
+        cutoff = self._clock() - self.ttl_seconds
+        expired = [job_id for job_id, job in self._jobs.items() if job.finished and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
@@ -0,0 +1,74 @@
+"""In-process LRU tier for the alignment cache."""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+
+class MemoryCache:
+    """Thread-safe LRU map bounded by entry count and by the total size of its values.
+
+    Sizes are supplied by the caller (the serialized size of the entry), so the byte
+    bound tracks what the entries cost on disk rather than Python object overhead.
+    A bound of 0 disables the tier.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        """Initialize cache with entry-count and byte bounds."""
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the tier can hold anything at all."""
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    @property
+    def size_bytes(self) -> int:
+        """Total size of the values currently held."""
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the value for a key and mark it most recently used, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: str, value: Any, size: int) -> None:
+        """Store a value, evicting least recently used entries to stay within the bounds."""
+        if not self.enabled or size > self.max_bytes:
+            # Never let one oversized entry flush the whole tier
+            self.discard(key)
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def discard(self, key: str) -> None:
+        """Drop a key if present."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry[1]
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
@@ -0,0 +1,73 @@
+"""Metrics of the alignment server: HTTP requests, worker pools, admission and cache.
+
+The registry, metric types and pipeline stage metrics live in core.metrics and are
+re-exported here.
+"""
+
+import time
+
+from ..core.metrics import (  # noqa: F401
+    CONTENT_TYPE,
+    REGISTRY,
+    STAGE_ERRORS,
+    STAGE_SECONDS,
+    Counter,
+    Gauge,
+    Histogram,
+    Registry,
+    clear_shared,
+    track_stage,
+)
+
+HTTP_REQUESTS = Counter(
+    "alignment_http_requests_total", "HTTP requests handled, by route and status.", ("method", "route", "status")
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "alignment_http_request_duration_seconds", "HTTP request latency, by route.", ("method", "route")
+)
+HTTP_IN_FLIGHT = Gauge("alignment_http_requests_in_flight", "HTTP requests currently being handled.")
+
+POOL_WAITING = Gauge("alignment_pool_waiting", "Calls waiting for a worker thread, by pool.", ("pool",))
+POOL_RUNNING = Gauge("alignment_pool_running", "Calls running on a worker thread, by pool.", ("pool",))
+POOL_WAIT_SECONDS = Histogram("alignment_pool_wait_seconds", "Time spent waiting for a worker thread.", ("pool",))
+
+ADMISSION_IN_FLIGHT = Gauge("alignment_admission_in_flight", "Admitted units of work not yet finished, by stage.", ("stage",))
+ADMISSION_REJECTED = Counter("alignment_admission_rejected_total", "Requests shed by admission control, by stage.", ("stage",))
+
+CACHE_REQUESTS = Counter("alignment_cache_requests_total", "Alignment cache lookups, by result.", ("result",))
+CACHE_TIER_HITS = Counter("alignment_cache_tier_hits_total", "Alignment cache hits, by the tier that served them.", ("tier",))
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request counts, latency and in-flight requests.
+
+    Requests are labelled with the matched route template (e.g. /jobs/{job_id}) rather
+    than the raw path, so label cardinality stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            route = getattr(scope.get("route"), "path", "unmatched")
+            method = scope["method"]
+            HTTP_REQUESTS.labels(method, route, status).inc()
+            HTTP_REQUEST_SECONDS.labels(method, route).observe(time.perf_counter() - start)
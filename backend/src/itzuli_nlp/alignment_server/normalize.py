@@ -0,0 +1,65 @@
+"""Canonical form of input text, shared by cache lookups and upstream calls."""
+
+import os
+import re
+import unicodedata
+from typing import Optional, Tuple
+
+CASE_POLICIES = ("preserve", "lower")
+PUNCTUATION_POLICIES = ("preserve", "fold")
+
+# Any run of Unicode whitespace (including no-break and narrow no-break spaces)
+_WHITESPACE = re.compile(r"\s+")
+
+# Zero-width space, word joiner, BOM and soft hyphen sneak in from copy-paste;
+# zero-width (non-)joiners are kept since they can change how text renders
+_INVISIBLE = dict.fromkeys(map(ord, "\u200b\u2060\ufeff\u00ad"))
+
+# Typographic quotes, hyphens/dashes and ellipses folded to their plain ASCII counterparts
+_PUNCTUATION_FOLDS = str.maketrans({
+    "‘": "'", "’": "'", "‚": "'", "′": "'",
+    "“": '"', "”": '"', "„": '"', "«": '"', "»": '"',
+    "\u2010": "-", "\u2011": "-", "\u2013": "-", "\u2014": "-",
+    "…": "...",
+})
+
+
+def _policy(variable: str, default: str, choices: Tuple[str, ...]) -> str:
+    value = os.environ.get(variable, default).strip().lower()
+    if value not in choices:
+        raise ValueError(f"{variable} must be one of {', '.join(choices)}, got {value!r}")
+    return value
+
+
+CASE_POLICY = _policy("ALIGNMENT_NORMALIZE_CASE", "preserve", CASE_POLICIES)
+PUNCTUATION_POLICY = _policy("ALIGNMENT_NORMALIZE_PUNCTUATION", "preserve", PUNCTUATION_POLICIES)
+
+
+def normalize_text(text: str, case: Optional[str] = None, punctuation: Optional[str] = None) -> str:
+    """
+    Canonicalize input text so trivially different spellings of a sentence share one cache entry.
+
+    Always applies Unicode NFC, drops invisible characters and collapses whitespace runs
+    to single spaces with the ends trimmed. Case and punctuation handling follow the
+    configured policies unless overridden.
+
+    Args:
+        text: Text as typed by the user
+        case: "preserve" or "lower" (defaults to ALIGNMENT_NORMALIZE_CASE)
+        punctuation: "preserve" or "fold" typographic quotes, dashes and ellipses to ASCII
+            (defaults to ALIGNMENT_NORMALIZE_PUNCTUATION)
+
+    Returns:
+        Canonical text; normalizing it again returns it unchanged
+    """
+    case = case or CASE_POLICY
+    punctuation = punctuation or PUNCTUATION_POLICY
+
+    text = unicodedata.normalize("NFC", text).translate(_INVISIBLE)
+    text = _WHITESPACE.sub(" ", text).strip()
+    if punctuation == "fold":
+        text = text.translate(_PUNCTUATION_FOLDS)
+    if case == "lower":
+        # casefold() can change length or leave NFC (e.g. German ß), so re-normalize
+        text = unicodedata.normalize("NFC", text.casefold())
+    return text
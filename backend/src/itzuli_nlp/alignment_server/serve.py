@@ -0,0 +1,287 @@
+"""Pre-fork production launcher for the alignment server.
+
+The master process imports the app, loads the Stanza pipelines and binds the listening
+socket, then forks the workers. Model weights are loaded once and shared copy-on-write
+instead of once per worker. Each worker runs its own uvicorn event loop on the shared
+socket with a capped torch thread pool, so N workers don't oversubscribe the CPUs.
+
+Workers share the cache, stage checkpoints and job records through the cache
+directory (or the SQLite database), so a job submitted to one worker can be polled
+on any of them. Metrics are shared through snapshot files in ALIGNMENT_METRICS_DIR,
+so /metrics reports the sum over all workers whichever one answers the scrape.
+Everything else is per worker: admission limits, the in-memory cache tier and
+deduplication of jobs for the same input.
+
+Signals sent to the master:
+
+- SIGHUP: rolling restart, replacing workers one at a time while the others keep serving
+- SIGTERM / SIGINT: graceful shutdown, letting in-flight requests finish
+"""
+
+import gc
+import importlib.util
+import logging
+import os
+import signal
+import socket
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import uvicorn
+
+from ..core.workflow import get_cached_stanza_pipeline
+from .metrics import REGISTRY, clear_shared
+
+logger = logging.getLogger(__name__)
+
+HOST = os.environ.get("HOST", "0.0.0.0")
+PORT = int(os.environ.get("PORT", 8000))
+WORKERS = int(os.environ.get("ALIGNMENT_WORKERS", 2))
+PRELOAD_LANGUAGES = os.environ.get("ALIGNMENT_PRELOAD_LANGUAGES", "eu,en,es,fr")
+# 0 divides the CPUs evenly between workers
+TORCH_THREADS = int(os.environ.get("ALIGNMENT_TORCH_THREADS", 0))
+GRACEFUL_TIMEOUT = float(os.environ.get("ALIGNMENT_GRACEFUL_TIMEOUT", 30))
+METRICS_DIR = Path(
+    os.environ.get("ALIGNMENT_METRICS_DIR")
+    or Path(os.environ.get("ALIGNMENT_CACHE_DIR", ".cache/alignments")) / "metrics"
+)
+METRICS_FLUSH_INTERVAL = float(os.environ.get("ALIGNMENT_METRICS_FLUSH_INTERVAL", 5))
+
+# A worker that dies this soon after starting is respawned with a delay, not in a tight loop
+MIN_WORKER_LIFETIME = 1.0
+POLL_INTERVAL = 0.2
+
+
+def threads_per_worker(workers: int, cpu_count: Optional[int] = None) -> int:
+    """Split the available CPUs evenly between workers (at least one thread each)."""
+    cpu_count = cpu_count or os.cpu_count() or 1
+    return max(1, cpu_count // max(1, workers))
+
+
+def select_event_loop() -> str:
+    """Use uvloop when it is installed, otherwise the standard asyncio loop."""
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+
+def select_http_protocol() -> str:
+    """Use httptools when it is installed, otherwise h11."""
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+
+def parse_languages(value: str) -> List[str]:
+    """Parse a comma-separated language list."""
+    return [language.strip() for language in value.split(",") if language.strip()]
+
+
+def limit_threads(threads: int) -> None:
+    """Cap the intra-op thread pools used by torch and the BLAS/OpenMP runtimes."""
+    for variable in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[variable] = str(threads)
+    if importlib.util.find_spec("torch"):
+        import torch
+
+        torch.set_num_threads(threads)
+
+
+def preload_pipelines(languages: Iterable[str]) -> None:
+    """Load Stanza pipelines in this process so forked workers inherit them."""
+    for language in languages:
+        try:
+            get_cached_stanza_pipeline(language)
+            logger.info(f"Preloaded Stanza pipeline: {language}")
+        except Exception as e:
+            logger.warning(f"Stanza preload failed for {language}: {e}")
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    """Bind the listening socket shared by all workers."""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class PreforkServer:
+    """Forks uvicorn workers that share one listening socket, and keeps them running."""
+
+    def __init__(
+        self,
+        app,
+        sock: socket.socket,
+        workers: int = WORKERS,
+        torch_threads: int = TORCH_THREADS,
+        graceful_timeout: float = GRACEFUL_TIMEOUT,
+        metrics_dir: Path = METRICS_DIR,
+    ):
+        """Initialize server for an ASGI app and an already-bound socket."""
+        self.app = app
+        self.sock = sock
+        self.workers = max(1, workers)
+        self.torch_threads = torch_threads or threads_per_worker(self.workers)
+        self.graceful_timeout = graceful_timeout
+        self.metrics_dir = metrics_dir
+        self.loop = select_event_loop()
+        self.http = select_http_protocol()
+        self._children: Dict[int, float] = {}
+        self._stopping = False
+        self._reload_requested = False
+
+    def run(self) -> None:
+        """Start the workers and supervise them until SIGTERM or SIGINT."""
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_reload)
+
+        # Keep objects created so far (app, models) out of the collector's reach, so
+        # garbage collection in the workers doesn't touch and copy the shared pages
+        gc.freeze()
+
+        self.metrics_dir.mkdir(parents=True, exist_ok=True)
+        clear_shared(self.metrics_dir)
+
+        logger.info(
+            f"Starting {self.workers} workers (loop={self.loop}, http={self.http}, "
+            f"torch_threads={self.torch_threads})"
+        )
+        for _ in range(self.workers):
+            self._spawn()
+
+        while not self._stopping:
+            if self._reload_requested:
+                self._reload_requested = False
+                self._rolling_restart()
+            self._reap()
+            time.sleep(POLL_INTERVAL)
+
+        self._shutdown()
+
+    def _handle_stop(self, signum, frame) -> None:
+        self._stopping = True
+
+    def _handle_reload(self, signum, frame) -> None:
+        self._reload_requested = True
+
+    def _spawn(self) -> int:
+        pid = os.fork()
+        if pid == 0:
+            self._run_worker()
+        self._children[pid] = time.monotonic()
+        logger.info(f"Started worker {pid}")
+        return pid
+
+    def _run_worker(self) -> None:
+        # Runs in the forked child and never returns
+        exit_code = 0
+        try:
+            for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+                signal.signal(signum, signal.SIG_DFL)
+            limit_threads(self.torch_threads)
+            # Any worker may answer a scrape, so each one shares its samples with the others
+            REGISTRY.share(self.metrics_dir, METRICS_FLUSH_INTERVAL)
+            config = uvicorn.Config(
+                self.app,
+                loop=self.loop,
+                http=self.http,
+                timeout_graceful_shutdown=self.graceful_timeout,
+            )
+            uvicorn.Server(config).run(sockets=[self.sock])
+        except BaseException as e:
+            logger.error(f"Worker {os.getpid()} failed: {e}")
+            exit_code = 1
+        finally:
+            # Keep the counts of this worker's last few seconds in the totals
+            REGISTRY.stop_sharing()
+            os._exit(exit_code)
+
+    def _reap(self) -> None:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+
+            started_at = self._children.pop(pid, None)
+            if started_at is None or self._stopping:
+                continue
+
+            logger.warning(f"Worker {pid} exited unexpectedly (status {status}), restarting")
+            if time.monotonic() - started_at < MIN_WORKER_LIFETIME:
+                time.sleep(MIN_WORKER_LIFETIME)
+            self._spawn()
+
+    def _rolling_restart(self) -> None:
+        logger.info("Reloading workers")
+        for pid in list(self._children):
+            # Start the replacement first so capacity never drops below N - 1;
+            # connections queue on the shared socket until a worker accepts them
+            self._spawn()
+            self._children.pop(pid, None)
+            self._terminate([pid])
+            if self._stopping:
+                return
+
+    def _shutdown(self) -> None:
+        logger.info("Shutting down workers")
+        pids = list(self._children)
+        self._children.clear()
+        self._terminate(pids)
+        self.sock.close()
+
+    def _terminate(self, pids: List[int]) -> None:
+        remaining = set(pids)
+        for pid in remaining:
+            _signal(pid, signal.SIGTERM)
+
+        # Give uvicorn's own graceful shutdown a little longer than its timeout
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        while remaining and time.monotonic() < deadline:
+            for pid in list(remaining):
+                try:
+                    finished, _ = os.waitpid(pid, os.WNOHANG)
+                except ChildProcessError:
+                    finished = pid
+                if finished:
+                    remaining.discard(pid)
+            time.sleep(POLL_INTERVAL)
+
+        for pid in remaining:
+            logger.warning(f"Worker {pid} did not stop in time, killing it")
+            _signal(pid, signal.SIGKILL)
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+
+
+def _signal(pid: int, signum: int) -> None:
+    try:
+        os.kill(pid, signum)
+    except ProcessLookupError:
+        pass
+
+
+def main() -> None:
+    """Preload models, bind the socket and run the pre-fork server."""
+    workers = max(1, WORKERS)
+    torch_threads = TORCH_THREADS or threads_per_worker(workers)
+    # Set before torch is first imported (by the Stanza preload) so the master's
+    # thread pools, which the workers inherit, start at the per-worker size
+    limit_threads(torch_threads)
+
+    from .server import app
+
+    preload_pipelines(parse_languages(PRELOAD_LANGUAGES))
+
+    sock = bind_socket(HOST, PORT)
+    logger.info(f"Starting alignment server on {HOST}:{PORT}")
+    PreforkServer(app, sock, workers=workers, torch_threads=torch_threads).run()
+
+
+if __name__ == "__main__":
+    main()
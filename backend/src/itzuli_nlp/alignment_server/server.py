@@ -1,20 +1,34 @@
 """FastAPI HTTP server for alignment data generation."""
 
+import hashlib
+import json
 import logging
 import os
-from typing import List
+import re
+from typing import Annotated, AsyncIterator, Dict, List, Optional
 
+import anyio
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import AfterValidator, BaseModel
 
 from ..core.types import AnalysisRow, LanguageCode
-from tools.dual_analysis import analyze_both_texts
+from tools.dual_analysis import DualAnalysisItem, analyze_both_texts, analyze_many_texts
 from .scaffold import create_scaffold_from_dual_analysis
-from .types import AlignmentData, SentencePair
-from .cache import AlignmentCache
-from .alignment_generator import create_enriched_alignment_data
+from .types import AlignmentData, AlignmentLayers, SentencePair
+from .admission import Overloaded, Ticket, admit
+from .cache import create_cache
+from .cache_version import same_analysis
+from .claude_client import LAYER_NAMES, ClaudeClient
+from .executor import STAGE_CONCURRENCY, iterate_stage, run_stage
+from .jobs import Job, JobManager, JobQueueFull, JobStatus, JobStore
+from .normalize import normalize_text
+from .stage_cache import LayerCheckpointer, layers_complete, load_layers
+from .metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, REGISTRY, MetricsMiddleware
+from .alignment_generator import create_enriched_alignment_data, generate_alignments_for_scaffold
 
 load_dotenv()
 
@@ -27,8 +41,24 @@ app = FastAPI(
     version="0.1.0"
 )
 
-# Initialize cache
-cache = AlignmentCache()
+MAX_BATCH_SIZE = int(os.environ.get("ALIGNMENT_MAX_BATCH_SIZE", 500))
+BATCH_TRANSLATION_CONCURRENCY = int(os.environ.get("ALIGNMENT_BATCH_TRANSLATION_CONCURRENCY", 4))
+# Most alignment units one batch holds at once; later items are admitted as earlier ones finish
+BATCH_ALIGNMENT_WINDOW = int(os.environ.get("ALIGNMENT_BATCH_WINDOW", STAGE_CONCURRENCY["alignment"]))
+SENTENCES_PAGE_SIZE = int(os.environ.get("ALIGNMENT_SENTENCES_PAGE_SIZE", 50))
+SENTENCES_MAX_PAGE_SIZE = int(os.environ.get("ALIGNMENT_SENTENCES_MAX_PAGE_SIZE", 500))
+SENTENCE_FIELDS = ("source", "target", "layers")
+# Listed sentences are identified by their cache key (a sha256 hex digest)
+SENTENCE_ID_PATTERN = re.compile(r"[0-9a-f]{64}")
+JOB_WORKERS = int(os.environ.get("ALIGNMENT_JOB_WORKERS", 2))
+JOB_MAX_PENDING = int(os.environ.get("ALIGNMENT_JOB_MAX_PENDING", 1000))
+JOB_TTL_SECONDS = float(os.environ.get("ALIGNMENT_JOB_TTL_SECONDS", 3600))
+MAX_JOB_WAIT_SECONDS = 30.0
+# Serve entries written by an earlier pipeline version while they are regenerated in the background
+SERVE_STALE_CACHE = os.environ.get("ALIGNMENT_CACHE_SERVE_STALE", "1").lower() in ("1", "true", "yes")
+
+# Initialize cache (file or SQLite backend, see ALIGNMENT_CACHE_BACKEND)
+cache = create_cache()
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -36,12 +66,19 @@ app.add_middleware(
     allow_credentials=False,  # Set to False when using allow_origins=["*"]
     allow_methods=["GET", "POST", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
+app.add_middleware(GZipMiddleware, minimum_size=1000)
+app.add_middleware(MetricsMiddleware)
+
+
+# Canonicalized on the way in, so cache lookups and upstream calls see the same text
+NormalizedText = Annotated[str, AfterValidator(normalize_text)]
 
 
 class AnalysisRequest(BaseModel):
     """Request model for dual analysis."""
-    text: str
+    text: NormalizedText
     source_lang: LanguageCode
     target_lang: LanguageCode
     sentence_id: str = "default"
@@ -57,6 +94,182 @@ class AnalysisResponse(BaseModel):
     target_analysis: List[AnalysisRow]
 
 
+class JobResponse(BaseModel):
+    """Status of an asynchronous alignment job; result is set once it has succeeded."""
+    job_id: str
+    status: JobStatus
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[SentencePair] = None
+    error: Optional[str] = None
+
+
+class BatchItem(BaseModel):
+    """One text in a batch request."""
+    text: NormalizedText
+    sentence_id: Optional[str] = None
+
+
+class BatchAnalysisRequest(BaseModel):
+    """Request model for batch analysis and alignment generation."""
+    items: List[BatchItem]
+    source_lang: LanguageCode
+    target_lang: LanguageCode
+
+
+class BatchItemError(BaseModel):
+    """A batch item that could not be aligned."""
+    index: int
+    sentence_id: str
+    text: str
+    error: str
+
+
+class BatchAlignmentResponse(AlignmentData):
+    """AlignmentData for a batch request, with failed items reported alongside the sentences."""
+    errors: List[BatchItemError] = []
+
+
+def _run_alignment_job(job: Job) -> AlignmentData:
+    """
+    Generate alignment data for a job on a job worker thread and store it in the cache.
+
+    Raises:
+        RuntimeError: If a Claude call failed and left placeholder layers, so the job is recorded as failed
+    """
+    itzuli_api_key = os.environ.get("ITZULI_API_KEY")
+    claude_api_key = os.environ.get("CLAUDE_API_KEY")
+
+    stale = cache.get_stale(job.text, job.source_lang, job.target_lang)
+    if stale is not None and same_analysis(stale[1], cache.version):
+        # Only the alignment stage changed since the stale entry was made, so its translation and tokens still hold
+        scaffold = stale[0].sentences[0].model_copy(update={"id": job.sentence_id, "layers": AlignmentLayers()})
+        alignment_data = generate_alignments_for_scaffold(
+            AlignmentData(sentences=[scaffold]), claude_api_key, checkpoints=cache.stages
+        )
+    else:
+        translated_text, source_analysis, target_analysis = analyze_both_texts(
+            api_key=itzuli_api_key,
+            text=job.text,
+            source_language=job.source_lang,
+            target_language=job.target_lang,
+            checkpoints=cache.stages
+        )
+        alignment_data = create_enriched_alignment_data(
+            source_analysis=source_analysis,
+            target_analysis=target_analysis,
+            source_lang=job.source_lang,
+            target_lang=job.target_lang,
+            source_text=job.text,
+            target_text=translated_text,
+            sentence_id=job.sentence_id,
+            claude_api_key=claude_api_key,
+            checkpoints=cache.stages
+        )
+
+    if not _cache_if_complete(job.text, job.source_lang, job.target_lang, alignment_data):
+        raise RuntimeError("Alignment incomplete; completed stages are checkpointed, retry to generate the rest")
+    return alignment_data
+
+
+def _cache_if_complete(text: str, source_lang: str, target_lang: str, alignment_data: AlignmentData) -> bool:
+    """Cache a generated result unless some of its layers are placeholders left by a failed Claude call. Returns whether it did."""
+    if not _complete(text, alignment_data):
+        return False
+    cache.set(text, source_lang, target_lang, alignment_data)
+    return True
+
+
+async def _cache_after_response(text: str, source_lang: str, target_lang: str, alignment_data: AlignmentData) -> None:
+    """Background task version of _cache_if_complete, run once the response has been sent."""
+    if await run_stage("cache", _complete, text, alignment_data):
+        await cache.aset(text, source_lang, target_lang, alignment_data)
+
+
+def _complete(text: str, alignment_data: AlignmentData) -> bool:
+    if not layers_complete(cache.stages, alignment_data.sentences[0]):
+        # The stages that did succeed are checkpointed, so a retry only redoes the rest
+        logger.warning(f"Not caching incomplete alignments for text: {text[:50]}...")
+        return False
+    return True
+
+
+# Job records are shared through the cache directory, so any pre-fork worker can answer a poll
+jobs = JobManager(
+    _run_alignment_job,
+    max_workers=JOB_WORKERS,
+    max_pending=JOB_MAX_PENDING,
+    ttl_seconds=JOB_TTL_SECONDS,
+    store=JobStore(ttl_seconds=JOB_TTL_SECONDS),
+)
+
+
+async def _cached(text: str, source_lang: str, target_lang: str, sentence_id: str) -> Optional[AlignmentData]:
+    """Look up the cache, falling back to an earlier pipeline version's entry (see _serve_stale)."""
+    cached_data = await cache.aget(text, source_lang, target_lang)
+    if cached_data is not None:
+        return cached_data
+    return await _serve_stale(text, source_lang, target_lang, sentence_id)
+
+
+async def _cached_response(text: str, source_lang: str, target_lang: str, sentence_id: str) -> Optional[bytes]:
+    """Like _cached, but returns the sentence pair as response-ready JSON bytes carrying `sentence_id`."""
+    body = await cache.aget_response(text, source_lang, target_lang, sentence_id)
+    if body is not None:
+        return body
+    stale_data = await _serve_stale(text, source_lang, target_lang, sentence_id)
+    if stale_data is None:
+        return None
+    return stale_data.sentences[0].model_copy(update={"id": sentence_id}).model_dump_json().encode("utf-8")
+
+
+async def _cached_many(
+    texts: List[str], source_lang: str, target_lang: str, sentence_ids: List[str]
+) -> List[Optional[AlignmentData]]:
+    """Batch version of _cached, in input order."""
+    cached = await cache.aget_many(texts, source_lang, target_lang)
+    for index, (text, sentence_id) in enumerate(zip(texts, sentence_ids)):
+        if cached[index] is None:
+            cached[index] = await _serve_stale(text, source_lang, target_lang, sentence_id)
+    return cached
+
+
+async def _serve_stale(text: str, source_lang: str, target_lang: str, sentence_id: str) -> Optional[AlignmentData]:
+    """
+    Return the entry an earlier pipeline version cached for a text, queueing a job to regenerate it.
+
+    Jobs for the same input are shared, so a popular stale entry is only regenerated once;
+    the job's result replaces the stale entry in the cache.
+    """
+    if not SERVE_STALE_CACHE:
+        return None
+    stale = await cache.aget_stale(text, source_lang, target_lang)
+    if stale is None:
+        return None
+
+    stale_data, version = stale
+    logger.info(f"Serving stale cache entry (version {version or 'unversioned'}) for text: {text[:50]}...")
+    try:
+        await run_stage("cache", jobs.submit, text, source_lang, target_lang, sentence_id)
+    except JobQueueFull as e:
+        # Still served; a later request queues the refresh again
+        logger.warning(f"Not refreshing stale cache entry: {e}")
+    return stale_data
+
+
+def _admit(units: Dict[str, int]) -> Ticket:
+    """
+    Admit work on the slow stages, turning overload into an error response with Retry-After.
+
+    A full stage queue is 429 (too many requests queued), an expected wait over the
+    stage's target is 503 (the service is too slow right now).
+    """
+    try:
+        return admit(units)
+    except Overloaded as e:
+        status_code = 429 if e.queue_full else 503
+        raise HTTPException(status_code=status_code, detail=str(e), headers={"Retry-After": e.retry_after_header})
 
 
 @app.get("/health")
@@ -65,6 +278,94 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics for this server process, or summed over all workers under the pre-fork launcher."""
+    return PlainTextResponse(REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+@app.get("/sentences")
+async def list_sentences(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(SENTENCES_PAGE_SIZE, ge=1, le=SENTENCES_MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
+    source_lang: Optional[LanguageCode] = None,
+    target_lang: Optional[LanguageCode] = None,
+):
+    """
+    List stored sentence pairs as AlignmentData, oldest first, with cursor pagination.
+
+    Pass the returned `next_cursor` back as `cursor` to get the next page. `fields` is a
+    comma-separated subset of source,target,layers (the id is always included), e.g.
+    `fields=source,target` for tokens without alignment layers. Each sentence's id is
+    its cache key, which is unique and can be passed to GET /sentences/{id}; the id
+    the pair was generated with (often "default" or a batch id) is not. Responses
+    carry an ETag and return 304 when it matches If-None-Match.
+    """
+    selected = set(SENTENCE_FIELDS)
+    if fields:
+        selected = {field.strip() for field in fields.split(",") if field.strip()}
+        unknown = selected - set(SENTENCE_FIELDS)
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields: {', '.join(sorted(unknown))}. Supported: {', '.join(SENTENCE_FIELDS)}",
+            )
+
+    try:
+        after = int(cursor) if cursor else -1
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {cursor}")
+
+    entries, next_seq = await cache.alist_entries(
+        after=after, limit=limit, source_lang=source_lang, target_lang=target_lang
+    )
+    next_cursor = str(next_seq) if next_seq is not None else None
+
+    # Index entries are immutable per sequence number, so the page identity is enough for the ETag
+    page_identity = f"{[entry['seq'] for entry in entries]}:{sorted(selected)}:{next_cursor}"
+    etag = f'"{hashlib.sha256(page_identity.encode()).hexdigest()[:32]}"'
+    if_none_match = _parse_if_none_match(request.headers.get("if-none-match"))
+    if etag in if_none_match or "*" in if_none_match:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    stored = await cache.aget_many_by_key([entry["key"] for entry in entries])
+    sentences = [
+        {**data.sentences[0].model_dump(mode="json", include=selected), "id": entry["key"]}
+        for entry, data in zip(entries, stored)
+        if data is not None and data.sentences
+    ]
+
+    return JSONResponse(
+        {"sentences": sentences, "next_cursor": next_cursor},
+        headers={"ETag": etag, "Cache-Control": "no-cache"},
+    )
+
+
+@app.get("/sentences/{sentence_id}")
+async def get_sentence(sentence_id: str):
+    """Return one listed sentence pair, with all its layers, by the id /sentences gave it."""
+    body = None
+    if SENTENCE_ID_PATTERN.fullmatch(sentence_id):
+        body = await cache.aget_response_by_key(sentence_id, sentence_id)
+    if body is None:
+        raise HTTPException(status_code=404, detail=f"Unknown sentence: {sentence_id}")
+    return _json_bytes_response(body)
+
+
+def _json_bytes_response(body: bytes) -> Response:
+    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+
+def _parse_if_none_match(header: Optional[str]) -> List[str]:
+    if not header:
+        return []
+    # Weak validators compare equal for GET; gzip may add W/ on the way back
+    return [tag.strip().removeprefix("W/") for tag in header.split(",")]
+
+
 @app.options("/analyze-and-scaffold")
 async def options_analyze_and_scaffold():
     """Handle preflight OPTIONS request for analyze-and-scaffold endpoint."""
@@ -82,13 +383,17 @@ async def analyze_texts(request: AnalysisRequest):
     if not api_key:
         raise HTTPException(status_code=500, detail="ITZULI_API_KEY not configured")
 
+    ticket = _admit({"analysis": 1})
     try:
-        translated_text, source_analysis, target_analysis = analyze_both_texts(
-            api_key=api_key,
-            text=request.text,
-            source_language=request.source_lang,
-            target_language=request.target_lang
-        )
+        with ticket:
+            translated_text, source_analysis, target_analysis = await run_stage(
+                "analysis",
+                analyze_both_texts,
+                api_key=api_key,
+                text=request.text,
+                source_language=request.source_lang,
+                target_language=request.target_lang
+            )
 
         return AnalysisResponse(
             source_text=request.text,
@@ -107,7 +412,7 @@ async def analyze_texts(request: AnalysisRequest):
 
 
 @app.post("/analyze-and-scaffold", response_model=SentencePair)
-async def analyze_and_scaffold(request: AnalysisRequest):
+async def analyze_and_scaffold(request: AnalysisRequest, background_tasks: BackgroundTasks):
     """
     Combined endpoint: analyze both texts, generate scaffold, and enrich with Claude-generated alignments.
     """
@@ -120,40 +425,397 @@ async def analyze_and_scaffold(request: AnalysisRequest):
         raise HTTPException(status_code=500, detail="CLAUDE_API_KEY not configured")
 
     # Check cache first
-    cached_data = cache.get(request.text, request.source_lang, request.target_lang)
+    cached_body = await _cached_response(request.text, request.source_lang, request.target_lang, request.sentence_id)
+    if cached_body is not None:
+        logger.info(f"Cache hit for text: {request.text[:50]}...")
+        # Already serialized as a SentencePair, so skip response_model validation
+        return _json_bytes_response(cached_body)
+
+    # Cache hits never reach the gates; only misses compete for the slow stages
+    ticket = _admit({"analysis": 1, "alignment": 1})
+    try:
+        with ticket:
+            # Perform dual analysis
+            # Stages that succeeded on an earlier, failed attempt are read from checkpoints
+            translated_text, source_analysis, target_analysis = await run_stage(
+                "analysis",
+                analyze_both_texts,
+                api_key=itzuli_api_key,
+                text=request.text,
+                source_language=request.source_lang,
+                target_language=request.target_lang,
+                checkpoints=cache.stages
+            )
+            ticket.release("analysis")
+
+            # Generate enriched alignment data with Claude
+            alignment_data = await run_stage(
+                "alignment",
+                create_enriched_alignment_data,
+                source_analysis=source_analysis,
+                target_analysis=target_analysis,
+                source_lang=request.source_lang,
+                target_lang=request.target_lang,
+                source_text=request.text,
+                target_text=translated_text,
+                sentence_id=request.sentence_id,
+                claude_api_key=claude_api_key,
+                checkpoints=cache.stages
+            )
+
+        # Cache the result once the response is on its way
+        background_tasks.add_task(
+            _cache_after_response, request.text, request.source_lang, request.target_lang, alignment_data
+        )
+
+        return alignment_data.sentences[0]
+
+    except Exception as e:
+        logger.error(f"Analysis and alignment generation failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Analysis and alignment generation failed: {str(e)}")
+
+
+@app.post("/jobs", response_model=JobResponse, status_code=202)
+async def submit_job(request: AnalysisRequest, response: Response):
+    """
+    Submit an analyze-and-scaffold request to run in the background.
+
+    Returns immediately with a job id; poll GET /jobs/{job_id} for the result. The job
+    keeps running if the client disconnects, and its result is written to the cache.
+    """
+    itzuli_api_key = os.environ.get("ITZULI_API_KEY")
+    if not itzuli_api_key:
+        raise HTTPException(status_code=500, detail="ITZULI_API_KEY not configured")
+
+    claude_api_key = os.environ.get("CLAUDE_API_KEY")
+    if not claude_api_key:
+        raise HTTPException(status_code=500, detail="CLAUDE_API_KEY not configured")
+
+    cached_data = await _cached(request.text, request.source_lang, request.target_lang, request.sentence_id)
     if cached_data:
         logger.info(f"Cache hit for text: {request.text[:50]}...")
-        return cached_data.sentences[0]
+        job = await run_stage(
+            "cache", jobs.complete, request.text, request.source_lang, request.target_lang, request.sentence_id, cached_data
+        )
+    else:
+        try:
+            # Records the job in the shared store, so it runs off the event loop like other cache I/O
+            job = await run_stage(
+                "cache", jobs.submit, request.text, request.source_lang, request.target_lang, request.sentence_id
+            )
+        except JobQueueFull as e:
+            logger.warning(f"Rejecting job: {e}")
+            # The job queue bound, like a full stage queue
+            raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+
+    response.headers["Location"] = f"/jobs/{job.id}"
+    return _job_response(job)
+
+
+@app.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str, wait: float = Query(0, ge=0, le=MAX_JOB_WAIT_SECONDS)):
+    """
+    Get the status of an alignment job, including the SentencePair once it has succeeded.
+
+    Pass `wait` (seconds) to long-poll: the response is held until the job finishes or
+    the wait expires, whichever comes first.
+    """
+    job = await run_stage("cache", jobs.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+
+    deadline = anyio.current_time() + wait
+    delay = 0.05
+    # Poll rather than park a worker thread per waiting client. A job running in another
+    # worker process is a snapshot of its stored record, so it is re-read on each poll.
+    while not job.finished and anyio.current_time() < deadline:
+        await anyio.sleep(min(delay, deadline - anyio.current_time()))
+        delay = min(delay * 2, 0.5)
+        job = await run_stage("cache", jobs.get, job_id) or job
+
+    return _job_response(job)
+
+
+def _job_response(job: Job) -> JobResponse:
+    result = None
+    if job.result is not None and job.result.sentences:
+        # Cached results carry the sentence id they were first generated with
+        result = job.result.sentences[0].model_copy(update={"id": job.sentence_id})
+    return JobResponse(
+        job_id=job.id,
+        status=job.status,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        result=result,
+        error=job.error,
+    )
+
+
+@app.options("/analyze-and-scaffold/batch")
+async def options_analyze_and_scaffold_batch():
+    """Handle preflight OPTIONS request for the batch analyze-and-scaffold endpoint."""
+    return {"message": "OK"}
+
+
+@app.post("/analyze-and-scaffold/batch", response_model=BatchAlignmentResponse)
+async def analyze_and_scaffold_batch(request: BatchAnalysisRequest, background_tasks: BackgroundTasks):
+    """
+    Batch version of /analyze-and-scaffold for many texts sharing one language pair.
+
+    Cached texts are served directly; only the misses are translated, analyzed in one
+    Stanza batch and sent to Claude concurrently. Sentences are returned in input order,
+    and items that fail are listed in `errors` instead of failing the whole batch.
+    """
+    itzuli_api_key = os.environ.get("ITZULI_API_KEY")
+    if not itzuli_api_key:
+        raise HTTPException(status_code=500, detail="ITZULI_API_KEY not configured")
+
+    claude_api_key = os.environ.get("CLAUDE_API_KEY")
+    if not claude_api_key:
+        raise HTTPException(status_code=500, detail="CLAUDE_API_KEY not configured")
+
+    if len(request.items) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many items in one batch ({len(request.items)}). Maximum is {MAX_BATCH_SIZE}.",
+        )
+
+    texts = [item.text for item in request.items]
+    sentence_ids = [item.sentence_id or f"batch-{index + 1:03d}" for index, item in enumerate(request.items)]
+
+    cached = await _cached_many(texts, request.source_lang, request.target_lang, sentence_ids)
+    # Identical texts in one batch are generated once
+    missing_texts = list(dict.fromkeys(text for text, data in zip(texts, cached) if data is None))
+    logger.info(f"Batch of {len(texts)}: {len(texts) - sum(d is None for d in cached)} cache hits, "
+                f"{len(missing_texts)} texts to generate")
+
+    generated: Dict[str, AlignmentData] = {}
+    failures: Dict[str, str] = {}
+    if missing_texts:
+        # One unit of alignment work per text to generate, released as each one finishes.
+        # Only the first window is admitted up front, so a large batch neither waits for
+        # room for all of it at once nor crowds out single requests while it runs.
+        window = max(1, BATCH_ALIGNMENT_WINDOW)
+        with _admit({"analysis": 1, "alignment": min(len(missing_texts), window)}) as ticket:
+            try:
+                analyses = await run_stage(
+                    "analysis",
+                    analyze_many_texts,
+                    api_key=itzuli_api_key,
+                    texts=missing_texts,
+                    source_language=request.source_lang,
+                    target_language=request.target_lang,
+                    max_workers=BATCH_TRANSLATION_CONCURRENCY,
+                    checkpoints=cache.stages,
+                )
+            except Exception as e:
+                logger.error(f"Batch analysis failed: {e}")
+                raise HTTPException(status_code=500, detail=f"Batch analysis failed: {str(e)}")
+            ticket.release("analysis")
+
+            async def generate(item: DualAnalysisItem) -> None:
+                if item.error:
+                    ticket.release("alignment", 1)
+                    failures[item.text] = item.error
+                    return
+                try:
+                    alignment_data = await run_stage(
+                        "alignment",
+                        create_enriched_alignment_data,
+                        source_analysis=item.source_analysis,
+                        target_analysis=item.target_analysis,
+                        source_lang=request.source_lang,
+                        target_lang=request.target_lang,
+                        source_text=item.text,
+                        target_text=item.translated_text,
+                        sentence_id=sentence_ids[texts.index(item.text)],
+                        claude_api_key=claude_api_key,
+                        checkpoints=cache.stages
+                    )
+                except Exception as e:
+                    logger.error(f"Alignment generation failed for '{item.text[:50]}': {e}")
+                    failures[item.text] = str(e)
+                    return
+                finally:
+                    ticket.release("alignment", 1)
+
+                background_tasks.add_task(
+                    _cache_after_response, item.text, request.source_lang, request.target_lang, alignment_data
+                )
+                generated[item.text] = alignment_data
+
+            async with anyio.create_task_group() as tg:
+                for index, item in enumerate(analyses):
+                    if index >= window:
+                        await ticket.extend("alignment", max_held=window)
+                    tg.start_soon(generate, item)
+
+    sentences: List[SentencePair] = []
+    errors: List[BatchItemError] = []
+    for index, (text, sentence_id, cached_data) in enumerate(zip(texts, sentence_ids, cached)):
+        alignment_data = cached_data or generated.get(text)
+        if alignment_data is None:
+            errors.append(BatchItemError(
+                index=index, sentence_id=sentence_id, text=text, error=failures.get(text, "Unknown error")
+            ))
+            continue
+        sentences.append(alignment_data.sentences[0].model_copy(update={"id": sentence_id}))
+
+    return BatchAlignmentResponse(sentences=sentences, errors=errors)
+
+
+@app.options("/analyze-and-scaffold/stream")
+async def options_analyze_and_scaffold_stream():
+    """Handle preflight OPTIONS request for the streaming analyze-and-scaffold endpoint."""
+    return {"message": "OK"}
+
+
+@app.post("/analyze-and-scaffold/stream")
+async def analyze_and_scaffold_stream(request: AnalysisRequest):
+    """
+    Streaming variant of /analyze-and-scaffold as server-sent events.
+
+    Emits `translation` as soon as Itzuli responds, `scaffold` (the tokenized sentence
+    pair with empty layers) once Stanza is done, one `layer` event per alignment layer
+    as Claude finishes writing it, and finally `done` with the complete SentencePair.
+    Failures after the stream has started are reported as an `error` event.
+    """
+    itzuli_api_key = os.environ.get("ITZULI_API_KEY")
+    if not itzuli_api_key:
+        raise HTTPException(status_code=500, detail="ITZULI_API_KEY not configured")
 
+    claude_api_key = os.environ.get("CLAUDE_API_KEY")
+    if not claude_api_key:
+        raise HTTPException(status_code=500, detail="CLAUDE_API_KEY not configured")
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    cached_data = await _cached(request.text, request.source_lang, request.target_lang, request.sentence_id)
+    if cached_data:
+        logger.info(f"Cache hit for text: {request.text[:50]}...")
+        pair = cached_data.sentences[0].model_copy(update={"id": request.sentence_id})
+        return StreamingResponse(_stream_cached_events(pair), media_type="text/event-stream", headers=headers)
+
+    # Admit before the response starts so overload is still reported as a 429 or 503
+    ticket = _admit({"analysis": 1, "alignment": 1})
+    # Also release when the client disconnects before the generator finishes
+    background_tasks = BackgroundTasks()
+    background_tasks.add_task(ticket.close)
+    return StreamingResponse(
+        _stream_alignment_events(request, itzuli_api_key, claude_api_key, ticket, background_tasks),
+        media_type="text/event-stream",
+        headers=headers,
+        background=background_tasks,
+    )
+
+
+def _sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _translation_event(pair: SentencePair) -> str:
+    return _sse_event("translation", {
+        "source_text": pair.source.text,
+        "target_text": pair.target.text,
+        "source_lang": pair.source.lang,
+        "target_lang": pair.target.lang,
+    })
+
+
+async def _stream_cached_events(pair: SentencePair) -> AsyncIterator[str]:
+    yield _translation_event(pair)
+    yield _sse_event("scaffold", pair.model_copy(update={"layers": AlignmentLayers()}).model_dump(mode="json"))
+    for layer_name in LAYER_NAMES:
+        alignments = getattr(pair.layers, layer_name)
+        yield _sse_event("layer", {"layer": layer_name, "alignments": [a.model_dump() for a in alignments]})
+    yield _sse_event("done", pair.model_dump(mode="json"))
+
+
+async def _stream_alignment_events(
+    request: AnalysisRequest,
+    itzuli_api_key: str,
+    claude_api_key: str,
+    ticket: Ticket,
+    background_tasks: BackgroundTasks,
+) -> AsyncIterator[str]:
+    with ticket:
+        async for event in _generate_alignment_events(
+            request, itzuli_api_key, claude_api_key, ticket, background_tasks
+        ):
+            yield event
+
+
+async def _generate_alignment_events(
+    request: AnalysisRequest,
+    itzuli_api_key: str,
+    claude_api_key: str,
+    ticket: Ticket,
+    background_tasks: BackgroundTasks,
+) -> AsyncIterator[str]:
     try:
-        # Perform dual analysis
-        translated_text, source_analysis, target_analysis = analyze_both_texts(
+        translated_text, source_analysis, target_analysis = await run_stage(
+            "analysis",
+            analyze_both_texts,
             api_key=itzuli_api_key,
             text=request.text,
             source_language=request.source_lang,
-            target_language=request.target_lang
+            target_language=request.target_lang,
+            checkpoints=cache.stages
         )
-
-        # Generate enriched alignment data with Claude
-        alignment_data = create_enriched_alignment_data(
+        scaffold_data = create_scaffold_from_dual_analysis(
             source_analysis=source_analysis,
             target_analysis=target_analysis,
             source_lang=request.source_lang,
             target_lang=request.target_lang,
             source_text=request.text,
             target_text=translated_text,
-            sentence_id=request.sentence_id,
-            claude_api_key=claude_api_key
+            sentence_id=request.sentence_id
         )
-
-        # Cache the result
-        cache.set(request.text, request.source_lang, request.target_lang, alignment_data)
-
-        return alignment_data.sentences[0]
-
     except Exception as e:
-        logger.error(f"Analysis and alignment generation failed: {e}")
-        raise HTTPException(status_code=500, detail=f"Analysis and alignment generation failed: {str(e)}")
+        logger.error(f"Analysis and scaffold generation failed: {e}")
+        yield _sse_event("error", {"detail": f"Analysis and scaffold generation failed: {str(e)}"})
+        return
+
+    ticket.release("analysis")
+    scaffold = scaffold_data.sentences[0]
+    yield _translation_event(scaffold)
+    yield _sse_event("scaffold", scaffold.model_dump(mode="json"))
+
+    # Layers generated by an earlier attempt that failed part-way are sent straight away
+    layers = await run_stage("cache", load_layers, cache.stages, scaffold)
+    for layer_name, alignments in layers.items():
+        yield _sse_event("layer", {"layer": layer_name, "alignments": [a.model_dump() for a in alignments]})
+
+    missing = tuple(layer_name for layer_name in LAYER_NAMES if layer_name not in layers)
+    checkpointer = LayerCheckpointer(cache.stages, scaffold)
+    try:
+        if missing:
+            claude_client = ClaudeClient(api_key=claude_api_key)
+            layer_stream = claude_client.stream_alignment_layers(
+                source_tokens=[token.model_dump() for token in scaffold.source.tokens],
+                target_tokens=[token.model_dump() for token in scaffold.target.tokens],
+                source_lang=scaffold.source.lang,
+                target_lang=scaffold.target.lang,
+                source_text=scaffold.source.text,
+                target_text=scaffold.target.text,
+                layers=missing
+            )
+            async for layer_name, alignments in iterate_stage("alignment", layer_stream):
+                layers[layer_name] = alignments
+                await run_stage("cache", checkpointer.add, layer_name, alignments)
+                yield _sse_event("layer", {"layer": layer_name, "alignments": [a.model_dump() for a in alignments]})
+            await run_stage("cache", checkpointer.finish)
+    except Exception as e:
+        logger.error(f"Alignment generation failed: {e}")
+        yield _sse_event("error", {"detail": f"Alignment generation failed: {str(e)}"})
+        return
+
+    pair = scaffold.model_copy(update={"layers": AlignmentLayers(**layers)})
+    # Runs after the stream ends, even if the client goes away right after `done`
+    background_tasks.add_task(
+        _cache_after_response, request.text, request.source_lang, request.target_lang, AlignmentData(sentences=[pair])
+    )
+    yield _sse_event("done", pair.model_dump(mode="json"))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,296 @@
+"""SQLite-backed alignment cache with size and TTL based eviction."""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+from .cache import BaseAlignmentCache
+from .stage_cache import StageCache
+from .types import AlignmentData
+
+logger = logging.getLogger(__name__)
+
+BUSY_TIMEOUT_MS = 5000
+
+# Window ordering that ranks the entries to keep first, per eviction policy
+_KEEP_ORDER = {
+    "lru": "accessed_at DESC, seq DESC",
+    "lfu": "hits DESC, accessed_at DESC, seq DESC",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL UNIQUE,
+    text TEXT NOT NULL,
+    source_lang TEXT NOT NULL,
+    target_lang TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    base_key TEXT NOT NULL DEFAULT '',
+    version TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS entries_by_language ON entries (source_lang, target_lang, seq);
+CREATE INDEX IF NOT EXISTS entries_by_access ON entries (accessed_at);
+CREATE INDEX IF NOT EXISTS entries_by_creation ON entries (created_at);
+"""
+
+# Columns added after the first release, with their definitions
+_ADDED_COLUMNS = {
+    "base_key": "TEXT NOT NULL DEFAULT ''",
+    "version": "TEXT NOT NULL DEFAULT ''",
+}
+
+_VERSION_SCHEMA = """
+CREATE INDEX IF NOT EXISTS entries_by_base_key ON entries (base_key);
+"""
+
+
+class SQLiteAlignmentCache(BaseAlignmentCache):
+    """Alignment cache in a single SQLite database, shared safely by several worker processes.
+
+    Payloads are zlib-compressed compact JSON, stored with the text, language pair,
+    creation/access times, hit count, size, base key and pipeline version so entries
+    can be listed, aged out, evicted and matched across versions without reading them. The database runs in WAL mode: readers never block
+    the writer, and each process/thread uses its own connection.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        db_path: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+        memory_entries: Optional[int] = None,
+        memory_bytes: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        eviction_policy: Optional[str] = None,
+        version: Optional[str] = None,
+    ):
+        """Initialize cache with its database path (default <cache_dir>/alignments.sqlite3) and limits."""
+        super().__init__(
+            memory_entries=memory_entries,
+            memory_bytes=memory_bytes,
+            ttl_seconds=ttl_seconds,
+            max_bytes=max_bytes,
+            eviction_policy=eviction_policy,
+            version=version,
+        )
+        cache_dir = Path(cache_dir or os.environ.get("ALIGNMENT_CACHE_DIR", ".cache/alignments"))
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = Path(db_path) if db_path else cache_dir / "alignments.sqlite3"
+        # Checkpoints are short-lived and small, so they stay as files next to the database
+        self.stages = StageCache(cache_dir)
+        self._local = threading.local()
+
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(_SCHEMA)
+        self._add_version_columns(connection)
+        self.evict()
+
+    def _add_version_columns(self, connection: sqlite3.Connection) -> None:
+        """Upgrade a database created before keys were versioned."""
+        columns = {row[1] for row in connection.execute("PRAGMA table_info(entries)")}
+        for name, definition in _ADDED_COLUMNS.items():
+            if name not in columns:
+                try:
+                    connection.execute(f"ALTER TABLE entries ADD COLUMN {name} {definition}")
+                except sqlite3.OperationalError:
+                    # Another worker added it first
+                    pass
+        # Existing entries were keyed by their input alone, so their key is the base key
+        connection.execute("UPDATE entries SET base_key = key WHERE base_key = ''")
+        connection.executescript(_VERSION_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread, re-opened after a fork (e.g. the pre-fork launcher)
+        pid = os.getpid()
+        if getattr(self._local, "pid", None) != pid:
+            connection = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+            self._local.connection = connection
+            self._local.pid = pid
+        return self._local.connection
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run statements as one write transaction, so other workers never see it half done."""
+        connection = self._connection()
+        # IMMEDIATE takes the write lock up front instead of failing to upgrade a read lock
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def _load(self, cache_key: str) -> Optional[Tuple[AlignmentData, int, float]]:
+        try:
+            row = self._connection().execute(
+                "SELECT payload, created_at FROM entries WHERE key = ?", (cache_key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            payload, created_at = row
+            content = zlib.decompress(payload)
+            return AlignmentData.model_validate_json(content), len(content), created_at
+
+        except Exception as e:
+            logger.warning(f"Cache retrieval failed: {e}")
+            return None
+
+    def _load_json(self, cache_key: str) -> Optional[Tuple[bytes, int, float]]:
+        try:
+            row = self._connection().execute(
+                "SELECT payload, created_at FROM entries WHERE key = ?", (cache_key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            payload, created_at = row
+            content = zlib.decompress(payload)
+            return content, len(content), created_at
+
+        except Exception as e:
+            logger.warning(f"Cache retrieval failed: {e}")
+            return None
+
+    def _write_access(self, cache_key: str, hits: int) -> None:
+        self._connection().execute(
+            "UPDATE entries SET accessed_at = ?, hits = hits + ? WHERE key = ?", (time.time(), hits, cache_key)
+        )
+
+    def _find_stale(self, base_key: str) -> Optional[Tuple[str, str]]:
+        row = self._connection().execute(
+            "SELECT key, version FROM entries WHERE base_key = ? AND version != ? ORDER BY seq DESC LIMIT 1",
+            (base_key, self.version),
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def set(self, text: str, source_lang: str, target_lang: str, alignment_data: AlignmentData) -> None:
+        """Store alignment data in cache."""
+        try:
+            base_key = self._get_base_key(text, source_lang, target_lang)
+            cache_key = self._get_cache_key(text, source_lang, target_lang)
+            content = alignment_data.model_dump_json().encode("utf-8")
+            payload = zlib.compress(content)
+            now = time.time()
+
+            # The new entry and the removal of the ones it supersedes become visible together
+            with self._transaction() as connection:
+                # REPLACE re-inserts the row, so a rewritten entry moves to the end of the listing order
+                connection.execute(
+                    "INSERT OR REPLACE INTO entries "
+                    "(key, text, source_lang, target_lang, payload, size, created_at, accessed_at, base_key, version) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (cache_key, text, source_lang, target_lang, payload, len(payload), now, now, base_key, self.version),
+                )
+                # Entries of earlier pipeline versions for this input are superseded
+                stale_keys = [
+                    row[0] for row in connection.execute(
+                        "SELECT key FROM entries WHERE base_key = ? AND key != ?", (base_key, cache_key)
+                    )
+                ]
+                if stale_keys:
+                    connection.execute("DELETE FROM entries WHERE base_key = ? AND key != ?", (base_key, cache_key))
+            for stale_key in stale_keys:
+                self.memory.discard(stale_key)
+            # The memory tier holds the parsed entry, so it is charged for the JSON rather than the payload
+            self._remember(cache_key, alignment_data, len(content), now)
+            logger.info(f"Cached alignment data for key: {cache_key}")
+
+            self._after_write()
+
+        except Exception as e:
+            logger.warning(f"Cache storage failed: {e}")
+
+    def clear(self) -> None:
+        """Clear all cached data."""
+        try:
+            self.memory.clear()
+            self._connection().execute("DELETE FROM entries")
+            self.stages.clear()
+            logger.info("Cache cleared")
+        except Exception as e:
+            logger.warning(f"Cache clear failed: {e}")
+
+    def evict(self) -> int:
+        """
+        Drop expired entries, then the least recently (lru) or least frequently (lfu)
+        used entries until the size budget is met.
+
+        Returns:
+            Number of entries removed
+        """
+        doomed: List[str] = []
+        try:
+            # Keys are selected and deleted in one transaction, so the memory tier drops exactly what was deleted
+            with self._transaction() as connection:
+                if self.ttl_seconds > 0:
+                    expired = "SELECT key FROM entries WHERE created_at < ?"
+                    cutoff = (time.time() - self.ttl_seconds,)
+                    doomed += [row[0] for row in connection.execute(expired, cutoff)]
+                    connection.execute(f"DELETE FROM entries WHERE key IN ({expired})", cutoff)
+
+                if self.max_bytes > 0:
+                    # Keep the highest ranked entries whose sizes add up to the budget
+                    over_budget = (
+                        "SELECT key FROM ("
+                        f"  SELECT key, SUM(size) OVER (ORDER BY {_KEEP_ORDER[self.eviction_policy]}) AS running"
+                        "  FROM entries"
+                        ") WHERE running > ?"
+                    )
+                    doomed += [row[0] for row in connection.execute(over_budget, (self.max_bytes,))]
+                    connection.execute(f"DELETE FROM entries WHERE key IN ({over_budget})", (self.max_bytes,))
+        except sqlite3.Error as e:
+            logger.warning(f"Cache eviction failed: {e}")
+            return 0
+
+        for key in doomed:
+            self.memory.discard(key)
+        if doomed:
+            logger.info(f"Evicted {len(doomed)} cache entries")
+        return len(doomed)
+
+    def stats(self) -> dict:
+        """Entry count and total stored payload size."""
+        count, total = self._connection().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {"entries": count, "size_bytes": total}
+
+    def list_entries(
+        self,
+        after: int = -1,
+        limit: int = 50,
+        source_lang: Optional[str] = None,
+        target_lang: Optional[str] = None,
+    ) -> Tuple[List[dict], Optional[int]]:
+        """List entries in insertion order for cursor pagination (same contract as CacheIndex.page)."""
+        query = "SELECT seq, key, text, source_lang, target_lang, created_at, version FROM entries WHERE seq > ?"
+        params: list = [after]
+        if source_lang:
+            query += " AND source_lang = ?"
+            params.append(source_lang)
+        if target_lang:
+            query += " AND target_lang = ?"
+            params.append(target_lang)
+        # One extra row tells us whether there is a next page
+        query += " ORDER BY seq LIMIT ?"
+        params.append(limit + 1)
+
+        rows = self._connection().execute(query, params).fetchall()
+        columns = ("seq", "key", "text", "source_lang", "target_lang", "created_at", "version")
+        entries = [dict(zip(columns, row)) for row in rows[:limit]]
+        next_seq = entries[-1]["seq"] if len(rows) > limit else None
+        return entries, next_seq
@@ -0,0 +1,196 @@
+"""Checkpoints of intermediate pipeline results, so a failed request resumes where it stopped."""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .cache_version import alignment_fingerprint, analysis_fingerprint
+from .claude_client import LAYER_NAMES
+from .types import Alignment, AlignmentLayers, SentencePair
+
+logger = logging.getLogger(__name__)
+
+# Checkpoints only matter until the final result is cached, so they expire after a day by default
+STAGE_CACHE_TTL_SECONDS = float(os.environ.get("ALIGNMENT_STAGE_CACHE_TTL_SECONDS", 24 * 3600))
+# Writes between sweeps for expired checkpoints
+SWEEP_INTERVAL = 500
+
+STAGES = ("translation", "analysis", "layer")
+
+# Part of each checkpoint key, so checkpoints made with other pipeline settings are never reused
+_STAGE_VERSIONS = {"translation": "", "analysis": analysis_fingerprint(), "layer": alignment_fingerprint()}
+
+
+class StageCache:
+    """File store of per-stage outputs: translations, Stanza analyses and alignment layers.
+
+    The final alignment cache only holds complete results, so when Claude fails after
+    Itzuli and Stanza have succeeded, a retry would otherwise pay for all of them again.
+    Each stage's output is checkpointed here under a key built from that stage's inputs,
+    and a retry only recomputes the stages that are missing. Values are small JSON
+    documents in <cache_dir>/stages/<stage>/<key prefix>/<key>.json, written
+    atomically; entries older than the TTL are ignored and swept periodically.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, ttl_seconds: Optional[float] = None):
+        """Initialize store under <cache_dir>/stages (cache_dir defaults to ALIGNMENT_CACHE_DIR)."""
+        cache_dir = Path(cache_dir or os.environ.get("ALIGNMENT_CACHE_DIR", ".cache/alignments"))
+        self.root = cache_dir / "stages"
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = STAGE_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self._lock = threading.Lock()
+        self._writes_since_sweep = 0
+
+    def _path(self, stage: str, parts: tuple) -> Path:
+        if stage not in STAGES:
+            raise ValueError(f"Unknown pipeline stage: {stage}")
+        key = hashlib.sha256("\x1f".join(map(str, (_STAGE_VERSIONS[stage], *parts))).encode()).hexdigest()
+        return self.root / stage / key[:2] / f"{key}.json"
+
+    def get(self, stage: str, *parts: Any) -> Optional[Any]:
+        """Return the checkpointed output of a stage for the given inputs, or None."""
+        path = self._path(stage, parts)
+        try:
+            if self.ttl_seconds > 0 and time.time() - path.stat().st_mtime > self.ttl_seconds:
+                return None
+            return json.loads(path.read_bytes())
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Stage checkpoint read failed: {e}")
+            return None
+
+    def set(self, stage: str, value: Any, *parts: Any) -> None:
+        """Checkpoint the output of a stage (any JSON-serializable value) for the given inputs."""
+        path = self._path(stage, parts)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write-then-rename so other workers never read a half-written checkpoint
+            tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.write_text(json.dumps(value, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Stage checkpoint write failed: {e}")
+            return
+
+        with self._lock:
+            self._writes_since_sweep += 1
+            due = self._writes_since_sweep >= SWEEP_INTERVAL
+            if due:
+                self._writes_since_sweep = 0
+        if due:
+            self.sweep()
+
+    def sweep(self) -> int:
+        """
+        Delete expired checkpoints.
+
+        Returns:
+            Number of checkpoints removed
+        """
+        if self.ttl_seconds <= 0:
+            return 0
+        cutoff = time.time() - self.ttl_seconds
+        removed = 0
+        for path in self.root.glob("*/*/*.json"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                continue
+        if removed:
+            logger.info(f"Swept {removed} expired stage checkpoints")
+        return removed
+
+    def clear(self) -> None:
+        """Delete all checkpoints."""
+        for stage_dir in self.root.iterdir():
+            shutil.rmtree(stage_dir, ignore_errors=True)
+
+
+def scaffold_fingerprint(pair: SentencePair) -> str:
+    """Identify the Claude input for a sentence pair: both tokenized sentences, not the id or layers."""
+    content = json.dumps(
+        [pair.source.model_dump(mode="json"), pair.target.model_dump(mode="json")],
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def load_layers(checkpoints: Optional[StageCache], pair: SentencePair) -> Dict[str, List[Alignment]]:
+    """Return the alignment layers already generated for a scaffold, by layer name."""
+    if checkpoints is None:
+        return {}
+    fingerprint = scaffold_fingerprint(pair)
+    layers: Dict[str, List[Alignment]] = {}
+    for layer_name in LAYER_NAMES:
+        stored = checkpoints.get("layer", fingerprint, layer_name)
+        if stored is not None:
+            layers[layer_name] = [Alignment.model_validate(item) for item in stored]
+    return layers
+
+
+class LayerCheckpointer:
+    """Checkpoints the alignment layers of one scaffold as Claude produces them.
+
+    Non-empty layers are saved as soon as they arrive. Empty layers are only saved
+    once at least one non-empty layer came from the same call, since a failed or
+    unparseable call yields nothing but empty layers and must not be mistaken for a
+    genuine "no alignments" answer.
+    """
+
+    def __init__(self, checkpoints: Optional[StageCache], pair: SentencePair):
+        self._checkpoints = checkpoints
+        self._fingerprint = scaffold_fingerprint(pair) if checkpoints is not None else ""
+        self._pending_empty: List[str] = []
+        self._produced = False
+
+    def add(self, layer_name: str, alignments: List[Alignment]) -> None:
+        """Record one layer returned by Claude."""
+        if self._checkpoints is None:
+            return
+        if not alignments:
+            self._pending_empty.append(layer_name)
+            return
+        self._produced = True
+        self._save(layer_name, alignments)
+
+    def finish(self) -> None:
+        """Save the empty layers of a call that also produced alignments."""
+        if self._produced:
+            for layer_name in self._pending_empty:
+                self._save(layer_name, [])
+        self._pending_empty = []
+
+    def _save(self, layer_name: str, alignments: List[Alignment]) -> None:
+        self._checkpoints.set(
+            "layer", [alignment.model_dump() for alignment in alignments], self._fingerprint, layer_name
+        )
+
+
+def layers_complete(checkpoints: Optional[StageCache], pair: SentencePair) -> bool:
+    """
+    Whether a generated sentence pair can be cached as a final result.
+
+    A failed Claude call leaves only empty layers. That is either the whole result
+    (nothing to cache) or, when earlier layers came from checkpoints, the rest of it;
+    a successful run checkpoints every layer, so a partial set of checkpoints means
+    the remaining layers are placeholders.
+    """
+    checkpointed = load_layers(checkpoints, pair)
+    if checkpointed and len(checkpointed) < len(LAYER_NAMES):
+        return False
+    return not is_degraded(pair.layers)
+
+
+def is_degraded(layers: AlignmentLayers) -> bool:
+    """Whether every layer is empty, which is what a failed or unparseable Claude call leaves behind."""
+    return not any(getattr(layers, layer_name) for layer_name in LAYER_NAMES)
@@ -2,7 +2,7 @@
 
 import json
 from typing import List, Tuple
-from .types import TranslationResult, LanguageCode
+from .types import AnalysisResult, AnalysisRow, BatchItemResult, TranslationResult, LanguageCode
 from .i18n import LANGUAGE_NAMES, OUTPUT_LABELS, FRIENDLY_FEATS, FRIENDLY_UPOS, QUIRKS
 
 
@@ -34,21 +34,45 @@ def apply_friendly_mappings(
     return friendly_rows
 
 
-def format_as_markdown_table(result: TranslationResult, output_language: LanguageCode = "en") -> str:
+def format_as_markdown_table(
+    result: TranslationResult, output_language: LanguageCode = "en", include_analysis: bool = True
+) -> str:
     """Format TranslationResult as markdown table with 100-column limit."""
     # Get localized labels and language names
     labels = OUTPUT_LABELS.get(output_language, OUTPUT_LABELS["en"])
     language_names = LANGUAGE_NAMES.get(output_language, LANGUAGE_NAMES["en"])
 
+    output_lines = []
+    output_lines.append(f"{labels['source']}: {result.source_text} ({language_names[result.source_language]})")
+    output_lines.append(f"{labels['translation']}: {result.translated_text} ({language_names[result.target_language]})")
+
+    if include_analysis:
+        output_lines.append("")
+        output_lines.extend(_format_analysis_table(result.analysis_rows, output_language))
+
+    return "\n".join(output_lines)
+
+
+def format_analysis_as_markdown_table(result: AnalysisResult, output_language: LanguageCode = "en") -> str:
+    """Format analysis-only AnalysisResult as markdown table with 100-column limit."""
+    labels = OUTPUT_LABELS.get(output_language, OUTPUT_LABELS["en"])
+    language_names = LANGUAGE_NAMES.get(output_language, LANGUAGE_NAMES["en"])
+
+    output_lines = [f"{labels['source']}: {result.text} ({language_names[result.language]})", ""]
+    output_lines.extend(_format_analysis_table(result.analysis_rows, output_language))
+
+    return "\n".join(output_lines)
+
+
+def _format_analysis_table(rows: List[AnalysisRow], output_language: LanguageCode) -> List[str]:
+    labels = OUTPUT_LABELS.get(output_language, OUTPUT_LABELS["en"])
+
     # Convert raw analysis to friendly format
-    raw_rows = [(row.word, row.lemma, row.upos, row.feats) for row in result.analysis_rows]
+    raw_rows = [(row.word, row.lemma, row.upos, row.feats) for row in rows]
     friendly_rows = apply_friendly_mappings(raw_rows, output_language)
 
     # Format output with 100-column limit
     output_lines = []
-    output_lines.append(f"{labels['source']}: {result.source_text} ({language_names[result.source_language]})")
-    output_lines.append(f"{labels['translation']}: {result.translated_text} ({language_names[result.target_language]})")
-    output_lines.append("")
     output_lines.append(f"{labels['analysis_header']}:")
     output_lines.append(f"| {labels['word']} | {labels['lemma']} | {labels['part_of_speech']} | {labels['features']} |")
     output_lines.append("|------|-------|---------------|----------|")
@@ -88,7 +112,56 @@ def format_as_markdown_table(result: TranslationResult, output_language: Languag
         else:
             output_lines.append(f"| {word} | {lemma} | {upos} | {feats_display} |")
 
-    return "\n".join(output_lines)
+    return output_lines
+
+
+def format_batch_as_markdown(items: List[BatchItemResult], output_language: LanguageCode = "en") -> str:
+    """Format batch results as numbered markdown sections, one per input text."""
+    labels = OUTPUT_LABELS.get(output_language, OUTPUT_LABELS["en"])
+    total = len(items)
+
+    sections = []
+    for item in items:
+        header = f"### {item.index + 1}/{total}"
+        if item.result is not None:
+            body = format_as_markdown_table(item.result, output_language)
+        else:
+            body = f"{labels['source']}: {item.source_text}\n{labels['error']}: {item.error}"
+        sections.append(f"{header}\n{body}")
+
+    return "\n\n".join(sections)
+
+
+def format_as_compact_dict(
+    result: TranslationResult, output_language: LanguageCode = "en", friendly: bool = True
+) -> dict:
+    """Format TranslationResult as a compact dict with abbreviated keys for structured output.
+
+    Keys: src/sl (source text/language), tr/tl (translation/target language), id (translation id),
+    a (analysis rows with w=word, l=lemma, p=part of speech, f=features; f omitted when empty).
+    With friendly=False, part of speech and features are raw Stanza UPOS/UD strings.
+    """
+    rows = [(row.word, row.lemma, row.upos, row.feats) for row in result.analysis_rows]
+    if friendly:
+        # Keep the bare lemma; the friendly mapping wraps it in parentheses for table display
+        friendly_rows = apply_friendly_mappings(rows, output_language)
+        rows = [(word, lemma, upos, feats) for (word, _, upos, feats), (_, lemma, _, _) in zip(friendly_rows, rows)]
+
+    analysis = []
+    for word, lemma, upos, feats in rows:
+        entry = {"w": word, "l": lemma, "p": upos}
+        if feats:
+            entry["f"] = feats
+        analysis.append(entry)
+
+    return {
+        "src": result.source_text,
+        "sl": result.source_language,
+        "tr": result.translated_text,
+        "tl": result.target_language,
+        "id": result.translation_id,
+        "a": analysis,
+    }
 
 
 def format_as_json(result: TranslationResult, output_language: LanguageCode = "en") -> str:
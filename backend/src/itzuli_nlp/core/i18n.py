@@ -36,6 +36,7 @@ OUTPUT_LABELS = {
         "lemma": "Lemma",
         "part_of_speech": "Part of Speech",
         "features": "Features",
+        "error": "Error",
     },
     "eu": {
         "source": "Jatorria",
@@ -45,6 +46,7 @@ OUTPUT_LABELS = {
         "lemma": "Lema",
         "part_of_speech": "Hitz Mota",
         "features": "Ezaugarriak",
+        "error": "Errorea",
     },
     "es": {
         "source": "Origen",
@@ -54,6 +56,7 @@ OUTPUT_LABELS = {
         "lemma": "Lema",
         "part_of_speech": "Categoría Gramatical",
         "features": "Características",
+        "error": "Error",
     },
     "fr": {
         "source": "Source",
@@ -63,6 +66,7 @@ OUTPUT_LABELS = {
         "lemma": "Lemme",
         "part_of_speech": "Catégorie Grammaticale",
         "features": "Caractéristiques",
+        "error": "Erreur",
     },
 }
 
@@ -0,0 +1,337 @@
+"""Lightweight Prometheus-style metrics.
+
+Counters, gauges and histograms are kept in process memory and rendered in the
+Prometheus text exposition format (the alignment server serves them on /metrics).
+Recording a sample is a dict lookup and a locked increment, cheap enough to leave
+on in production. Metrics of the pipeline stages live here, so the analysis tools
+can record them without depending on the HTTP server.
+
+Pre-fork workers each keep their own samples, but a scrape is answered by whichever
+worker accepts it. So workers share their samples (see Registry.share): each one
+writes a snapshot to its own file in a shared directory, and /metrics renders the sum
+over every worker's file. Counters and histograms of workers that have exited are
+kept, so totals never go backwards across restarts; gauges only count live workers.
+"""
+
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upstream calls range from milliseconds (cache, Stanza) to a minute or more (Claude)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], object] = {}
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+        REGISTRY.register(self)
+
+    def labels(self, *values: str):
+        """Return the child metric for a set of label values."""
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _label_string(self, values: Tuple[str, ...], extra: Optional[Tuple[str, str]] = None) -> str:
+        pairs = list(zip(self.labelnames, values))
+        if extra:
+            pairs.append(extra)
+        if not pairs:
+            return ""
+        escaped = (f'{name}="{_escape(value)}"' for name, value in pairs)
+        return "{" + ",".join(escaped) + "}"
+
+    def render(self, children: Optional[Dict[Tuple[str, ...], object]] = None) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        for values, child in sorted((self._children if children is None else children).items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+    def _render_child(self, values, child) -> List[str]:
+        return [f"{self.name}{self._label_string(values)} {_format(child.get())}"]
+
+    def dump(self) -> List[list]:
+        """Samples of this process as [label values, value] pairs, for sharing with other workers."""
+        return [[list(values), child.dump()] for values, child in list(self._children.items())]
+
+    def merge(self, children: Dict[Tuple[str, ...], object], samples: List[list]) -> None:
+        """Add dumped samples of another process into `children`."""
+        for values, value in samples:
+            key = tuple(values)
+            child = children.get(key)
+            if child is None:
+                child = children[key] = self._new_child()
+            child.add(value)
+
+
+class _Value:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value -= amount
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self._value = value
+
+    def get(self) -> float:
+        return self._value
+
+    def dump(self) -> float:
+        return self._value
+
+    def add(self, value: float) -> None:
+        self.inc(value)
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    type_name = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increment the unlabelled counter."""
+        self.labels().inc(amount)
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, e.g. requests in flight."""
+
+    type_name = "gauge"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increment the unlabelled gauge."""
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        """Decrement the unlabelled gauge."""
+        self.labels().dec(amount)
+
+    def set(self, value: float) -> None:
+        """Set the unlabelled gauge."""
+        self.labels().set(value)
+
+
+class _HistogramValue:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def dump(self) -> list:
+        with self._lock:
+            return [list(self.counts), self.sum]
+
+    def add(self, value: list) -> None:
+        counts, total_sum = value
+        with self._lock:
+            for index, count in enumerate(counts[:len(self.counts)]):
+                self.counts[index] += count
+            self.sum += total_sum
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets, for latency percentiles."""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        """Record a value in the unlabelled histogram."""
+        self.labels().observe(value)
+
+    def _render_child(self, values, child) -> List[str]:
+        with child._lock:
+            counts = list(child.counts)
+            total_sum = child.sum
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, counts):
+            cumulative += count
+            lines.append(f"{self.name}_bucket{self._label_string(values, ('le', _format(bound)))} {cumulative}")
+        cumulative += counts[-1]
+        lines.append(f"{self.name}_bucket{self._label_string(values, ('le', '+Inf'))} {cumulative}")
+        lines.append(f"{self.name}_sum{self._label_string(values)} {_format(total_sum)}")
+        lines.append(f"{self.name}_count{self._label_string(values)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._directory: Optional[Path] = None
+        self._path: Optional[Path] = None
+        self._stop = threading.Event()
+
+    def register(self, metric: _Metric) -> None:
+        self._metrics.append(metric)
+
+    def share(self, directory: Path, interval: float = 5.0) -> None:
+        """
+        Write this process's samples to its own file in `directory` every `interval` seconds,
+        and render the sum over all files in it from now on.
+
+        Samples of other workers are up to `interval` seconds old when rendered.
+        """
+        directory.mkdir(parents=True, exist_ok=True)
+        self._directory = directory
+        # The start time keeps a later process that reuses the pid from overwriting this one's file
+        self._path = directory / f"{os.getpid()}-{time.time_ns()}.json"
+        self._stop.clear()
+        self.flush()
+        threading.Thread(target=self._flush_every, args=(interval,), name="metrics-flush", daemon=True).start()
+
+    def flush(self) -> None:
+        """Write this process's samples to its shared file, if sharing."""
+        if self._path is None:
+            return
+        snapshot = {metric.name: metric.dump() for metric in self._metrics}
+        tmp_path = self._path.with_name(f".{self._path.name}.tmp")
+        try:
+            tmp_path.write_text(json.dumps(snapshot))
+            os.replace(tmp_path, self._path)
+        except OSError as e:
+            logger.warning(f"Could not write metrics snapshot: {e}")
+
+    def stop_sharing(self) -> None:
+        """Write a final snapshot and stop the periodic writes."""
+        self._stop.set()
+        self.flush()
+
+    def _flush_every(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            self.flush()
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format, summed over workers when sharing."""
+        merged = self._merge_shared() if self._directory is not None else None
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render(None if merged is None else merged[metric.name]))
+        return "\n".join(lines) + "\n"
+
+    def _merge_shared(self) -> Dict[str, Dict[Tuple[str, ...], object]]:
+        merged: Dict[str, Dict[Tuple[str, ...], object]] = {metric.name: {} for metric in self._metrics}
+        # This process's live samples, then the latest snapshot of every other worker
+        snapshots = [({metric.name: metric.dump() for metric in self._metrics}, True)]
+        for path in self._directory.glob("*.json"):
+            if path == self._path:
+                continue
+            try:
+                snapshots.append((json.loads(path.read_text()), _alive(int(path.name.partition("-")[0]))))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping metrics snapshot {path.name}: {e}")
+
+        for snapshot, alive in snapshots:
+            for metric in self._metrics:
+                # A gauge is a current value, which an exited worker no longer has
+                if isinstance(metric, Gauge) and not alive:
+                    continue
+                metric.merge(merged[metric.name], snapshot.get(metric.name, []))
+        return merged
+
+
+def clear_shared(directory: Path) -> None:
+    """Remove the metrics snapshots of an earlier run, so counters start from zero with the server."""
+    for path in directory.glob("*.json"):
+        path.unlink(missing_ok=True)
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Exists, but belongs to another user
+        pass
+    return True
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format(value: float) -> str:
+    return repr(float(value))
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = Histogram(
+    "alignment_stage_duration_seconds", "Time spent in each pipeline stage (itzuli, stanza, claude).", ("stage",)
+)
+STAGE_ERRORS = Counter("alignment_stage_errors_total", "Failed calls per pipeline stage or upstream.", ("stage",))
+
+
+@contextmanager
+def track_stage(stage: str) -> Iterator[None]:
+    """Time a block into STAGE_SECONDS and count exceptions raised from it in STAGE_ERRORS."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.labels(stage).inc()
+        raise
+    finally:
+        STAGE_SECONDS.labels(stage).observe(time.perf_counter() - start)
@@ -1,19 +1,44 @@
-from typing import List, Tuple
+from __future__ import annotations
 
-import stanza
+from typing import TYPE_CHECKING, List, Tuple
 
 from .types import AnalysisRow, LanguageCode
 
+# stanza pulls in torch, which dominates process start-up; import it only when a
+# pipeline is actually built or used so callers that never analyze text stay fast.
+if TYPE_CHECKING:
+    import stanza
+
+# Part of the alignment cache version: changing it regenerates cached analyses
+PIPELINE_PROCESSORS = "tokenize,pos,lemma"
+
 
 def create_pipeline(language: LanguageCode = "eu") -> stanza.Pipeline:
+    import stanza
+
     return stanza.Pipeline(
-        language, download_method=stanza.DownloadMethod.REUSE_RESOURCES, processors="tokenize,pos,lemma"
+        language, download_method=stanza.DownloadMethod.REUSE_RESOURCES, processors=PIPELINE_PROCESSORS
     )
 
 
 def process_raw_analysis(pipeline: stanza.Pipeline, input_text: str) -> List[AnalysisRow]:
     """Process text with Stanza and return raw analysis data."""
     doc = pipeline(input_text)
+    return _doc_to_rows(doc)
+
+
+def process_raw_analysis_batch(pipeline: stanza.Pipeline, input_texts: List[str]) -> List[List[AnalysisRow]]:
+    """Process several texts with a single batched Stanza call, preserving input order."""
+    if not input_texts:
+        return []
+
+    import stanza
+
+    docs = pipeline.bulk_process([stanza.Document([], text=text) for text in input_texts])
+    return [_doc_to_rows(doc) for doc in docs]
+
+
+def _doc_to_rows(doc) -> List[AnalysisRow]:
     rows = []
 
     for sent in doc.sentences:
@@ -1,7 +1,7 @@
 """Common types for the Itzuli+Stanza pipeline."""
 
 from dataclasses import dataclass
-from typing import List, Literal
+from typing import List, Literal, Optional
 
 LanguageCode = Literal["eu", "en", "es", "fr"]
 
@@ -26,3 +26,23 @@ class TranslationResult:
     target_language: LanguageCode
     translation_id: str
     analysis_rows: List[AnalysisRow]
+    quota: Optional[dict] = None  # Quota snapshot when the Itzuli response includes one
+
+
+@dataclass
+class AnalysisResult:
+    """Result of morphological analysis without translation."""
+
+    text: str
+    language: LanguageCode
+    analysis_rows: List[AnalysisRow]
+
+
+@dataclass
+class BatchItemResult:
+    """Outcome of one text within a batch translation; exactly one of result/error is set."""
+
+    index: int
+    source_text: str
+    result: Optional[TranslationResult] = None
+    error: Optional[str] = None
@@ -1,19 +1,146 @@
 """Core Itzuli+Stanza pipeline for translation with morphological analysis."""
 
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, Union
 
 from Itzuli import Itzuli
-from .nlp import create_pipeline, process_raw_analysis
-from .types import TranslationResult, LanguageCode
+from .nlp import create_pipeline, process_raw_analysis, process_raw_analysis_batch
+from .types import AnalysisResult, AnalysisRow, BatchItemResult, TranslationResult, LanguageCode
 
 logger = logging.getLogger("itzuli-stanza-pipeline")
 
+DEFAULT_BATCH_CONCURRENCY = 4
 
-def get_cached_stanza_pipeline():
-    """Get or create Stanza pipeline (cached)."""
-    if not hasattr(get_cached_stanza_pipeline, "_pipeline"):
-        get_cached_stanza_pipeline._pipeline = create_pipeline()
-    return get_cached_stanza_pipeline._pipeline
+# Callers may run on several worker threads: guard pipeline creation so models load once,
+# and serialize Stanza calls since a pipeline is not safe to share across concurrent calls.
+_pipelines = {}
+_pipeline_lock = threading.Lock()
+_analysis_locks = {}
+
+
+def get_cached_stanza_pipeline(language: LanguageCode = "eu"):
+    """Get or create the Stanza pipeline for a language (cached)."""
+    if language not in _pipelines:
+        with _pipeline_lock:
+            if language not in _pipelines:
+                _pipelines[language] = create_pipeline(language)
+    return _pipelines[language]
+
+
+def start_background_warmup(languages: Iterable[LanguageCode] = ("eu",)) -> threading.Thread:
+    """Load Stanza pipelines on a daemon thread so the first analysis skips model loading."""
+
+    def warm_up():
+        for language in languages:
+            try:
+                get_cached_stanza_pipeline(language)
+                logger.info("Stanza pipeline warmed up: %s", language)
+            except Exception as e:
+                logger.warning("Stanza warmup failed for %s: %s", language, e)
+
+    thread = threading.Thread(target=warm_up, name="stanza-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def _analysis_lock(language: LanguageCode) -> threading.Lock:
+    return _analysis_locks.setdefault(language, threading.Lock())
+
+
+def process_analysis(text: str, language: LanguageCode = "eu") -> AnalysisResult:
+    """
+    Run morphological analysis only, without translating.
+
+    Args:
+        text: Text to analyze
+        language: Language of the text (any of the pipeline languages)
+
+    Returns:
+        AnalysisResult with raw Stanza analysis rows
+    """
+    stanza_pipeline = get_cached_stanza_pipeline(language)
+    with _analysis_lock(language):
+        analysis_rows = process_raw_analysis(stanza_pipeline, text)
+
+    return AnalysisResult(text=text, language=language, analysis_rows=analysis_rows)
+
+
+def process_analysis_batch(texts: List[str], language: LanguageCode = "eu") -> List[List[AnalysisRow]]:
+    """
+    Run morphological analysis on several texts in a single Stanza call.
+
+    Args:
+        texts: Texts to analyze, all in the same language
+        language: Language of the texts (any of the pipeline languages)
+
+    Returns:
+        One list of raw Stanza analysis rows per input text, in input order
+    """
+    if not texts:
+        return []
+
+    stanza_pipeline = get_cached_stanza_pipeline(language)
+    with _analysis_lock(language):
+        return process_raw_analysis_batch(stanza_pipeline, texts)
+
+
+def translate_concurrently(
+    translate: Callable[[str], dict], texts: List[str], max_workers: int = DEFAULT_BATCH_CONCURRENCY
+) -> List[Union[dict, Exception]]:
+    """
+    Run a translation function over several texts with a bounded pool of concurrent Itzuli requests.
+
+    Args:
+        translate: Function returning the Itzuli translation data for one text
+        texts: Texts to translate
+        max_workers: Maximum number of concurrent Itzuli requests
+
+    Returns:
+        The translation data or the raised exception for each text, in input order
+    """
+    if not texts:
+        return []
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(texts)))) as pool:
+        futures = [pool.submit(translate, text) for text in texts]
+
+    results: List[Union[dict, Exception]] = []
+    for future in futures:
+        try:
+            results.append(future.result())
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+def analyze_batch_with_fallback(
+    texts: List[str], language: LanguageCode = "eu"
+) -> List[Union[List[AnalysisRow], Exception]]:
+    """
+    Analyze several texts in one Stanza call, retrying them one by one if the batch fails.
+
+    Args:
+        texts: Texts to analyze, all in the same language
+        language: Language of the texts
+
+    Returns:
+        The analysis rows or the raised exception for each text, in input order
+    """
+    try:
+        return process_analysis_batch(texts, language)
+    except Exception as e:
+        # Fall back to per-item analysis so one bad text doesn't fail the whole batch
+        logger.warning("Batched %s analysis failed, retrying items individually: %s", language, e)
+
+    results: List[Union[List[AnalysisRow], Exception]] = []
+    for text in texts:
+        try:
+            results.append(process_analysis(text, language).analysis_rows)
+        except Exception as item_error:
+            results.append(item_error)
+    return results
 
 
 def process_translation_with_analysis(
@@ -22,6 +149,7 @@ def process_translation_with_analysis(
     source_language: LanguageCode,
     target_language: LanguageCode,
     output_language: LanguageCode = "en",
+    include_analysis: bool = True,
 ) -> TranslationResult:
     """
     Translate text and provide morphological analysis of Basque text.
@@ -32,6 +160,7 @@ def process_translation_with_analysis(
         source_language: Source language code
         target_language: Target language code
         output_language: Language for morphological analysis labels
+        include_analysis: Run Stanza on the Basque text; when False only the translation is returned
 
     Returns:
         TranslationResult with translation and analysis data
@@ -46,8 +175,11 @@ def process_translation_with_analysis(
     basque_text = text if source_language == "eu" else translated_text
 
     # Perform morphological analysis (raw Stanza output)
-    stanza_pipeline = get_cached_stanza_pipeline()
-    analysis_rows = process_raw_analysis(stanza_pipeline, basque_text)
+    analysis_rows: List[AnalysisRow] = []
+    if include_analysis:
+        stanza_pipeline = get_cached_stanza_pipeline()
+        with _analysis_lock("eu"):
+            analysis_rows = process_raw_analysis(stanza_pipeline, basque_text)
 
     return TranslationResult(
         source_text=text,
@@ -56,4 +188,66 @@ def process_translation_with_analysis(
         target_language=target_language,
         translation_id=translation_id,
         analysis_rows=analysis_rows,
+        quota=translation_data.get("quota"),
     )
+
+
+def process_batch_translation_with_analysis(
+    api_key: str,
+    texts: List[str],
+    source_language: LanguageCode,
+    target_language: LanguageCode,
+    max_workers: int = DEFAULT_BATCH_CONCURRENCY,
+) -> List[BatchItemResult]:
+    """
+    Translate several texts concurrently and analyze their Basque side in one Stanza batch.
+
+    Args:
+        api_key: Itzuli API key
+        texts: Texts to translate, all sharing the same language pair
+        source_language: Source language code
+        target_language: Target language code
+        max_workers: Maximum number of concurrent Itzuli requests
+
+    Returns:
+        One BatchItemResult per input text, in input order. Failures are reported
+        per item instead of aborting the whole batch.
+    """
+    items = [BatchItemResult(index=i, source_text=text) for i, text in enumerate(texts)]
+    if not texts:
+        return items
+
+    itzuli_client = Itzuli(api_key)
+    translations = translate_concurrently(
+        lambda text: itzuli_client.getTranslation(text, source_language, target_language), texts, max_workers
+    )
+
+    translated = []
+    for item, translation_data in zip(items, translations):
+        if isinstance(translation_data, Exception):
+            logger.warning("Batch item %d translation failed: %s", item.index, translation_data)
+            item.error = str(translation_data)
+            continue
+
+        translated_text = translation_data.get("translated_text", "")
+        item.result = TranslationResult(
+            source_text=item.source_text,
+            source_language=source_language,
+            translated_text=translated_text,
+            target_language=target_language,
+            translation_id=translation_data.get("id", ""),
+            analysis_rows=[],
+            quota=translation_data.get("quota"),
+        )
+        translated.append(item)
+
+    # Analyze all Basque texts in a single batched Stanza call
+    basque_texts = [item.source_text if source_language == "eu" else item.result.translated_text for item in translated]
+    for item, rows in zip(translated, analyze_batch_with_fallback(basque_texts, "eu")):
+        if isinstance(rows, Exception):
+            item.result = None
+            item.error = str(rows)
+        else:
+            item.result.analysis_rows = rows
+
+    return items
@@ -0,0 +1,200 @@
+"""Durable local spool for translation feedback, delivered to Itzuli in the background."""
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Claimed entries older than this belong to a process that died mid-send and are queued again
+CLAIM_TIMEOUT_SECONDS = 600.0
+
+
+def default_spool_dir() -> Path:
+    """Spool directory in the user cache directory, so it does not depend on the working directory."""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "itzuli-mcp" / "feedback"
+
+
+class FeedbackSpool:
+    """On-disk queue of feedback submissions flushed in batches with retry and backoff.
+
+    Each submission is one JSON file written atomically, so queued feedback survives
+    restarts. Entries that keep failing are moved to a ``failed/`` subdirectory.
+
+    Several processes may share a spool (e.g. one stdio MCP server per client), so an
+    entry is claimed by renaming it into ``inflight/`` before it is sent; only the
+    process whose rename succeeds delivers it.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[str, str, int], dict],
+        spool_dir: Optional[str] = None,
+        batch_size: int = 20,
+        flush_interval: float = 5.0,
+        max_attempts: int = 8,
+        base_backoff: float = 2.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        """Initialize spool with the upstream send function and spool directory."""
+        self._send = send
+        self.spool_dir = Path(spool_dir or os.environ.get("ITZULI_FEEDBACK_SPOOL_DIR") or default_spool_dir())
+        self.failed_dir = self.spool_dir / "failed"
+        self.failed_dir.mkdir(parents=True, exist_ok=True)
+        self.inflight_dir = self.spool_dir / "inflight"
+        self.inflight_dir.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self._clock = clock
+
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def enqueue(self, translation_id: str, correction: str, evaluation: int) -> str:
+        """Persist a feedback submission and wake the flusher. Returns the spool entry id."""
+        entry_id = f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+        entry = {
+            "id": entry_id,
+            "translation_id": translation_id,
+            "correction": correction,
+            "evaluation": evaluation,
+            "attempts": 0,
+            "next_attempt_at": 0.0,
+        }
+        self._write(entry)
+        self._wake.set()
+        logger.debug("Queued feedback %s for translation %s", entry_id, translation_id)
+        return entry_id
+
+    def pending(self) -> int:
+        """Number of submissions waiting to be delivered."""
+        return sum(1 for _ in self.spool_dir.glob("*.json")) + sum(1 for _ in self.inflight_dir.glob("*.json"))
+
+    def flush(self) -> int:
+        """Deliver up to batch_size due submissions in FIFO order. Returns how many were sent."""
+        sent = 0
+        with self._flush_lock:
+            self._requeue_abandoned()
+            now = self._clock()
+            for path in sorted(self.spool_dir.glob("*.json")):
+                if sent >= self.batch_size:
+                    break
+
+                claimed = self._claim(path, now)
+                if claimed is None:
+                    continue
+                claimed_path, entry = claimed
+
+                try:
+                    self._send(entry["translation_id"], entry["correction"], entry["evaluation"])
+                except Exception as e:
+                    self._record_failure(claimed_path, entry, now, e)
+                    # Upstream is likely unavailable; leave the rest for the next cycle
+                    break
+
+                claimed_path.unlink(missing_ok=True)
+                sent += 1
+
+        if sent:
+            logger.info("Delivered %d queued feedback submission(s)", sent)
+        return sent
+
+    def start(self) -> None:
+        """Start the background flusher thread (idempotent)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="feedback-spool", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the background flusher thread."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                # Keep draining while full batches go through
+                while self.flush() >= self.batch_size and not self._stop.is_set():
+                    pass
+            except Exception as e:
+                logger.warning("Feedback flush failed: %s", e)
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+
+    def _claim(self, path: Path, now: float) -> Optional[tuple]:
+        """Move a due entry into inflight/ and return (claimed path, entry), or None if it is not ours to send."""
+        try:
+            if json.loads(path.read_text(encoding="utf-8"))["next_attempt_at"] > now:
+                return None
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # Unreadable entries are claimed and set aside below
+            pass
+
+        claimed_path = self.inflight_dir / path.name
+        try:
+            os.replace(path, claimed_path)
+        except FileNotFoundError:
+            # Another process claimed it first
+            return None
+        # Renaming keeps the modification time; refresh it so the claim is not mistaken for an abandoned one
+        os.utime(claimed_path)
+
+        try:
+            entry = json.loads(claimed_path.read_text(encoding="utf-8"))
+        except Exception as e:
+            logger.warning("Unreadable feedback entry %s: %s", path.name, e)
+            os.replace(claimed_path, self.failed_dir / path.name)
+            return None
+
+        if entry["next_attempt_at"] > now:
+            # Rescheduled by the process that sent it between our read and our claim
+            os.replace(claimed_path, path)
+            return None
+        return claimed_path, entry
+
+    def _requeue_abandoned(self) -> None:
+        """Return entries claimed by a process that stopped before finishing with them."""
+        cutoff = time.time() - CLAIM_TIMEOUT_SECONDS
+        for claimed_path in self.inflight_dir.glob("*.json"):
+            try:
+                if claimed_path.stat().st_mtime < cutoff:
+                    os.replace(claimed_path, self.spool_dir / claimed_path.name)
+                    logger.info("Requeued abandoned feedback entry %s", claimed_path.name)
+            except FileNotFoundError:
+                continue
+
+    def _record_failure(self, path: Path, entry: dict, now: float, error: Exception) -> None:
+        entry["attempts"] += 1
+        if entry["attempts"] >= self.max_attempts:
+            logger.error("Giving up on feedback %s after %d attempts: %s", entry["id"], entry["attempts"], error)
+            path.replace(self.failed_dir / path.name)
+            return
+
+        entry["next_attempt_at"] = now + self.base_backoff * 2 ** (entry["attempts"] - 1)
+        logger.warning("Feedback %s failed (attempt %d), will retry: %s", entry["id"], entry["attempts"], error)
+        self._write(entry)
+        path.unlink(missing_ok=True)
+
+    def _write(self, entry: dict) -> None:
+        # Write-then-rename so the flusher never reads a half-written entry
+        path = self.spool_dir / f"{entry['id']}.json"
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(entry, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, path)
@@ -0,0 +1,50 @@
+"""Short-lived in-memory cache for Itzuli quota responses."""
+
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class QuotaCache:
+    """TTL cache for the last known quota, refreshed on expiry or from translation responses."""
+
+    def __init__(self, ttl_seconds: float = 60.0, clock: Callable[[], float] = time.monotonic):
+        """Initialize cache with a time-to-live in seconds."""
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._data: Optional[dict] = None
+        self._expires_at = 0.0
+
+    def get(self) -> Optional[dict]:
+        """Return the cached quota if it has not expired."""
+        with self._lock:
+            if self._data is not None and self._clock() < self._expires_at:
+                return self._data
+            return None
+
+    def set(self, data: dict) -> None:
+        """Store a fresh quota response."""
+        with self._lock:
+            self._data = data
+            self._expires_at = self._clock() + self.ttl_seconds
+
+    def invalidate(self) -> None:
+        """Drop the cached quota so the next lookup goes upstream."""
+        with self._lock:
+            self._data = None
+            self._expires_at = 0.0
+
+    def get_or_fetch(self, fetch: Callable[[], dict]) -> dict:
+        """Return the cached quota, calling fetch() and caching its result on a miss."""
+        cached = self.get()
+        if cached is not None:
+            logger.debug("Quota cache hit")
+            return cached
+
+        data = fetch()
+        self.set(data)
+        return data
@@ -1,14 +1,20 @@
+import functools
 import json
 import logging
 import os
 import sys
+import weakref
+from typing import Literal
 
+import anyio
 from dotenv import load_dotenv
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import Context, FastMCP
 from mcp.server.fastmcp.exceptions import ToolError
+from mcp.types import CallToolResult, TextContent
 
 from . import services
 from ..core.types import LanguageCode
+from ..core.workflow import start_background_warmup
 from ..core.i18n import LANGUAGE_NAMES
 
 load_dotenv()
@@ -19,36 +25,190 @@ logger = logging.getLogger("itzuli-mcp")
 
 SUPPORTED_LANGUAGES = ("eu", "es", "en", "fr")
 
+MAX_BATCH_SIZE = int(os.environ.get("ITZULI_MAX_BATCH_SIZE", 100))
+BATCH_CONCURRENCY = int(os.environ.get("ITZULI_BATCH_CONCURRENCY", 4))
+MAX_CONCURRENCY = int(os.environ.get("ITZULI_MCP_MAX_CONCURRENCY", 8))
+CLIENT_CONCURRENCY = int(os.environ.get("ITZULI_MCP_CLIENT_CONCURRENCY", 4))
+
+# "stdio" (one process per client) or "streamable-http"/"sse" (one shared process for many clients)
+TRANSPORT = os.environ.get("ITZULI_MCP_TRANSPORT", "stdio")
+HOST = os.environ.get("ITZULI_MCP_HOST", "127.0.0.1")
+PORT = int(os.environ.get("ITZULI_MCP_PORT", 8001))
+
+# Stanza/torch are imported lazily on first analysis; opt in to loading them in the background at start-up.
+# A shared HTTP server warms up by default so no client pays the model load.
+WARMUP = os.environ.get("ITZULI_MCP_WARMUP", "" if TRANSPORT == "stdio" else "1").lower() in ("1", "true", "yes")
+
 api_key = os.environ.get("ITZULI_API_KEY", "")
 
-mcp = FastMCP("itzuli-mcp")
+mcp = FastMCP("itzuli-mcp", host=HOST, port=PORT)
+
+# Bounds how many blocking tool calls (Itzuli I/O, Stanza) run at once in worker threads
+_blocking_limiter = anyio.CapacityLimiter(MAX_CONCURRENCY)
+
+# Per-session limiters so one client cannot occupy every worker thread of a shared server
+_client_limiters: "weakref.WeakKeyDictionary[object, anyio.CapacityLimiter]" = weakref.WeakKeyDictionary()
+
+
+def _client_limiter(ctx: Context | None) -> anyio.CapacityLimiter | None:
+    """Return the concurrency limiter for the calling client session, if there is one."""
+    if ctx is None:
+        return None
+    try:
+        session = ctx.session
+    except ValueError:
+        # Called outside of an MCP request (e.g. directly in tests)
+        return None
+
+    limiter = _client_limiters.get(session)
+    if limiter is None:
+        limiter = anyio.CapacityLimiter(CLIENT_CONCURRENCY)
+        _client_limiters[session] = limiter
+    return limiter
+
+
+async def _run_blocking(ctx: Context | None, func, *args, **kwargs):
+    """Run a blocking service call in a worker thread so the event loop stays free."""
+    call = functools.partial(func, *args, **kwargs)
+    client_limiter = _client_limiter(ctx)
+    if client_limiter is None:
+        return await anyio.to_thread.run_sync(call, limiter=_blocking_limiter)
+
+    async with client_limiter:
+        return await anyio.to_thread.run_sync(call, limiter=_blocking_limiter)
+
+
+async def _report_progress(ctx: Context | None, progress: int, total: int, message: str) -> None:
+    """Send a progress notification; a no-op unless the client sent a progress token."""
+    if ctx is None:
+        return
+    try:
+        await ctx.report_progress(progress, total, message=message)
+    except Exception as e:
+        # Progress is best-effort and must never fail the tool call itself
+        logger.debug("progress notification failed: %s", e)
+
+
+# Unstructured by default so markdown results are not duplicated into a structured "result" field;
+# output_format="json" returns its own structured content instead.
+@mcp.tool(structured_output=False)
+async def translate(
+    text: str,
+    source_language: LanguageCode,
+    target_language: LanguageCode,
+    output_language: LanguageCode = "en",
+    include_analysis: bool = True,
+    output_format: Literal["markdown", "json"] = "markdown",
+    friendly: bool = True,
+    ctx: Context | None = None,
+) -> str | list[str] | CallToolResult:
+    """Translate text to or from Basque with morphological analysis. Basque must be either the source or target language. Supported pairs: eu<->es, eu<->en, eu<->fr. Output can be localized to 'en', 'eu', 'es', or 'fr'. Set include_analysis=false when only the translation is needed. Multi-paragraph text is processed paragraph by paragraph (concurrently) and returned as one content block per paragraph. Use output_format="json" for compact structured content {"items": [{"src", "sl", "tr", "tl", "id", "a": [{"w": word, "l": lemma, "p": part of speech, "f": features}]}]}; friendly=false keeps raw UPOS/UD feature codes in that mode."""
+    error = _validate_language_pair(source_language, target_language)
+    if error:
+        return error
+
+    logger.debug("translate request: %s -> %s, text=%s", source_language, target_language, text)
+    paragraphs = services.split_paragraphs(text)
+    total = len(paragraphs)
+
+    if output_format == "json":
+        service, extra = services.translate_with_analysis_compact, {"friendly": friendly}
+    else:
+        service, extra = services.translate_with_analysis, {}
+
+    chunks: list = [None] * total
+    errors: list[Exception] = []
+    done = 0
+
+    async def translate_paragraph(index: int, paragraph: str) -> None:
+        nonlocal done
+        try:
+            chunks[index] = await _run_blocking(
+                ctx,
+                service,
+                api_key,
+                paragraph,
+                source_language,
+                target_language,
+                output_language,
+                include_analysis=include_analysis,
+                **extra,
+            )
+        except Exception as e:
+            errors.append(e)
+            return
+        done += 1
+        await _report_progress(ctx, done, total, f"Translated paragraph {done}/{total}")
+
+    await _report_progress(ctx, 0, total, f"Translated paragraph 0/{total}")
+    # Paragraphs run concurrently within the client and blocking-call limits, and progress follows completion
+    async with anyio.create_task_group() as tg:
+        for index, paragraph in enumerate(paragraphs):
+            tg.start_soon(translate_paragraph, index, paragraph)
+    if errors:
+        raise ToolError(f"Translation with analysis failed: {errors[0]}") from errors[0]
+
+    if output_format == "json":
+        structured = {"items": chunks}
+        compact_json = json.dumps(structured, ensure_ascii=False, separators=(",", ":"))
+        return CallToolResult(content=[TextContent(type="text", text=compact_json)], structuredContent=structured)
+
+    return chunks[0] if total == 1 else chunks
 
 
 @mcp.tool()
-def translate(
-    text: str, source_language: LanguageCode, target_language: LanguageCode, output_language: LanguageCode = "en"
+async def analyze(
+    text: str, language: LanguageCode = "eu", output_language: LanguageCode = "en", ctx: Context | None = None
 ) -> str:
-    """Translate text to or from Basque with morphological analysis. Basque must be either the source or target language. Supported pairs: eu<->es, eu<->en, eu<->fr. Output can be localized to 'en', 'eu', 'es', or 'fr'."""
-    if source_language not in SUPPORTED_LANGUAGES or target_language not in SUPPORTED_LANGUAGES:
+    """Morphological analysis of text without translating it, so no Itzuli quota is used. Use this when the text is already in the language of interest (usually Basque). Supported languages: 'eu', 'es', 'en', 'fr'. Output can be localized to 'en', 'eu', 'es', or 'fr'."""
+    if language not in SUPPORTED_LANGUAGES:
         return f"Unsupported language. Supported: {', '.join(SUPPORTED_LANGUAGES)}"
 
-    if source_language != "eu" and target_language != "eu":
-        return "Basque (eu) must be either the source or target language. Supported pairs: eu<->es, eu<->en, eu<->fr."
+    logger.debug("analyze request: %s, text=%s", language, text)
+    try:
+        return await _run_blocking(ctx, services.analyze_text, text, language, output_language)
+    except Exception as e:
+        raise ToolError(f"Analysis failed: {e}") from e
 
-    logger.debug("translate request: %s -> %s, text=%s", source_language, target_language, text)
+
+@mcp.tool()
+async def translate_batch(
+    texts: list[str],
+    source_language: LanguageCode,
+    target_language: LanguageCode,
+    output_language: LanguageCode = "en",
+    ctx: Context | None = None,
+) -> str:
+    """Translate a list of texts sharing one language pair, with morphological analysis for each. Prefer this over repeated translate calls for vocabulary lists or multiple sentences. Results are returned in input order; a failing item reports its own error without failing the rest."""
+    error = _validate_language_pair(source_language, target_language)
+    if error:
+        return error
+
+    if len(texts) > MAX_BATCH_SIZE:
+        return f"Too many texts in one batch ({len(texts)}). Maximum is {MAX_BATCH_SIZE}."
+
+    logger.debug("translate_batch request: %s -> %s, %d texts", source_language, target_language, len(texts))
     try:
-        result = services.translate_with_analysis(api_key, text, source_language, target_language, output_language)
-        return result
+        return await _run_blocking(
+            ctx,
+            services.translate_batch_with_analysis,
+            api_key,
+            texts,
+            source_language,
+            target_language,
+            output_language,
+            max_workers=BATCH_CONCURRENCY,
+        )
     except Exception as e:
-        raise ToolError(f"Translation with analysis failed: {e}") from e
+        raise ToolError(f"Batch translation with analysis failed: {e}") from e
 
 
 @mcp.tool()
-def get_quota() -> str:
+async def get_quota(ctx: Context | None = None) -> str:
     """Check the current API usage quota for the Itzuli translation service."""
     logger.debug("get_quota request")
     try:
-        data = services.get_quota(api_key)
+        data = await _run_blocking(ctx, services.get_quota, api_key)
     except Exception as e:
         raise ToolError(f"Quota check failed: {e}") from e
     logger.debug("get_quota response: %s", data)
@@ -56,17 +216,29 @@ def get_quota() -> str:
 
 
 @mcp.tool()
-def send_feedback(translation_id: str, correction: str, evaluation: int) -> str:
-    """Submit feedback or a correction for a previous translation."""
+async def send_feedback(
+    translation_id: str, correction: str, evaluation: int, ctx: Context | None = None
+) -> str:
+    """Submit feedback or a correction for a previous translation. Feedback is queued locally and delivered to Itzuli in the background."""
     logger.debug("send_feedback request: id=%s", translation_id)
     try:
-        data = services.send_feedback(api_key, translation_id, correction, evaluation)
+        data = await _run_blocking(ctx, services.queue_feedback, api_key, translation_id, correction, evaluation)
     except Exception as e:
         raise ToolError(f"Feedback submission failed: {e}") from e
     logger.debug("send_feedback response: %s", data)
     return json.dumps(data, ensure_ascii=False, indent=2)
 
 
+def _validate_language_pair(source_language: str, target_language: str) -> str | None:
+    if source_language not in SUPPORTED_LANGUAGES or target_language not in SUPPORTED_LANGUAGES:
+        return f"Unsupported language. Supported: {', '.join(SUPPORTED_LANGUAGES)}"
+
+    if source_language != "eu" and target_language != "eu":
+        return "Basque (eu) must be either the source or target language. Supported pairs: eu<->es, eu<->en, eu<->fr."
+
+    return None
+
+
 def _register_prompt(from_lang: str, to_lang: str) -> None:
     from_name = LANGUAGE_NAMES["en"][from_lang]
     to_name = LANGUAGE_NAMES["en"][to_lang]
@@ -85,5 +257,17 @@ for other in [lang for lang in SUPPORTED_LANGUAGES if lang != "eu"]:
 
 
 if __name__ == "__main__":
-    logger.debug("itzuli-mcp server running on stdio")
-    mcp.run(transport="stdio")
+    if WARMUP:
+        start_background_warmup()
+    if api_key:
+        # Resume delivery of feedback spooled by earlier runs
+        try:
+            services.get_feedback_spool(api_key)
+        except OSError as e:
+            # send_feedback reports the problem when it is used; translation still works
+            logger.warning("feedback spool unavailable: %s", e)
+    if TRANSPORT == "stdio":
+        logger.debug("itzuli-mcp server running on stdio")
+    else:
+        logger.info("itzuli-mcp server running on %s at %s:%d", TRANSPORT, HOST, PORT)
+    mcp.run(transport=TRANSPORT)
@@ -1,14 +1,42 @@
 """Service layer for coordinating Itzuli translations with Stanza morphological analysis."""
 
+import functools
 import logging
+import os
+import re
+import threading
+from typing import List, Optional
 
 from Itzuli import Itzuli
-from ..core.types import LanguageCode
-from ..core.workflow import process_translation_with_analysis
-from ..core.formatters import format_as_markdown_table
+from ..core.types import LanguageCode, TranslationResult
+from ..core.workflow import (
+    DEFAULT_BATCH_CONCURRENCY,
+    process_analysis,
+    process_batch_translation_with_analysis,
+    process_translation_with_analysis,
+)
+from ..core.formatters import (
+    format_analysis_as_markdown_table,
+    format_as_compact_dict,
+    format_as_markdown_table,
+    format_batch_as_markdown,
+)
+from .feedback_spool import FeedbackSpool
+from .quota_cache import QuotaCache
 
 logger = logging.getLogger("itzuli-stanza-services")
 
+quota_cache = QuotaCache(ttl_seconds=float(os.environ.get("ITZULI_QUOTA_TTL_SECONDS", 60)))
+
+_feedback_spool: Optional[FeedbackSpool] = None
+_feedback_spool_lock = threading.Lock()
+
+
+def split_paragraphs(text: str) -> List[str]:
+    """Split text on blank lines so long inputs can be translated and reported incrementally."""
+    paragraphs = [paragraph.strip() for paragraph in re.split(r"\n\s*\n", text)]
+    return [paragraph for paragraph in paragraphs if paragraph] or [text]
+
 
 def translate_with_analysis(
     api_key: str,
@@ -16,19 +44,89 @@ def translate_with_analysis(
     source_language: LanguageCode,
     target_language: LanguageCode,
     output_language: LanguageCode = "en",
+    include_analysis: bool = True,
 ) -> str:
     """Translate text and provide morphological analysis of Basque text with localized output."""
-    result = process_translation_with_analysis(api_key, text, source_language, target_language, output_language)
-    return format_as_markdown_table(result, output_language)
+    result = process_translation_with_analysis(
+        api_key, text, source_language, target_language, output_language, include_analysis=include_analysis
+    )
+    _record_quota(result)
+    return format_as_markdown_table(result, output_language, include_analysis=include_analysis)
+
+
+def translate_with_analysis_compact(
+    api_key: str,
+    text: str,
+    source_language: LanguageCode,
+    target_language: LanguageCode,
+    output_language: LanguageCode = "en",
+    include_analysis: bool = True,
+    friendly: bool = True,
+) -> dict:
+    """Translate text and return the result as a compact dict for structured tool output."""
+    result = process_translation_with_analysis(
+        api_key, text, source_language, target_language, output_language, include_analysis=include_analysis
+    )
+    _record_quota(result)
+    return format_as_compact_dict(result, output_language, friendly=friendly)
+
+
+def analyze_text(text: str, language: LanguageCode = "eu", output_language: LanguageCode = "en") -> str:
+    """Run morphological analysis only (no Itzuli call) with localized output."""
+    result = process_analysis(text, language)
+    return format_analysis_as_markdown_table(result, output_language)
+
+
+def translate_batch_with_analysis(
+    api_key: str,
+    texts: List[str],
+    source_language: LanguageCode,
+    target_language: LanguageCode,
+    output_language: LanguageCode = "en",
+    max_workers: int = DEFAULT_BATCH_CONCURRENCY,
+) -> str:
+    """Translate and analyze several texts, returning one localized section per text in input order."""
+    items = process_batch_translation_with_analysis(api_key, texts, source_language, target_language, max_workers)
+    for item in items:
+        if item.result is not None:
+            _record_quota(item.result)
+    return format_batch_as_markdown(items, output_language)
 
 
 def get_quota(api_key: str) -> dict:
-    """Check API quota using Itzuli client."""
-    itzuli_client = Itzuli(api_key)
-    return itzuli_client.getQuota()
+    """Check API quota using Itzuli client, served from a short-TTL cache when fresh."""
+
+    def fetch() -> dict:
+        itzuli_client = Itzuli(api_key)
+        return itzuli_client.getQuota()
+
+    return quota_cache.get_or_fetch(fetch)
 
 
 def send_feedback(api_key: str, translation_id: str, correction: str, evaluation: int) -> dict:
     """Send feedback using Itzuli client."""
     itzuli_client = Itzuli(api_key)
     return itzuli_client.sendFeedback(translation_id, correction, evaluation)
+
+
+def queue_feedback(api_key: str, translation_id: str, correction: str, evaluation: int) -> dict:
+    """Queue feedback in the local spool for background delivery instead of waiting on Itzuli."""
+    spool = get_feedback_spool(api_key)
+    spool_id = spool.enqueue(translation_id, correction, evaluation)
+    return {"queued": True, "spool_id": spool_id, "pending": spool.pending()}
+
+
+def get_feedback_spool(api_key: str) -> FeedbackSpool:
+    """Get or create the process-wide feedback spool and start its background flusher."""
+    global _feedback_spool
+    with _feedback_spool_lock:
+        if _feedback_spool is None:
+            _feedback_spool = FeedbackSpool(functools.partial(send_feedback, api_key))
+            _feedback_spool.start()
+    return _feedback_spool
+
+
+def _record_quota(result: TranslationResult) -> None:
+    # Translation responses that carry a quota snapshot refresh the cache for free
+    if result.quota:
+        quota_cache.set(result.quota)
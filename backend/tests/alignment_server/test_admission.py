@@ -0,0 +1,148 @@
+"""Tests for alignment server admission control."""
+
+from unittest.mock import patch
+
+import anyio
+import pytest
+
+from itzuli_nlp.alignment_server import admission
+from itzuli_nlp.alignment_server.admission import Overloaded, StageGate, admit, get_gate
+
+
+def make_gate(capacity=2, max_queue=2, target_wait=100.0, duration=1.0):
+    return StageGate("alignment", capacity=capacity, max_queue=max_queue, target_wait=target_wait,
+                     duration=lambda: duration)
+
+
+class TestStageGate:
+    def test_no_wait_while_below_capacity(self):
+        gate = make_gate(capacity=2, duration=10.0)
+        gate.acquire()
+
+        assert gate.expected_wait() == 0
+
+    def test_expected_wait_grows_with_backlog(self):
+        gate = make_gate(capacity=2, max_queue=10, duration=10.0)
+        gate.acquire(3)
+
+        # Two running, one queued: a new unit waits for two units' worth of work spread over two workers
+        assert gate.expected_wait() == 10.0
+
+    def test_rejects_when_queue_is_full(self):
+        gate = make_gate(capacity=2, max_queue=1)
+        gate.acquire(3)
+
+        with pytest.raises(Overloaded, match="queue full") as exc_info:
+            gate.acquire()
+        assert gate.in_flight == 3
+        # One unit has to finish, and two finish every second
+        assert exc_info.value.retry_after == 0.5
+        assert exc_info.value.queue_full
+
+    def test_rejects_when_expected_wait_exceeds_target(self):
+        gate = make_gate(capacity=1, max_queue=10, target_wait=5.0, duration=3.0)
+        gate.acquire(2)
+
+        with pytest.raises(Overloaded, match="expected wait") as exc_info:
+            gate.acquire()
+        # The wait is 6s; one second of draining brings it down to the 5s target
+        assert exc_info.value.retry_after == 1.0
+        assert exc_info.value.retry_after_header == "1"
+        assert not exc_info.value.queue_full
+
+    def test_retry_after_for_work_larger_than_the_queue_waits_for_idle(self):
+        gate = make_gate(capacity=2, max_queue=2, duration=10.0)
+        gate.acquire(1)
+
+        with pytest.raises(Overloaded, match="queue full") as exc_info:
+            gate.acquire(50)
+        assert exc_info.value.retry_after == 5.0
+
+    def test_try_acquire(self):
+        gate = make_gate(capacity=1, max_queue=0)
+
+        assert gate.try_acquire()
+        assert not gate.try_acquire()
+        assert gate.in_flight == 1
+
+    def test_idle_gate_admits_work_larger_than_the_queue(self):
+        gate = make_gate(capacity=2, max_queue=2)
+
+        gate.acquire(50)
+
+        assert gate.in_flight == 50
+
+    def test_release_frees_capacity(self):
+        gate = make_gate(capacity=1, max_queue=0)
+        gate.acquire()
+        gate.release()
+
+        gate.acquire()
+
+        assert gate.in_flight == 1
+
+
+class TestAdmit:
+    @pytest.fixture
+    def gates(self):
+        gates = {"analysis": make_gate(capacity=1, max_queue=0), "alignment": make_gate(capacity=1, max_queue=0)}
+        with patch.dict(admission._gates, gates):
+            yield gates
+
+    def test_ticket_releases_stages_independently(self, gates):
+        with admit({"analysis": 1, "alignment": 1}) as ticket:
+            ticket.release("analysis")
+            assert gates["analysis"].in_flight == 0
+            assert gates["alignment"].in_flight == 1
+
+        assert gates["alignment"].in_flight == 0
+
+    def test_partial_release(self, gates):
+        with admit({"alignment": 3}) as ticket:
+            ticket.release("alignment", 1)
+            assert gates["alignment"].in_flight == 2
+            ticket.release("alignment", 5)
+            assert gates["alignment"].in_flight == 0
+
+        assert gates["alignment"].in_flight == 0
+
+    @pytest.mark.anyio
+    async def test_extend_waits_for_room_within_window(self, gates):
+        gate = make_gate(capacity=2, max_queue=0)
+        with patch.dict(admission._gates, {"alignment": gate}):
+            with admit({"alignment": 1}) as ticket:
+                async with anyio.create_task_group() as tg:
+                    tg.start_soon(ticket.extend, "alignment", 1, 1)
+                    await anyio.sleep(0.1)
+                    # The window is full, so the second unit waits although the gate has room
+                    assert gate.in_flight == 1
+                    ticket.release("alignment", 1)
+
+                assert gate.in_flight == 1
+            assert gate.in_flight == 0
+
+    @pytest.mark.anyio
+    async def test_extend_waits_for_gate(self, gates):
+        other = admit({"alignment": 1})
+        with admit({"analysis": 1}) as ticket:
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(ticket.extend, "alignment")
+                await anyio.sleep(0.1)
+                assert gates["alignment"].in_flight == 1
+                other.close()
+
+            assert gates["alignment"].in_flight == 1
+        assert gates["alignment"].in_flight == 0
+
+    def test_rejection_rolls_back_earlier_stages(self, gates):
+        gates["alignment"].acquire()
+
+        with pytest.raises(Overloaded):
+            admit({"analysis": 1, "alignment": 1})
+
+        assert gates["analysis"].in_flight == 0
+        assert gates["alignment"].in_flight == 1
+
+    def test_unknown_stage_raises(self):
+        with pytest.raises(ValueError, match="Unknown pipeline stage: bogus"):
+            get_gate("bogus")
@@ -2,7 +2,12 @@
 
 import json
 import tempfile
+import threading
+import time
 from pathlib import Path
+from unittest.mock import patch
+
+import anyio
 import pytest
 
 from itzuli_nlp.alignment_server.cache import AlignmentCache
@@ -79,7 +84,7 @@ class TestAlignmentCache:
             cache.set("test", "en", "eu", test_data)
             
             cache_dir = Path(temp_dir)
-            json_files = list(cache_dir.glob("*.json"))
+            json_files = list(cache_dir.glob("*/*.json"))
             
             assert len(json_files) == 1
             assert json_files[0].suffix == ".json"
@@ -100,12 +105,13 @@ class TestAlignmentCache:
             cache.set("test2", "en", "es", test_data)
             
             cache_dir = Path(temp_dir)
-            assert len(list(cache_dir.glob("*.json"))) == 2
+            assert len(list(cache_dir.glob("*/*.json"))) == 2
             
             # Clear cache
             cache.clear()
             
-            assert len(list(cache_dir.glob("*.json"))) == 0
+            assert len(list(cache_dir.glob("*/*.json"))) == 0
+            assert [path.name for path in cache_dir.iterdir()] == ["stages"]
     
     def test_cache_directory_creation(self):
         """Test that cache directory is created if it doesn't exist."""
@@ -125,8 +131,396 @@ class TestAlignmentCache:
             # Create corrupted cache file
             cache_key = cache._get_cache_key("test", "en", "eu")
             cache_path = cache._get_cache_path(cache_key)
+            cache_path.parent.mkdir()
             cache_path.write_text("invalid json content")
             
             # Should return None for corrupted file
             result = cache.get("test", "en", "eu")
-            assert result is None
\ No newline at end of file
+            assert result is None
+    
+    def test_equivalent_spellings_share_an_entry(self):
+        """Test that whitespace and Unicode composition variants hit the same entry."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = AlignmentCache(cache_dir=temp_dir)
+            cache.set("Kaixo mundua", "eu", "en", AlignmentData(sentences=[]))
+            
+            assert cache.get("  Kaixo   mundua ", "eu", "en") is not None
+            assert cache.get("Kaixo\u00a0mundua\n", "eu", "en") is not None
+            assert cache._get_cache_key("N\u0303andu\u0301", "es", "eu") == cache._get_cache_key("Ñandú", "es", "eu")
+            assert cache.get("Kaixo mundu", "eu", "en") is None
+    
+    def test_hits_are_served_from_memory(self):
+        """Test that a hot entry is served without reading its file again."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = AlignmentCache(cache_dir=temp_dir)
+            cache.set("Kaixo", "eu", "en", AlignmentData(sentences=[]))
+            key = cache._get_cache_key("Kaixo", "eu", "en")
+            first = cache.get("Kaixo", "eu", "en")
+            
+            cache._get_cache_path(key).write_text("not json", encoding="utf-8")
+            
+            assert cache.get("Kaixo", "eu", "en") is first
+    
+    def test_disk_reads_populate_memory(self):
+        """Test that an entry written by another process is promoted into memory on first read."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            AlignmentCache(cache_dir=temp_dir, memory_entries=0).set("Kaixo", "eu", "en", AlignmentData(sentences=[]))
+            cache = AlignmentCache(cache_dir=temp_dir)
+            
+            assert len(cache.memory) == 0
+            assert cache.get("Kaixo", "eu", "en") is not None
+            assert len(cache.memory) == 1
+    
+    def test_memory_tier_can_be_disabled(self):
+        """Test that a zero-sized memory tier falls back to reading files."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = AlignmentCache(cache_dir=temp_dir, memory_entries=0)
+            cache.set("Kaixo", "eu", "en", AlignmentData(sentences=[]))
+            cache._get_cache_path(cache._get_cache_key("Kaixo", "eu", "en")).unlink()
+            
+            assert cache.get("Kaixo", "eu", "en") is None
+    
+    def test_listing_does_not_promote_into_memory(self):
+        """Test that bulk listing reads leave the memory tier alone."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            AlignmentCache(cache_dir=temp_dir, memory_entries=0).set("Kaixo", "eu", "en", AlignmentData(sentences=[]))
+            cache = AlignmentCache(cache_dir=temp_dir)
+            
+            results = cache.get_many_by_key([cache._get_cache_key("Kaixo", "eu", "en")])
+            
+            assert results[0] is not None
+            assert len(cache.memory) == 0
+    
+    @pytest.mark.parametrize("cache_format", ["json", "json.gz"])
+    def test_memory_tier_is_charged_for_uncompressed_json(self, cache_format):
+        """Test that compressed entries count at their JSON size in memory, on write and on read."""
+        tokens = [Token(id=f"s{i}", form="Kaixo", lemma="kaixo", pos="intj", features=[]) for i in range(20)]
+        data = AlignmentData(sentences=[SentencePair(
+            id="s1",
+            source=TokenizedSentence(lang="eu", text="Kaixo", tokens=tokens),
+            target=TokenizedSentence(lang="en", text="Hello", tokens=[]),
+            layers=AlignmentLayers(),
+        )])
+        json_size = len(data.model_dump_json().encode("utf-8"))
+        with tempfile.TemporaryDirectory() as temp_dir:
+            written = AlignmentCache(cache_dir=temp_dir, cache_format=cache_format)
+            written.set("Kaixo", "eu", "en", data)
+            assert written.memory.size_bytes == json_size
+            
+            read = AlignmentCache(cache_dir=temp_dir, cache_format=cache_format)
+            read.get("Kaixo", "eu", "en")
+            assert read.memory.size_bytes == json_size
+    
+    def test_listing_does_not_count_as_access(self):
+        """Test that bulk listing reads leave eviction's access stats alone."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = AlignmentCache(cache_dir=temp_dir)
+            cache.set("Kaixo", "eu", "en", AlignmentData(sentences=[]))
+            
+            cache.get_many_by_key([cache._get_cache_key("Kaixo", "eu", "en")])
+            
+            assert "hits" not in cache.index.snapshot()[0]
+    
+    def test_clear_empties_memory(self):
+        """Test that clearing drops entries from memory as well as disk."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = AlignmentCache(cache_dir=temp_dir)
+            cache.set("Kaixo", "eu", "en", AlignmentData(sentences=[]))
+            
+            cache.clear()
+            
+            assert cache.get("Kaixo", "eu", "en") is None
+    
+    def test_set_records_index_entry(self):
+        """Test that cache writes are listed through the index."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = AlignmentCache(cache_dir=temp_dir)
+            cache.set("test1", "en", "eu", AlignmentData(sentences=[]))
+            cache.set("test2", "eu", "es", AlignmentData(sentences=[]))
+            
+            entries, cursor = cache.list_entries()
+            
+            assert [entry["text"] for entry in entries] == ["test1", "test2"]
+            assert entries[0]["key"] == cache._get_cache_key("test1", "en", "eu")
+            assert cursor is None
+            
+            cache.clear()
+            assert cache.list_entries() == ([], None)
+    
+    def test_rebuilds_index_for_existing_files(self):
+        """Test that cache files written before the index existed are indexed on start-up."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            pair = SentencePair(
+                id="legacy",
+                source=TokenizedSentence(lang="eu", text="Kaixo", tokens=[]),
+                target=TokenizedSentence(lang="en", text="Hello", tokens=[]),
+                layers=AlignmentLayers(),
+            )
+            cache = AlignmentCache(cache_dir=temp_dir)
+            cache.set("Kaixo", "eu", "en", AlignmentData(sentences=[pair]))
+            (Path(temp_dir) / "index.jsonl").unlink()
+            
+            rebuilt = AlignmentCache(cache_dir=temp_dir)
+            entries, _ = rebuilt.list_entries()
+            
+            assert len(entries) == 1
+            assert entries[0]["key"] == cache._get_cache_key("Kaixo", "eu", "en")
+            assert entries[0]["source_lang"] == "eu"
+
+    
+    def test_entries_are_sharded_by_key_prefix(self):
+        """Test that entry files live in a subdirectory named after their key prefix."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = AlignmentCache(cache_dir=temp_dir)
+            cache.set("Kaixo", "eu", "en", AlignmentData(sentences=[]))
+            key = cache._get_cache_key("Kaixo", "eu", "en")
+            
+            assert (Path(temp_dir) / key[:2] / f"{key}.json").exists()
+            assert not list(Path(temp_dir).glob("*/*.tmp"))
+    
+    def test_legacy_flat_files_are_migrated_on_read(self):
+        """Test that entries from the unsharded layout are still hits and move into their shard."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = AlignmentCache(cache_dir=temp_dir, memory_entries=0)
+            key = cache._get_cache_key("Kaixo", "eu", "en")
+            legacy_path = Path(temp_dir) / f"{key}.json"
+            legacy_path.write_text(AlignmentData(sentences=[]).model_dump_json(), encoding="utf-8")
+            
+            assert cache.get("Kaixo", "eu", "en") is not None
+            assert not legacy_path.exists()
+            assert cache._get_cache_path(key).exists()
+    
+    def test_expired_entries_are_misses_and_evicted(self):
+        """Test that entries past their TTL are not served and are removed by eviction."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = AlignmentCache(cache_dir=temp_dir, ttl_seconds=60)
+            cache.set("Kaixo", "eu", "en", AlignmentData(sentences=[]))
+            
+            with patch("time.time", return_value=time.time() + 120):
+                assert cache.get("Kaixo", "eu", "en") is None
+                assert cache.evict() == 1
+            
+            assert cache.list_entries() == ([], None)
+            assert not list(Path(temp_dir).glob("*/*.json"))
+    
+    def test_size_budget_evicts_least_recently_used(self):
+        """Test that the LRU policy keeps the most recently read entries within the budget."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = AlignmentCache(cache_dir=temp_dir, memory_entries=0)
+            for text in ("a", "b", "c"):
+                cache.set(text, "eu", "en", AlignmentData(sentences=[]))
+            now = time.time()
+            for offset, text in ((10, "c"), (20, "a")):
+                with patch("time.time", return_value=now + offset):
+                    cache.get(text, "eu", "en")
+            size = cache.index.snapshot()[0]["size"]
+            
+            cache.max_bytes = size * 2
+            
+            assert cache.evict() == 1
+            assert [entry["text"] for entry in cache.list_entries()[0]] == ["a", "c"]
+            assert cache.get("b", "eu", "en") is None
+    
+    def test_size_budget_evicts_least_frequently_used(self):
+        """Test that the LFU policy keeps the most often read entries within the budget."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = AlignmentCache(cache_dir=temp_dir, memory_entries=0, eviction_policy="lfu")
+            for text in ("a", "b", "c"):
+                cache.set(text, "eu", "en", AlignmentData(sentences=[]))
+            for text, hits in (("a", 3), ("b", 1), ("c", 2)):
+                cache.index.touch(cache._get_cache_key(text, "eu", "en"), hits=hits)
+            size = cache.index.snapshot()[0]["size"]
+            
+            cache.max_bytes = size * 2
+            
+            assert cache.evict() == 1
+            assert cache.get("b", "eu", "en") is None
+            assert cache.get("a", "eu", "en") is not None
+    
+    def test_reads_are_recorded_in_batches(self):
+        """Test that repeated reads within the access resolution are written back together."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = AlignmentCache(cache_dir=temp_dir)
+            cache.set("Kaixo", "eu", "en", AlignmentData(sentences=[]))
+            now = time.time()
+            
+            with patch("time.time", return_value=now):
+                cache.get("Kaixo", "eu", "en")
+                cache.get("Kaixo", "eu", "en")
+            assert cache.index.snapshot()[0]["hits"] == 1
+            
+            with patch("time.time", return_value=now + 120):
+                cache.get("Kaixo", "eu", "en")
+            assert cache.index.snapshot()[0]["hits"] == 3
+    
+    def test_unknown_eviction_policy_raises(self):
+        """Test that a misspelt eviction policy is rejected."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with pytest.raises(ValueError, match="Unknown eviction policy"):
+                AlignmentCache(cache_dir=temp_dir, eviction_policy="fifo")
+    
+    def test_entries_are_compact_json_by_default(self):
+        """Test that entries are stored without indentation."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = AlignmentCache(cache_dir=temp_dir)
+            cache.set("Kaixo", "eu", "en", AlignmentData(sentences=[]))
+            
+            content = cache._get_cache_path(cache._get_cache_key("Kaixo", "eu", "en")).read_bytes()
+            
+            assert content == b'{"sentences":[]}'
+    
+    def test_entries_in_other_formats_stay_readable(self):
+        """Test that changing the format keeps entries written in the previous one readable."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            AlignmentCache(cache_dir=temp_dir, cache_format="json.gz").set(
+                "Kaixo", "eu", "en", AlignmentData(sentences=[])
+            )
+            cache = AlignmentCache(cache_dir=temp_dir, memory_entries=0)
+            key = cache._get_cache_key("Kaixo", "eu", "en")
+            
+            assert cache._get_cache_path(key, "json.gz").exists()
+            assert cache.get("Kaixo", "eu", "en") is not None
+            
+            cache.set("Kaixo", "eu", "en", AlignmentData(sentences=[]))
+            
+            assert cache._get_cache_path(key, "json").exists()
+            assert not cache._get_cache_path(key, "json.gz").exists()
+    
+    def test_rebuilds_index_for_compressed_files(self):
+        """Test that the index rebuild recognizes entries in every format."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            pair = SentencePair(
+                id="gz",
+                source=TokenizedSentence(lang="eu", text="Kaixo", tokens=[]),
+                target=TokenizedSentence(lang="en", text="Hello", tokens=[]),
+                layers=AlignmentLayers(),
+            )
+            cache = AlignmentCache(cache_dir=temp_dir, cache_format="json.gz")
+            cache.set("Kaixo", "eu", "en", AlignmentData(sentences=[pair]))
+            (Path(temp_dir) / "index.jsonl").unlink()
+            
+            entries, _ = AlignmentCache(cache_dir=temp_dir).list_entries()
+            
+            assert [(entry["text"], entry["format"]) for entry in entries] == [("Kaixo", "json.gz")]
+    
+    def test_keys_depend_on_pipeline_version(self):
+        """Test that a pipeline change turns hits into misses while the old entry stays reachable as stale."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            AlignmentCache(cache_dir=temp_dir, version="old").set("Kaixo", "eu", "en", AlignmentData(sentences=[]))
+            cache = AlignmentCache(cache_dir=temp_dir, memory_entries=0, version="new")
+            
+            assert cache.get("Kaixo", "eu", "en") is None
+            assert cache.get_stale("Kaixo", "eu", "en") == (AlignmentData(sentences=[]), "old")
+            assert cache.get_stale("Agur", "eu", "en") is None
+    
+    def test_current_entry_replaces_stale_one(self):
+        """Test that writing an input for the current version removes the entry of the earlier version."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            old = AlignmentCache(cache_dir=temp_dir, version="old")
+            old.set("Kaixo", "eu", "en", AlignmentData(sentences=[]))
+            cache = AlignmentCache(cache_dir=temp_dir, version="new")
+            
+            cache.set("Kaixo", "eu", "en", AlignmentData(sentences=[]))
+            
+            assert cache.get_stale("Kaixo", "eu", "en") is None
+            assert not old._get_cache_path(old._get_cache_key("Kaixo", "eu", "en")).exists()
+            assert [entry["version"] for entry in cache.list_entries()[0]] == ["new"]
+    
+    def test_unversioned_entries_are_stale(self):
+        """Test that entries keyed before versioning are served as stale with an empty version."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = AlignmentCache(cache_dir=temp_dir, memory_entries=0)
+            base_key = cache._get_base_key("Kaixo", "eu", "en")
+            legacy_path = Path(temp_dir) / f"{base_key}.json"
+            legacy_path.write_text(AlignmentData(sentences=[]).model_dump_json(), encoding="utf-8")
+            cache.index.add(base_key, text="Kaixo", source_lang="eu", target_lang="en")
+            
+            assert cache.get("Kaixo", "eu", "en") is None
+            assert cache.get_stale("Kaixo", "eu", "en") == (AlignmentData(sentences=[]), "")
+    
+    def test_responses_are_served_without_parsing(self):
+        """Test that raw hits carry the caller's id and never decode the stored entry."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            pair = SentencePair(
+                id="first",
+                source=TokenizedSentence(lang="eu", text="Kaixo", tokens=[]),
+                target=TokenizedSentence(lang="en", text="Hello", tokens=[]),
+                layers=AlignmentLayers(),
+            )
+            AlignmentCache(cache_dir=temp_dir).set("Kaixo", "eu", "en", AlignmentData(sentences=[pair]))
+            cache = AlignmentCache(cache_dir=temp_dir)
+            
+            with patch("itzuli_nlp.alignment_server.cache.decode", side_effect=AssertionError("parsed")):
+                from_disk = cache.get_response("Kaixo", "eu", "en", "mine-1")
+                from_memory = cache.get_response("Kaixo", "eu", "en", "mine-2")
+            
+            assert from_disk == pair.model_copy(update={"id": "mine-1"}).model_dump_json().encode()
+            assert json.loads(from_memory)["id"] == "mine-2"
+            assert cache.get_response("Agur", "eu", "en", "mine-3") is None
+            # Entries first served raw are parsed when a lookup needs the data
+            assert cache.get("Kaixo", "eu", "en") == AlignmentData(sentences=[pair])
+    
+    def test_responses_for_entries_set_in_this_process(self):
+        """Test that entries remembered as parsed data are also served as raw JSON."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = AlignmentCache(cache_dir=temp_dir)
+            pair = SentencePair(
+                id="first",
+                source=TokenizedSentence(lang="eu", text="Kaixo", tokens=[]),
+                target=TokenizedSentence(lang="en", text="Hello", tokens=[]),
+                layers=AlignmentLayers(),
+            )
+            cache.set("Kaixo", "eu", "en", AlignmentData(sentences=[pair]))
+            
+            body = cache.get_response("Kaixo", "eu", "en", "mine")
+            
+            assert SentencePair.model_validate_json(body) == pair.model_copy(update={"id": "mine"})
+
+
+class TestAsyncInterface:
+    """Async cache methods for the server's event loop."""
+    
+    @pytest.mark.anyio
+    async def test_async_set_and_get(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = AlignmentCache(cache_dir=temp_dir, memory_entries=0)
+            data = AlignmentData(sentences=[])
+            
+            await cache.aset("Kaixo", "eu", "en", data)
+            
+            assert await cache.aget("Kaixo", "eu", "en") == data
+            assert await cache.aget_many(["Kaixo", "Agur"], "eu", "en") == [data, None]
+            entries, _ = await cache.alist_entries()
+            assert [entry["text"] for entry in entries] == ["Kaixo"]
+    
+    @pytest.mark.anyio
+    async def test_writes_in_flight_are_visible_to_lookups(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = AlignmentCache(cache_dir=temp_dir, memory_entries=0)
+            pair = SentencePair(
+                id="first",
+                source=TokenizedSentence(lang="eu", text="Kaixo", tokens=[]),
+                target=TokenizedSentence(lang="en", text="Hello", tokens=[]),
+                layers=AlignmentLayers(),
+            )
+            data = AlignmentData(sentences=[pair])
+            writing, release = threading.Event(), threading.Event()
+            original_set = cache.set
+            
+            def slow_set(*args):
+                writing.set()
+                release.wait(5)
+                original_set(*args)
+            
+            with patch.object(cache, "set", slow_set):
+                async with anyio.create_task_group() as tg:
+                    tg.start_soon(cache.aset, "Kaixo", "eu", "en", data)
+                    await anyio.to_thread.run_sync(writing.wait, 5)
+                    
+                    assert cache.index.get(cache._get_cache_key("Kaixo", "eu", "en")) is None
+                    assert await cache.aget("Kaixo", "eu", "en") == data
+                    assert json.loads(await cache.aget_response("Kaixo", "eu", "en", "mine"))["id"] == "mine"
+                    release.set()
+            
+            assert cache._pending == {}
+            assert cache.get("Kaixo", "eu", "en") == data
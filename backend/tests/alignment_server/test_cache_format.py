@@ -0,0 +1,104 @@
+"""Tests for alignment cache entry encodings."""
+
+import gzip
+import json
+from unittest.mock import patch
+
+import pytest
+
+from itzuli_nlp.alignment_server.cache_format import (
+    check_format,
+    decode,
+    encode,
+    entry_json,
+    format_of,
+    pair_json,
+    with_sentence_id,
+)
+from itzuli_nlp.alignment_server.types import (
+    AlignmentData,
+    AlignmentLayers,
+    SentencePair,
+    Token,
+    TokenizedSentence,
+)
+
+DATA = AlignmentData(
+    sentences=[
+        SentencePair(
+            id="s1",
+            source=TokenizedSentence(
+                lang="eu", text="Kaixo", tokens=[Token(id="s0", form="Kaixo", lemma="kaixo", pos="intj", features=[])]
+            ),
+            target=TokenizedSentence(
+                lang="en", text="Hello", tokens=[Token(id="t0", form="Hello", lemma="hello", pos="intj", features=[])]
+            ),
+            layers=AlignmentLayers(),
+        )
+    ]
+)
+
+
+class TestCacheFormat:
+    @pytest.mark.parametrize("cache_format", ["json", "json.gz"])
+    def test_round_trip(self, cache_format):
+        assert decode(encode(DATA, cache_format), cache_format) == DATA
+
+    def test_round_trip_zstd(self):
+        pytest.importorskip("zstandard")
+        assert decode(encode(DATA, "json.zst"), "json.zst") == DATA
+
+    def test_round_trip_msgpack(self):
+        pytest.importorskip("msgpack")
+        assert decode(encode(DATA, "msgpack"), "msgpack") == DATA
+
+    def test_json_is_compact(self):
+        content = encode(DATA, "json")
+
+        assert b"\n" not in content
+        assert b'": ' not in content
+
+    def test_gzip_is_deterministic_compressed_json(self):
+        content = encode(DATA, "json.gz")
+
+        assert content == encode(DATA, "json.gz")
+        assert gzip.decompress(content) == encode(DATA, "json")
+
+    def test_format_of_file_names(self):
+        assert format_of("ab12.json") == "json"
+        assert format_of("ab12.json.gz") == "json.gz"
+        assert format_of("ab12.msgpack") == "msgpack"
+        assert format_of("index.jsonl") is None
+        assert format_of(".ab12.json.gz.123.456.tmp") is None
+
+    def test_check_format_rejects_unknown_format(self):
+        with pytest.raises(ValueError, match="Unknown cache format: bson"):
+            check_format("bson")
+
+    def test_check_format_requires_optional_package(self):
+        with patch("importlib.util.find_spec", return_value=None):
+            with pytest.raises(ValueError, match="requires the msgpack package"):
+                check_format("msgpack")
+
+
+
+class TestResponseBytes:
+    @pytest.mark.parametrize("cache_format", ["json", "json.gz"])
+    def test_pair_is_sliced_from_stored_entry(self, cache_format):
+        content = entry_json(encode(DATA, cache_format), cache_format)
+
+        assert pair_json(content) == DATA.sentences[0].model_dump_json().encode()
+
+    def test_indented_entries_are_reserialized(self):
+        assert pair_json(DATA.model_dump_json(indent=2).encode()) == DATA.sentences[0].model_dump_json().encode()
+
+    def test_entry_without_sentences_has_no_pair(self):
+        assert pair_json(b'{"sentences":[]}') is None
+
+    @pytest.mark.parametrize("sentence_id", ["mine-7", 'say "kaixo"', "esaldia-ñ"])
+    def test_with_sentence_id(self, sentence_id):
+        pair = DATA.sentences[0].model_copy(update={"id": 'old "id"'}).model_dump_json().encode()
+
+        spliced = with_sentence_id(pair, sentence_id)
+
+        assert json.loads(spliced) == DATA.sentences[0].model_copy(update={"id": sentence_id}).model_dump(mode="json")
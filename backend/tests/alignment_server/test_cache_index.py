@@ -0,0 +1,185 @@
+"""Tests for the append-only alignment cache index."""
+
+import tempfile
+from pathlib import Path
+
+from itzuli_nlp.alignment_server.cache_index import CacheIndex
+
+
+class TestCacheIndex:
+    def test_pages_in_insertion_order(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            index = CacheIndex(Path(temp_dir) / "index.jsonl")
+            for key in ["a", "b", "c"]:
+                index.add(key, source_lang="eu", target_lang="en")
+
+            first, cursor = index.page(limit=2)
+            second, end = index.page(after=cursor, limit=2)
+
+            assert [entry["key"] for entry in first] == ["a", "b"]
+            assert [entry["key"] for entry in second] == ["c"]
+            assert end is None
+
+    def test_no_cursor_when_page_is_exactly_full(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            index = CacheIndex(Path(temp_dir) / "index.jsonl")
+            index.add("a")
+            index.add("b")
+
+            page, cursor = index.page(limit=2)
+
+            assert len(page) == 2
+            assert cursor is None
+
+    def test_replaced_entry_moves_to_end(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            index = CacheIndex(Path(temp_dir) / "index.jsonl")
+            index.add("a")
+            index.add("b")
+            index.add("a")
+
+            page, _ = index.page()
+
+            assert [entry["key"] for entry in page] == ["b", "a"]
+            assert len(index) == 2
+
+    def test_tombstone_removes_entry(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            index = CacheIndex(Path(temp_dir) / "index.jsonl")
+            index.add("a")
+            index.add("b")
+
+            index.remove("a")
+
+            assert index.get("a") is None
+            assert [entry["key"] for entry in index.page()[0]] == ["b"]
+
+    def test_filters_by_language(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            index = CacheIndex(Path(temp_dir) / "index.jsonl")
+            index.add("a", source_lang="eu", target_lang="en")
+            index.add("b", source_lang="es", target_lang="eu")
+            index.add("c", source_lang="eu", target_lang="fr")
+
+            page, _ = index.page(source_lang="eu")
+
+            assert [entry["key"] for entry in page] == ["a", "c"]
+
+    def test_sees_writes_from_other_instances_incrementally(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "index.jsonl"
+            reader = CacheIndex(path)
+            writer = CacheIndex(path)
+
+            writer.add("a")
+            assert len(reader) == 1
+
+            writer.add("b")
+            assert [entry["key"] for entry in reader.page()[0]] == ["a", "b"]
+
+    def test_ignores_partial_trailing_line(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "index.jsonl"
+            index = CacheIndex(path)
+            index.add("a")
+
+            with open(path, "a") as f:
+                f.write('{"key": "b"')
+            assert len(index) == 1
+
+            with open(path, "a") as f:
+                f.write("}\n")
+            assert len(index) == 2
+
+    def test_reset_clears_entries(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            index = CacheIndex(Path(temp_dir) / "index.jsonl")
+            index.add("a")
+
+            index.reset()
+
+            assert len(index) == 0
+            assert not index.exists()
+
+    def test_touch_updates_access_without_moving_entry(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "index.jsonl"
+            index = CacheIndex(path)
+            index.add("a")
+            index.add("b")
+            index.touch("a", hits=3)
+            index.touch("a")
+            index.touch("gone")
+
+            entries = CacheIndex(path).snapshot()
+
+            assert [entry["key"] for entry in entries] == ["a", "b"]
+            assert entries[0]["hits"] == 4
+            assert entries[0]["accessed_at"] >= entries[0]["created_at"]
+            assert "hits" not in entries[1]
+
+    def test_compaction_keeps_live_entries_and_cursors(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "index.jsonl"
+            index = CacheIndex(path)
+            for key in ["a", "b", "c", "d"]:
+                index.add(key)
+            index.remove("b")
+            index.touch("c", hits=2)
+            first, cursor = index.page(limit=2)
+
+            assert index.compact()
+
+            assert len(path.read_text().splitlines()) == 4
+            rest, _ = index.page(after=cursor)
+            assert [entry["key"] for entry in first] == ["a", "c"]
+            assert [entry["key"] for entry in rest] == ["d"]
+            assert CacheIndex(path).get("c")["hits"] == 2
+
+            index.add("e")
+            assert CacheIndex(path).page(after=cursor)[0][-1]["key"] == "e"
+
+    def test_other_instances_reload_after_compaction(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "index.jsonl"
+            reader = CacheIndex(path)
+            writer = CacheIndex(path)
+            for key in ["a", "b", "c"]:
+                writer.add(key)
+            writer.remove("a")
+            assert len(reader) == 2
+
+            writer.compact()
+            writer.add("d")
+            writer.remove("b")
+
+            assert [entry["key"] for entry in reader.snapshot()] == ["c", "d"]
+
+    def test_compacts_once_superseded_lines_outnumber_live_entries(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "index.jsonl"
+            index = CacheIndex(path, compact_min_dead_lines=4)
+            for key in ["a", "b", "c"]:
+                index.add(key)
+            for _ in range(3):
+                index.touch("a")
+            assert len(path.read_text().splitlines()) == 6
+
+            index.touch("a")
+
+            # Header plus the three live entries
+            assert len(path.read_text().splitlines()) == 4
+            assert index.get("a")["hits"] == 4
+
+    def test_finds_entries_by_base_key(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            index = CacheIndex(Path(temp_dir) / "index.jsonl")
+            index.add("legacy")
+            index.add("v1", base_key="base", version="1")
+
+            assert index.find_base("legacy")["key"] == "legacy"
+            assert index.find_base("base")["version"] == "1"
+
+            index.remove("v1")
+
+            assert index.find_base("base") is None
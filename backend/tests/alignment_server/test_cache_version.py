@@ -0,0 +1,37 @@
+"""Tests for the pipeline version folded into alignment cache keys."""
+
+from unittest.mock import patch
+
+from itzuli_nlp.alignment_server import cache_version
+from itzuli_nlp.alignment_server.cache_version import cache_version as current_version, same_analysis
+
+
+class TestCacheVersion:
+    def test_version_is_stable(self):
+        assert current_version() == current_version() == cache_version.CACHE_VERSION
+
+    def test_prompt_change_changes_only_the_alignment_fingerprint(self):
+        analysis = cache_version.analysis_fingerprint()
+        before = current_version()
+
+        with patch.object(cache_version.ClaudeClient, "_build_full_prompt", return_value="New instructions"):
+            after = current_version()
+
+        assert after != before
+        assert after.startswith(f"{analysis}-")
+        assert same_analysis(before, after)
+
+    def test_model_and_processor_changes(self):
+        before = current_version()
+
+        with patch.object(cache_version, "ALIGNMENT_MODEL", "another-model"):
+            assert same_analysis(current_version(), before) and current_version() != before
+        with patch.object(cache_version, "PIPELINE_PROCESSORS", "tokenize,mwt,pos,lemma"):
+            assert not same_analysis(current_version(), before)
+
+    def test_version_can_be_pinned(self):
+        with patch.dict("os.environ", {"ALIGNMENT_CACHE_VERSION": "pinned"}):
+            assert current_version() == "pinned"
+
+    def test_unversioned_entries_share_nothing(self):
+        assert not same_analysis("", current_version())
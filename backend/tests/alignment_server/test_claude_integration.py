@@ -5,7 +5,7 @@ import os
 from unittest.mock import Mock, patch
 import pytest
 
-from itzuli_nlp.alignment_server.claude_client import ClaudeClient
+from itzuli_nlp.alignment_server.claude_client import ClaudeClient, LayerStreamParser
 from itzuli_nlp.alignment_server.types import AlignmentLayers, Alignment
 
 
@@ -155,4 +155,105 @@ class TestClaudeClient:
         assert "grammatical_relations" in prompt
         assert "features" in prompt
         assert "s0" in prompt
-        assert "t0" in prompt
\ No newline at end of file
+        assert "t0" in prompt
+    
+    @patch('itzuli_nlp.alignment_server.claude_client.Anthropic')
+    def test_stream_alignment_layers_yields_each_layer_as_it_completes(self, mock_anthropic):
+        """Test that streamed layers are yielded as soon as their arrays close."""
+        chunks = [
+            '{"lexical": [{"source": ["s0"], ',
+            '"target": ["t0"], "label": "greeting"}],',
+            ' "grammatical_relations": [], "feat',
+            'ures": [{"source": ["s1"], "target": ["t1"], "label": "definiteness"}]}',
+        ]
+        seen_chunks = []
+        
+        def text_stream():
+            for chunk in chunks:
+                seen_chunks.append(chunk)
+                yield chunk
+        
+        mock_stream = Mock()
+        mock_stream.text_stream = text_stream()
+        mock_client = Mock()
+        mock_client.messages.stream.return_value.__enter__ = Mock(return_value=mock_stream)
+        mock_client.messages.stream.return_value.__exit__ = Mock(return_value=False)
+        mock_anthropic.return_value = mock_client
+        
+        client = ClaudeClient(api_key="test-key")
+        layers = client.stream_alignment_layers(
+            source_tokens=[{"id": "s0"}], target_tokens=[{"id": "t0"}],
+            source_lang="en", target_lang="eu", source_text="Hello", target_text="Kaixo"
+        )
+        
+        layer_name, alignments = next(layers)
+        assert layer_name == "lexical"
+        assert alignments[0].label == "greeting"
+        # Only the chunks needed to close the lexical array have been consumed
+        assert len(seen_chunks) == 2
+        
+        rest = list(layers)
+        assert [name for name, _ in rest] == ["grammatical_relations", "features"]
+        assert rest[1][1][0].label == "definiteness"
+    
+    @patch('itzuli_nlp.alignment_server.claude_client.Anthropic')
+    def test_stream_alignment_layers_fills_missing_layers(self, mock_anthropic):
+        """Test that layers absent from the response are yielded empty."""
+        mock_stream = Mock()
+        mock_stream.text_stream = iter(['{"lexical": []}'])
+        mock_client = Mock()
+        mock_client.messages.stream.return_value.__enter__ = Mock(return_value=mock_stream)
+        mock_client.messages.stream.return_value.__exit__ = Mock(return_value=False)
+        mock_anthropic.return_value = mock_client
+        
+        client = ClaudeClient(api_key="test-key")
+        layers = dict(client.stream_alignment_layers(
+            source_tokens=[], target_tokens=[],
+            source_lang="en", target_lang="eu", source_text="", target_text=""
+        ))
+        
+        assert layers == {"lexical": [], "grammatical_relations": [], "features": []}
+
+
+class TestLayerStreamParser:
+    """Test incremental extraction of layer arrays."""
+    
+    RESPONSE = (
+        'Here is the JSON:\n'
+        '{"lexical": [{"source": ["s0"], "target": ["t0"], "label": "tricky ] \\" [ label"}], '
+        '"grammatical_relations": [], '
+        '"features": [{"source": ["s1"], "target": ["t1"], "label": "x"}]}'
+    )
+    
+    @pytest.mark.parametrize("chunk_size", [1, 5, 1000])
+    def test_extracts_layers_regardless_of_chunking(self, chunk_size):
+        """Test that chunk boundaries and brackets inside strings do not matter."""
+        parser = LayerStreamParser()
+        layers = []
+        for i in range(0, len(self.RESPONSE), chunk_size):
+            layers.extend(parser.feed(self.RESPONSE[i:i + chunk_size]))
+        
+        assert [name for name, _ in layers] == ["lexical", "grammatical_relations", "features"]
+        assert layers[0][1][0]["label"] == 'tricky ] " [ label'
+        assert parser.text == self.RESPONSE
+    
+    def test_ignores_unknown_keys_and_trailing_text(self):
+        """Test that only configured top-level keys are extracted."""
+        parser = LayerStreamParser()
+        
+        layers = parser.feed('{"notes": [1, 2], "lexical": []} {"features": []}')
+        
+        assert layers == [("lexical", [])]
+
+
+
+def test_prompt_for_a_subset_of_layers():
+    """Test that asking for some layers keeps the full instructions and names the layers wanted."""
+    client = ClaudeClient(api_key="test-key")
+    args = ([{"id": "s0"}], [{"id": "t0"}], "eu", "en", "Kaixo", "Hello")
+
+    full = client._build_alignment_prompt(*args)
+    subset = client._build_alignment_prompt(*args, ("features",))
+
+    assert subset.startswith(full)
+    assert subset.endswith("Only these layers are needed this time: features. Include only those keys in the JSON object.")
@@ -0,0 +1,86 @@
+"""Tests for the bounded stage executor."""
+
+import threading
+import time
+from unittest.mock import patch
+
+import anyio
+import pytest
+
+from itzuli_nlp.alignment_server import executor
+from itzuli_nlp.alignment_server.executor import get_limiter, iterate_stage, run_stage
+
+
+class TestRunStage:
+    @pytest.mark.anyio
+    async def test_returns_function_result(self):
+        result = await run_stage("cache", lambda a, b=0: a + b, 1, b=2)
+
+        assert result == 3
+
+    @pytest.mark.anyio
+    async def test_runs_off_the_event_loop_thread(self):
+        loop_thread = threading.get_ident()
+
+        worker_thread = await run_stage("analysis", threading.get_ident)
+
+        assert worker_thread != loop_thread
+
+    @pytest.mark.anyio
+    async def test_concurrency_is_bounded_per_stage(self):
+        active = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def tracked():
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.05)
+            with lock:
+                active -= 1
+
+        with patch.dict(executor._limiters, {"alignment": anyio.CapacityLimiter(2)}):
+            async with anyio.create_task_group() as tg:
+                for _ in range(6):
+                    tg.start_soon(run_stage, "alignment", tracked)
+
+        assert peak == 2
+
+    def test_unknown_stage_raises(self):
+        with pytest.raises(ValueError, match="Unknown pipeline stage: bogus"):
+            get_limiter("bogus")
+
+
+class TestIterateStage:
+    @pytest.mark.anyio
+    async def test_yields_items_from_worker_threads(self):
+        loop_thread = threading.get_ident()
+
+        def produce():
+            for i in range(3):
+                yield i, threading.get_ident()
+
+        items = [item async for item in iterate_stage("alignment", produce())]
+
+        assert [i for i, _ in items] == [0, 1, 2]
+        assert all(thread != loop_thread for _, thread in items)
+
+    @pytest.mark.anyio
+    async def test_closes_abandoned_generator(self):
+        closed = threading.Event()
+
+        def produce():
+            try:
+                yield 1
+                yield 2
+            finally:
+                closed.set()
+
+        stream = iterate_stage("alignment", produce())
+        assert await stream.__anext__() == 1
+        await stream.aclose()
+
+        assert closed.is_set()
+
@@ -0,0 +1,128 @@
+"""Tests for the alignment job manager."""
+
+import os
+import tempfile
+import threading
+
+import pytest
+
+from itzuli_nlp.alignment_server.jobs import JobManager, JobQueueFull, JobStatus, JobStore
+from itzuli_nlp.alignment_server.types import AlignmentData
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestJobManager:
+    def test_runs_job_in_background(self):
+        result = AlignmentData(sentences=[])
+        manager = JobManager(lambda job: result)
+
+        job = manager.submit("Kaixo", "eu", "en", "s1")
+
+        assert job.wait(5)
+        assert job.status == JobStatus.SUCCEEDED
+        assert job.result is result
+        assert manager.get(job.id) is job
+        manager.shutdown()
+
+    def test_records_failure(self):
+        def fail(job):
+            raise Exception("Translation failed")
+
+        manager = JobManager(fail)
+
+        job = manager.submit("Kaixo", "eu", "en", "s1")
+
+        assert job.wait(5)
+        assert job.status == JobStatus.FAILED
+        assert job.error == "Translation failed"
+        manager.shutdown()
+
+    def test_deduplicates_unfinished_jobs(self):
+        release = threading.Event()
+        calls = []
+
+        def run(job):
+            calls.append(job.id)
+            release.wait(5)
+            return AlignmentData(sentences=[])
+
+        manager = JobManager(run)
+
+        first = manager.submit("Kaixo", "eu", "en", "s1")
+        second = manager.submit("Kaixo", "eu", "en", "s2")
+        other = manager.submit("Kaixo", "eu", "es", "s3")
+        release.set()
+
+        assert second is first
+        assert other is not first
+        assert first.wait(5) and other.wait(5)
+        assert len(calls) == 2
+        manager.shutdown()
+
+    def test_rejects_when_queue_is_full(self):
+        release = threading.Event()
+        manager = JobManager(lambda job: release.wait(5), max_workers=1, max_pending=1)
+
+        running = manager.submit("a", "eu", "en", "s1")
+        # Let the first job leave the queue
+        while running.status == JobStatus.QUEUED:
+            pass
+        manager.submit("b", "eu", "en", "s2")
+
+        with pytest.raises(JobQueueFull):
+            manager.submit("c", "eu", "en", "s3")
+        release.set()
+        manager.shutdown()
+
+    def test_prunes_finished_jobs_after_ttl(self):
+        clock = FakeClock()
+        manager = JobManager(lambda job: AlignmentData(sentences=[]), ttl_seconds=60, clock=clock)
+
+        job = manager.complete("Kaixo", "eu", "en", "s1", AlignmentData(sentences=[]))
+        assert manager.get(job.id) is job
+
+        clock.now += 61
+        assert manager.get(job.id) is None
+        manager.shutdown()
+
+
+class TestJobStore:
+    @pytest.fixture
+    def store(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            yield JobStore(temp_dir, ttl_seconds=60)
+
+    def test_managers_sharing_a_store_see_each_others_jobs(self, store):
+        result = AlignmentData(sentences=[])
+        submitting = JobManager(lambda job: result, store=store)
+        polling = JobManager(lambda job: result, store=store)
+
+        job = submitting.submit("Kaixo", "eu", "en", "s1")
+        assert job.wait(5)
+        found = polling.get(job.id)
+
+        assert found is not job
+        assert found.status == JobStatus.SUCCEEDED
+        assert found.result == result
+        assert found.sentence_id == "s1"
+        assert found.wait(0)
+        submitting.shutdown()
+        polling.shutdown()
+
+    def test_unknown_expired_and_malformed_ids_are_not_found(self, store):
+        manager = JobManager(lambda job: AlignmentData(sentences=[]), store=store)
+        job = manager.complete("Kaixo", "eu", "en", "s1", AlignmentData(sentences=[]))
+        os.utime(store.root / f"{job.id}.json", (0, 0))
+
+        assert store.load(job.id) is None
+        assert store.load("0" * 32) is None
+        assert store.load("../secrets") is None
+        assert store.sweep() == 1
+        manager.shutdown()
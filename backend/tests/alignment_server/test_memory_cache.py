@@ -0,0 +1,88 @@
+"""Tests for the in-memory LRU cache tier."""
+
+import threading
+
+from itzuli_nlp.alignment_server.memory_cache import MemoryCache
+
+
+class TestMemoryCache:
+    def test_get_and_put(self):
+        cache = MemoryCache(max_entries=10, max_bytes=1000)
+        cache.put("a", "value", 5)
+
+        assert cache.get("a") == "value"
+        assert cache.get("missing") is None
+        assert cache.size_bytes == 5
+
+    def test_evicts_least_recently_used_by_count(self):
+        cache = MemoryCache(max_entries=2, max_bytes=1000)
+        cache.put("a", 1, 1)
+        cache.put("b", 2, 1)
+        cache.get("a")
+        cache.put("c", 3, 1)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    def test_evicts_to_stay_within_byte_budget(self):
+        cache = MemoryCache(max_entries=10, max_bytes=100)
+        cache.put("a", 1, 60)
+        cache.put("b", 2, 30)
+        cache.put("c", 3, 30)
+
+        assert cache.get("a") is None
+        assert len(cache) == 2
+        assert cache.size_bytes == 60
+
+    def test_replacing_a_key_updates_its_size(self):
+        cache = MemoryCache(max_entries=10, max_bytes=100)
+        cache.put("a", 1, 60)
+        cache.put("a", 2, 10)
+
+        assert cache.get("a") == 2
+        assert cache.size_bytes == 10
+
+    def test_oversized_entry_is_not_stored(self):
+        cache = MemoryCache(max_entries=10, max_bytes=100)
+        cache.put("small", 1, 10)
+        cache.put("huge", 2, 500)
+
+        assert cache.get("huge") is None
+        assert cache.get("small") == 1
+
+    def test_zero_bounds_disable_the_tier(self):
+        cache = MemoryCache(max_entries=0, max_bytes=100)
+        cache.put("a", 1, 1)
+
+        assert not cache.enabled
+        assert cache.get("a") is None
+
+    def test_discard_and_clear(self):
+        cache = MemoryCache(max_entries=10, max_bytes=100)
+        cache.put("a", 1, 10)
+        cache.put("b", 2, 10)
+
+        cache.discard("a")
+        assert cache.get("a") is None
+        assert cache.size_bytes == 10
+
+        cache.clear()
+        assert len(cache) == 0
+        assert cache.size_bytes == 0
+
+    def test_concurrent_puts_keep_accounting_consistent(self):
+        cache = MemoryCache(max_entries=50, max_bytes=10_000)
+
+        def writer(offset):
+            for i in range(500):
+                cache.put(f"{offset}-{i % 80}", i, 7)
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(cache) == 50
+        assert cache.size_bytes == 50 * 7
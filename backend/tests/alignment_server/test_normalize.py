@@ -0,0 +1,38 @@
+"""Tests for input text canonicalization."""
+
+import unicodedata
+
+import pytest
+
+from itzuli_nlp.alignment_server.normalize import normalize_text
+
+
+class TestNormalizeText:
+    def test_collapses_and_trims_whitespace(self):
+        assert normalize_text("  Kaixo \t mundua\n ") == "Kaixo mundua"
+
+    def test_no_break_spaces_count_as_whitespace(self):
+        assert normalize_text("Kaixo\u00a0\u202fmundua") == "Kaixo mundua"
+
+    def test_composes_to_nfc(self):
+        decomposed = unicodedata.normalize("NFD", "Ñandú")
+
+        assert normalize_text(decomposed) == unicodedata.normalize("NFC", "Ñandú")
+
+    def test_drops_invisible_characters(self):
+        assert normalize_text("\ufeffKaixo\u200b mundua") == "Kaixo mundua"
+
+    def test_preserves_case_and_punctuation_by_default(self):
+        assert normalize_text("«Kaixo» — Mundua…") == "«Kaixo» — Mundua…"
+
+    def test_folds_punctuation_when_configured(self):
+        assert normalize_text("«Kaixo» — ‘mundua’…", punctuation="fold") == "\"Kaixo\" - 'mundua'..."
+
+    def test_lowercases_when_configured(self):
+        assert normalize_text("KAIXO Mundua", case="lower") == "kaixo mundua"
+
+    @pytest.mark.parametrize("text", ["  Kaixo   mundua ", "«Ñandú» — KAIXO…", "\u00a0a\u200bb"])
+    def test_idempotent(self, text):
+        once = normalize_text(text, case="lower", punctuation="fold")
+
+        assert normalize_text(once, case="lower", punctuation="fold") == once
@@ -0,0 +1,124 @@
+"""Tests for the pre-fork production launcher."""
+
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from itzuli_nlp.alignment_server import serve
+from itzuli_nlp.alignment_server.serve import (
+    bind_socket,
+    parse_languages,
+    preload_pipelines,
+    select_event_loop,
+    select_http_protocol,
+    threads_per_worker,
+)
+
+
+class TestThreadsPerWorker:
+    def test_divides_cpus_between_workers(self):
+        assert threads_per_worker(4, cpu_count=16) == 4
+
+    def test_at_least_one_thread(self):
+        assert threads_per_worker(8, cpu_count=2) == 1
+
+
+class TestImplementationSelection:
+    def test_prefers_uvloop_and_httptools_when_installed(self):
+        with patch("importlib.util.find_spec", return_value=object()):
+            assert select_event_loop() == "uvloop"
+            assert select_http_protocol() == "httptools"
+
+    def test_falls_back_without_optional_packages(self):
+        with patch("importlib.util.find_spec", return_value=None):
+            assert select_event_loop() == "asyncio"
+            assert select_http_protocol() == "h11"
+
+
+class TestPreload:
+    def test_parse_languages(self):
+        assert parse_languages(" eu, en ,,fr") == ["eu", "en", "fr"]
+        assert parse_languages("") == []
+
+    def test_loads_each_language_and_survives_failures(self):
+        with patch.object(serve, "get_cached_stanza_pipeline", side_effect=[object(), RuntimeError("no model")]) as get:
+            preload_pipelines(["eu", "en"])
+
+        assert [call.args[0] for call in get.call_args_list] == ["eu", "en"]
+
+
+class TestBindSocket:
+    def test_binds_inheritable_listening_socket(self):
+        sock = bind_socket("127.0.0.1", 0)
+        try:
+            assert sock.getsockname()[1] > 0
+            assert sock.get_inheritable()
+        finally:
+            sock.close()
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_healthy(url: str, timeout: float = 20.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code == 200:
+                return True
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    return False
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="pre-fork launcher needs os.fork")
+class TestPreforkLifecycle:
+    def test_serves_reloads_and_shuts_down(self, tmp_path):
+        port = _free_port()
+        process = subprocess.Popen(
+            [sys.executable, "-m", "itzuli_nlp.alignment_server.serve"],
+            env={
+                **os.environ,
+                "HOST": "127.0.0.1",
+                "PORT": str(port),
+                "ALIGNMENT_WORKERS": "2",
+                "ALIGNMENT_PRELOAD_LANGUAGES": "",
+                "ALIGNMENT_GRACEFUL_TIMEOUT": "2",
+                # Keeps the workers' cache, job records and metrics snapshots out of the source tree
+                "ALIGNMENT_CACHE_DIR": str(tmp_path),
+                "PYTHONPATH": os.pathsep.join(sys.path),
+            },
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+        )
+        url = f"http://127.0.0.1:{port}/health"
+        try:
+            assert _wait_healthy(url)
+
+            process.send_signal(signal.SIGHUP)
+            time.sleep(1.0)
+            assert _wait_healthy(url)
+
+            process.send_signal(signal.SIGTERM)
+            output, _ = process.communicate(timeout=30)
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.communicate()
+
+        assert process.returncode == 0
+        assert "Starting 2 workers" in output
+        assert "Reloading workers" in output
+        assert "Shutting down workers" in output
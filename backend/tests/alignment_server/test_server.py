@@ -1,16 +1,37 @@
 """Tests for alignment server FastAPI endpoints."""
 
+import functools
+import json
 import os
 import subprocess
 import sys
+import tempfile
+import threading
+import time
 from unittest.mock import patch
 
+import anyio
+import httpx
 import pytest
 from fastapi.testclient import TestClient
 
 from itzuli_nlp.core.types import AnalysisRow
+from itzuli_nlp.alignment_server.admission import get_gate
+from itzuli_nlp.alignment_server import server
+from itzuli_nlp.alignment_server.cache import AlignmentCache
+from itzuli_nlp.alignment_server.cache_version import analysis_fingerprint
+from itzuli_nlp.alignment_server.executor import run_stage
+from itzuli_nlp.alignment_server.jobs import JobManager, JobQueueFull, JobStore
 from itzuli_nlp.alignment_server.server import app
-from itzuli_nlp.alignment_server.types import AlignmentData, SentencePair, TokenizedSentence, Token, AlignmentLayers
+from itzuli_nlp.alignment_server.types import (
+    Alignment,
+    AlignmentData,
+    AlignmentLayers,
+    SentencePair,
+    Token,
+    TokenizedSentence,
+)
+from tools.dual_analysis import DualAnalysisItem
 
 
 @pytest.fixture
@@ -58,6 +79,15 @@ def mock_alignment_data():
     return AlignmentData(sentences=[sentence_pair])
 
 
+# Generated results need at least one non-empty layer to be cached
+LEXICAL_LAYERS = AlignmentLayers(lexical=[Alignment(source=["s0"], target=["t0"], label="kaixo → hello")])
+
+
+def _with_layers(alignment_data):
+    pair = alignment_data.sentences[0]
+    return AlignmentData(sentences=[pair.model_copy(update={"layers": LEXICAL_LAYERS})])
+
+
 class TestHealthCheck:
     def test_health_check_returns_healthy_status(self, client):
         response = client.get("/health")
@@ -422,3 +452,903 @@ class TestResponseSchemas:
         target_row = data["target_analysis"][0]
         assert target_row["word"] == "Hello"
         assert target_row["feats"] == ""
+
+
+class TestEventLoopNotBlocked:
+    @pytest.mark.anyio
+    @patch.dict(os.environ, {"ITZULI_API_KEY": "test-key"})
+    @patch("itzuli_nlp.alignment_server.server.analyze_both_texts")
+    async def test_health_responds_while_analysis_is_running(self, mock_analyze, mock_analysis_data):
+        started = threading.Event()
+        release = threading.Event()
+        source_analysis, target_analysis, translated_text = mock_analysis_data
+
+        def slow_analysis(**kwargs):
+            started.set()
+            release.wait(5)
+            return translated_text, source_analysis, target_analysis
+
+        mock_analyze.side_effect = slow_analysis
+        request_data = {"text": "Kaixo mundua", "source_lang": "eu", "target_lang": "en"}
+
+        transport = httpx.ASGITransport(app=app)
+        start = time.monotonic()
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(functools.partial(async_client.post, "/analyze", json=request_data))
+                await anyio.to_thread.run_sync(started.wait, 5)
+
+                health = await async_client.get("/health")
+                health_elapsed = time.monotonic() - start
+                release.set()
+
+        assert health.status_code == 200
+        # A blocked event loop would hold /health until the analysis is released (5s)
+        assert health_elapsed < 2
+
+
+class TestAnalyzeAndScaffoldBatchEndpoint:
+    @pytest.fixture
+    def batch_cache(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_cache = AlignmentCache(cache_dir=temp_dir)
+            with patch("itzuli_nlp.alignment_server.server.cache", temp_cache):
+                yield temp_cache
+
+    @staticmethod
+    def _dual_item(text):
+        return DualAnalysisItem(
+            text=text,
+            translated_text=f"{text} (en)",
+            source_analysis=[AnalysisRow(text, text.lower(), "NOUN", "")],
+            target_analysis=[AnalysisRow(text, text.lower(), "NOUN", "")],
+        )
+
+    @staticmethod
+    def _enriched(source_text, target_text, sentence_id, **kwargs):
+        return AlignmentData(
+            sentences=[
+                SentencePair(
+                    id=sentence_id,
+                    source=TokenizedSentence(lang="eu", text=source_text, tokens=[]),
+                    target=TokenizedSentence(lang="en", text=target_text, tokens=[]),
+                    layers=LEXICAL_LAYERS,
+                )
+            ]
+        )
+
+    @patch.dict(os.environ, {"ITZULI_API_KEY": "test-key", "CLAUDE_API_KEY": "claude-key"})
+    @patch("itzuli_nlp.alignment_server.server.create_enriched_alignment_data")
+    @patch("itzuli_nlp.alignment_server.server.analyze_many_texts")
+    def test_generates_only_cache_misses(self, mock_analyze_many, mock_enrich, client, batch_cache, mock_alignment_data):
+        batch_cache.set("Kaixo mundua", "eu", "en", mock_alignment_data)
+        mock_analyze_many.side_effect = lambda **kwargs: [self._dual_item(t) for t in kwargs["texts"]]
+        mock_enrich.side_effect = self._enriched
+
+        request_data = {
+            "source_lang": "eu",
+            "target_lang": "en",
+            "items": [
+                {"text": "Kaixo mundua", "sentence_id": "a"},
+                {"text": "Etxea", "sentence_id": "b"},
+                {"text": "Etxea", "sentence_id": "c"},
+            ],
+        }
+
+        response = client.post("/analyze-and-scaffold/batch", json=request_data)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [s["id"] for s in data["sentences"]] == ["a", "b", "c"]
+        assert data["sentences"][0]["target"]["text"] == "Hello world"
+        assert data["sentences"][2]["target"]["text"] == "Etxea (en)"
+        assert data["errors"] == []
+
+        # Only the one distinct miss is translated and aligned
+        assert mock_analyze_many.call_args.kwargs["texts"] == ["Etxea"]
+        mock_enrich.assert_called_once()
+        assert batch_cache.get("Etxea", "eu", "en") is not None
+
+    @patch.dict(os.environ, {"ITZULI_API_KEY": "test-key", "CLAUDE_API_KEY": "claude-key"})
+    @patch("itzuli_nlp.alignment_server.server.create_enriched_alignment_data")
+    @patch("itzuli_nlp.alignment_server.server.analyze_many_texts")
+    def test_all_hits_skip_generation(self, mock_analyze_many, mock_enrich, client, batch_cache, mock_alignment_data):
+        batch_cache.set("Kaixo mundua", "eu", "en", mock_alignment_data)
+
+        request_data = {"source_lang": "eu", "target_lang": "en", "items": [{"text": "Kaixo mundua"}]}
+
+        response = client.post("/analyze-and-scaffold/batch", json=request_data)
+
+        assert response.status_code == 200
+        assert response.json()["sentences"][0]["id"] == "batch-001"
+        mock_analyze_many.assert_not_called()
+        mock_enrich.assert_not_called()
+
+    @patch.dict(os.environ, {"ITZULI_API_KEY": "test-key", "CLAUDE_API_KEY": "claude-key"})
+    @patch("itzuli_nlp.alignment_server.server.create_enriched_alignment_data")
+    @patch("itzuli_nlp.alignment_server.server.analyze_many_texts")
+    def test_reports_failed_items_without_failing_batch(self, mock_analyze_many, mock_enrich, client, batch_cache):
+        mock_analyze_many.return_value = [
+            self._dual_item("Etxea"),
+            DualAnalysisItem(text="Broken", error="Invalid status code: 500"),
+        ]
+        mock_enrich.side_effect = self._enriched
+
+        request_data = {
+            "source_lang": "eu",
+            "target_lang": "en",
+            "items": [{"text": "Etxea"}, {"text": "Broken"}],
+        }
+
+        response = client.post("/analyze-and-scaffold/batch", json=request_data)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [s["id"] for s in data["sentences"]] == ["batch-001"]
+        assert data["errors"] == [
+            {"index": 1, "sentence_id": "batch-002", "text": "Broken", "error": "Invalid status code: 500"}
+        ]
+        assert batch_cache.get("Broken", "eu", "en") is None
+
+    @patch.dict(os.environ, {"ITZULI_API_KEY": "test-key", "CLAUDE_API_KEY": "claude-key"})
+    @patch("itzuli_nlp.alignment_server.server.MAX_BATCH_SIZE", 2)
+    def test_rejects_oversized_batch(self, client):
+        request_data = {"source_lang": "eu", "target_lang": "en", "items": [{"text": "a"}, {"text": "b"}, {"text": "c"}]}
+
+        response = client.post("/analyze-and-scaffold/batch", json=request_data)
+
+        assert response.status_code == 413
+        assert "Maximum is 2" in response.json()["detail"]
+
+    @patch.dict(os.environ, {}, clear=True)
+    def test_missing_api_key(self, client):
+        request_data = {"source_lang": "eu", "target_lang": "en", "items": [{"text": "Kaixo"}]}
+
+        response = client.post("/analyze-and-scaffold/batch", json=request_data)
+
+        assert response.status_code == 500
+        assert "ITZULI_API_KEY not configured" in response.json()["detail"]
+
+
+class TestSentencesEndpoint:
+    @pytest.fixture
+    def populated_cache(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_cache = AlignmentCache(cache_dir=temp_dir)
+            for i in range(5):
+                pair = SentencePair(
+                    id=f"s-{i}",
+                    source=TokenizedSentence(
+                        lang="eu",
+                        text=f"Esaldia {i}",
+                        tokens=[Token(id="s0", form="Esaldia", lemma="esaldi", pos="noun")],
+                    ),
+                    target=TokenizedSentence(lang="en", text=f"Sentence {i}", tokens=[]),
+                    layers=AlignmentLayers(lexical=[{"source": ["s0"], "target": [], "label": "esaldi → sentence"}]),
+                )
+                temp_cache.set(f"Esaldia {i}", "eu", "en", AlignmentData(sentences=[pair]))
+            with patch("itzuli_nlp.alignment_server.server.cache", temp_cache):
+                yield temp_cache
+
+    def test_paginates_with_cursor(self, client, populated_cache):
+        first = client.get("/sentences", params={"limit": 2}).json()
+        second = client.get("/sentences", params={"limit": 2, "cursor": first["next_cursor"]}).json()
+        last = client.get("/sentences", params={"limit": 2, "cursor": second["next_cursor"]}).json()
+
+        texts = [s["source"]["text"] for page in (first, second, last) for s in page["sentences"]]
+        assert texts == [f"Esaldia {i}" for i in range(5)]
+        assert last["next_cursor"] is None
+
+    def test_ids_are_unique_cache_keys(self, client, populated_cache, mock_alignment_data):
+        # Entries generated with the same sentence id (e.g. by a batch or migration)
+        for text in ("Bat", "Bi"):
+            populated_cache.set(text, "eu", "en", mock_alignment_data)
+
+        sentences = client.get("/sentences").json()["sentences"]
+
+        entries, _ = populated_cache.list_entries()
+        assert [s["id"] for s in sentences] == [entry["key"] for entry in entries]
+        assert len({s["id"] for s in sentences}) == 7
+
+    def test_get_sentence_by_listed_id(self, client, populated_cache):
+        listed = client.get("/sentences", params={"fields": "source,target", "limit": 1}).json()["sentences"][0]
+
+        response = client.get(f"/sentences/{listed['id']}")
+
+        assert response.status_code == 200
+        sentence = response.json()
+        assert sentence["id"] == listed["id"]
+        assert sentence["source"]["text"] == "Esaldia 0"
+        assert sentence["layers"]["lexical"][0]["label"] == "esaldi → sentence"
+
+    def test_get_unknown_sentence_returns_404(self, client, populated_cache):
+        assert client.get(f"/sentences/{'0' * 64}").status_code == 404
+        assert client.get("/sentences/..%2Fsecrets").status_code == 404
+
+    def test_response_is_alignment_data(self, client, populated_cache):
+        data = client.get("/sentences").json()
+
+        AlignmentData.model_validate({"sentences": data["sentences"]})
+
+    def test_field_selection(self, client, populated_cache):
+        data = client.get("/sentences", params={"fields": "source,target"}).json()
+
+        sentence = data["sentences"][0]
+        assert set(sentence) == {"id", "source", "target"}
+        assert sentence["source"]["tokens"][0]["lemma"] == "esaldi"
+
+    def test_filters_by_language(self, client, populated_cache):
+        data = client.get("/sentences", params={"source_lang": "es"}).json()
+
+        assert data["sentences"] == []
+
+    def test_returns_304_for_matching_etag(self, client, populated_cache):
+        response = client.get("/sentences")
+        etag = response.headers["etag"]
+
+        cached = client.get("/sentences", headers={"If-None-Match": etag})
+
+        assert cached.status_code == 304
+        assert cached.headers["etag"] == etag
+
+    def test_etag_changes_when_page_changes(self, client, populated_cache, mock_alignment_data):
+        etag = client.get("/sentences").headers["etag"]
+
+        populated_cache.set("Kaixo mundua", "eu", "en", mock_alignment_data)
+        response = client.get("/sentences", headers={"If-None-Match": etag})
+
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+        assert len(response.json()["sentences"]) == 6
+
+    def test_compresses_large_responses(self, client, populated_cache):
+        response = client.get("/sentences", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers.get("content-encoding") == "gzip"
+
+    def test_rejects_unknown_fields(self, client, populated_cache):
+        response = client.get("/sentences", params={"fields": "source,bogus"})
+
+        assert response.status_code == 400
+        assert "Unknown fields: bogus" in response.json()["detail"]
+
+    def test_rejects_invalid_cursor(self, client, populated_cache):
+        response = client.get("/sentences", params={"cursor": "not-a-cursor"})
+
+        assert response.status_code == 400
+
+
+def _parse_sse(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+class TestAnalyzeAndScaffoldStreamEndpoint:
+    @pytest.fixture
+    def stream_cache(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_cache = AlignmentCache(cache_dir=temp_dir)
+            with patch("itzuli_nlp.alignment_server.server.cache", temp_cache):
+                yield temp_cache
+
+    @patch.dict(os.environ, {"ITZULI_API_KEY": "test-key", "CLAUDE_API_KEY": "claude-key"})
+    @patch("itzuli_nlp.alignment_server.server.ClaudeClient")
+    @patch("itzuli_nlp.alignment_server.server.create_scaffold_from_dual_analysis")
+    @patch("itzuli_nlp.alignment_server.server.analyze_both_texts")
+    def test_streams_translation_scaffold_then_layers(
+        self, mock_analyze, mock_create_scaffold, mock_claude_class, client, stream_cache,
+        mock_analysis_data, mock_alignment_data
+    ):
+        source_analysis, target_analysis, translated_text = mock_analysis_data
+        mock_analyze.return_value = (translated_text, source_analysis, target_analysis)
+        mock_create_scaffold.return_value = mock_alignment_data
+        lexical = [Alignment(source=["s1"], target=["t1"], label="mundu → world")]
+        mock_claude_class.return_value.stream_alignment_layers.return_value = iter(
+            [("lexical", lexical), ("grammatical_relations", []), ("features", [])]
+        )
+
+        request_data = {"text": "Kaixo mundua", "source_lang": "eu", "target_lang": "en", "sentence_id": "test-001"}
+
+        response = client.post("/analyze-and-scaffold/stream", json=request_data)
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = _parse_sse(response.text)
+        assert [name for name, _ in events] == ["translation", "scaffold", "layer", "layer", "layer", "done"]
+        assert events[0][1]["target_text"] == "Hello world"
+        assert events[1][1]["source"]["tokens"][1]["form"] == "mundua"
+        assert events[2][1] == {"layer": "lexical", "alignments": [lexical[0].model_dump()]}
+        assert events[-1][1]["layers"]["lexical"][0]["label"] == "mundu → world"
+
+        cached = stream_cache.get("Kaixo mundua", "eu", "en")
+        assert cached.sentences[0].layers.lexical == lexical
+
+    @patch.dict(os.environ, {"ITZULI_API_KEY": "test-key", "CLAUDE_API_KEY": "claude-key"})
+    @patch("itzuli_nlp.alignment_server.server.analyze_both_texts")
+    def test_cache_hit_streams_stored_result(self, mock_analyze, client, stream_cache, mock_alignment_data):
+        stream_cache.set("Kaixo mundua", "eu", "en", mock_alignment_data)
+
+        request_data = {"text": "Kaixo mundua", "source_lang": "eu", "target_lang": "en"}
+
+        response = client.post("/analyze-and-scaffold/stream", json=request_data)
+
+        events = _parse_sse(response.text)
+        assert [name for name, _ in events] == ["translation", "scaffold", "layer", "layer", "layer", "done"]
+        mock_analyze.assert_not_called()
+
+    @patch.dict(os.environ, {"ITZULI_API_KEY": "test-key", "CLAUDE_API_KEY": "claude-key"})
+    @patch("itzuli_nlp.alignment_server.server.analyze_both_texts")
+    def test_analysis_failure_is_reported_as_error_event(self, mock_analyze, client, stream_cache):
+        mock_analyze.side_effect = Exception("Translation failed")
+
+        request_data = {"text": "Kaixo mundua", "source_lang": "eu", "target_lang": "en"}
+
+        response = client.post("/analyze-and-scaffold/stream", json=request_data)
+
+        events = _parse_sse(response.text)
+        assert events == [("error", {"detail": "Analysis and scaffold generation failed: Translation failed"})]
+        assert stream_cache.get("Kaixo mundua", "eu", "en") is None
+
+    @patch.dict(os.environ, {"ITZULI_API_KEY": "test-key", "CLAUDE_API_KEY": "claude-key"})
+    @patch("itzuli_nlp.alignment_server.server.ClaudeClient")
+    @patch("itzuli_nlp.alignment_server.server.create_scaffold_from_dual_analysis")
+    @patch("itzuli_nlp.alignment_server.server.analyze_both_texts")
+    def test_claude_failure_keeps_scaffold_and_skips_cache(
+        self, mock_analyze, mock_create_scaffold, mock_claude_class, client, stream_cache,
+        mock_analysis_data, mock_alignment_data
+    ):
+        source_analysis, target_analysis, translated_text = mock_analysis_data
+        mock_analyze.return_value = (translated_text, source_analysis, target_analysis)
+        mock_create_scaffold.return_value = mock_alignment_data
+        mock_claude_class.return_value.stream_alignment_layers.side_effect = Exception("overloaded")
+
+        request_data = {"text": "Kaixo mundua", "source_lang": "eu", "target_lang": "en"}
+
+        response = client.post("/analyze-and-scaffold/stream", json=request_data)
+
+        events = _parse_sse(response.text)
+        assert [name for name, _ in events] == ["translation", "scaffold", "error"]
+        assert stream_cache.get("Kaixo mundua", "eu", "en") is None
+        assert get_gate("analysis").in_flight == 0
+        assert get_gate("alignment").in_flight == 0
+
+    @patch.dict(os.environ, {"ITZULI_API_KEY": "test-key", "CLAUDE_API_KEY": "claude-key"})
+    @patch("itzuli_nlp.alignment_server.server.ClaudeClient")
+    @patch("itzuli_nlp.alignment_server.server.create_scaffold_from_dual_analysis")
+    @patch("itzuli_nlp.alignment_server.server.analyze_both_texts")
+    def test_retry_after_partial_failure_only_requests_missing_layers(
+        self, mock_analyze, mock_create_scaffold, mock_claude_class, client, stream_cache,
+        mock_analysis_data, mock_alignment_data
+    ):
+        source_analysis, target_analysis, translated_text = mock_analysis_data
+        mock_analyze.return_value = (translated_text, source_analysis, target_analysis)
+        mock_create_scaffold.return_value = mock_alignment_data
+        lexical = [Alignment(source=["s1"], target=["t1"], label="mundu → world")]
+        features = [Alignment(source=["s1"], target=["t1"], label="definiteness: -a → ∅")]
+
+        def fail_after_lexical(**kwargs):
+            yield "lexical", lexical
+            raise Exception("connection reset")
+
+        stream = mock_claude_class.return_value.stream_alignment_layers
+        stream.side_effect = fail_after_lexical
+        request_data = {"text": "Kaixo mundua", "source_lang": "eu", "target_lang": "en"}
+
+        first = _parse_sse(client.post("/analyze-and-scaffold/stream", json=request_data).text)
+
+        assert [name for name, _ in first] == ["translation", "scaffold", "layer", "error"]
+        assert stream_cache.get("Kaixo mundua", "eu", "en") is None
+
+        stream.side_effect = None
+        stream.return_value = iter([("grammatical_relations", []), ("features", features)])
+
+        second = _parse_sse(client.post("/analyze-and-scaffold/stream", json=request_data).text)
+
+        assert [name for name, _ in second] == ["translation", "scaffold", "layer", "layer", "layer", "done"]
+        assert second[2][1]["layer"] == "lexical"
+        assert stream.call_args.kwargs["layers"] == ("grammatical_relations", "features")
+        cached = stream_cache.get("Kaixo mundua", "eu", "en")
+        assert cached.sentences[0].layers.lexical == lexical
+        assert cached.sentences[0].layers.features == features
+
+
+class TestJobsEndpoints:
+    @pytest.fixture
+    def job_cache(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_cache = AlignmentCache(cache_dir=temp_dir)
+            with patch("itzuli_nlp.alignment_server.server.cache", temp_cache), \
+                    patch.object(server.jobs, "store", JobStore(temp_dir)):
+                yield temp_cache
+
+    def test_polls_job_submitted_to_another_worker(self, client, job_cache, mock_alignment_data):
+        # Another worker process sharing the cache directory accepted the submission
+        release = threading.Event()
+        other_worker = JobManager(lambda job: release.wait(5) and mock_alignment_data, store=server.jobs.store)
+        job = other_worker.submit("Kaixo mundua", "eu", "en", "job-002")
+
+        running = client.get(f"/jobs/{job.id}")
+        release.set()
+        finished = client.get(f"/jobs/{job.id}", params={"wait": 5})
+        other_worker.shutdown()
+
+        assert running.status_code == 200
+        assert running.json()["status"] in ("queued", "running")
+        assert finished.json()["status"] == "succeeded"
+        assert finished.json()["result"]["id"] == "job-002"
+
+    @patch.dict(os.environ, {"ITZULI_API_KEY": "test-key", "CLAUDE_API_KEY": "claude-key"})
+    @patch("itzuli_nlp.alignment_server.server.create_enriched_alignment_data")
+    @patch("itzuli_nlp.alignment_server.server.analyze_both_texts")
+    def test_submit_then_poll_for_result(
+        self, mock_analyze, mock_enrich, client, job_cache, mock_analysis_data, mock_alignment_data
+    ):
+        source_analysis, target_analysis, translated_text = mock_analysis_data
+        mock_analyze.return_value = (translated_text, source_analysis, target_analysis)
+        mock_enrich.return_value = _with_layers(mock_alignment_data)
+
+        request_data = {"text": "Kaixo mundua", "source_lang": "eu", "target_lang": "en", "sentence_id": "job-001"}
+
+        submitted = client.post("/jobs", json=request_data)
+
+        assert submitted.status_code == 202
+        job_id = submitted.json()["job_id"]
+        assert submitted.headers["location"] == f"/jobs/{job_id}"
+
+        polled = client.get(f"/jobs/{job_id}", params={"wait": 5})
+
+        assert polled.status_code == 200
+        data = polled.json()
+        assert data["status"] == "succeeded"
+        assert data["result"]["id"] == "job-001"
+        assert data["result"]["target"]["text"] == "Hello world"
+        assert job_cache.get("Kaixo mundua", "eu", "en") is not None
+
+    @patch.dict(os.environ, {"ITZULI_API_KEY": "test-key", "CLAUDE_API_KEY": "claude-key"})
+    @patch("itzuli_nlp.alignment_server.server.analyze_both_texts")
+    def test_failed_job_reports_error(self, mock_analyze, client, job_cache):
+        mock_analyze.side_effect = Exception("Translation failed")
+
+        request_data = {"text": "Kaixo mundua", "source_lang": "eu", "target_lang": "en"}
+
+        job_id = client.post("/jobs", json=request_data).json()["job_id"]
+        data = client.get(f"/jobs/{job_id}", params={"wait": 5}).json()
+
+        assert data["status"] == "failed"
+        assert data["error"] == "Translation failed"
+        assert data["result"] is None
+
+    @patch.dict(os.environ, {"ITZULI_API_KEY": "test-key", "CLAUDE_API_KEY": "claude-key"})
+    @patch("itzuli_nlp.alignment_server.server.create_enriched_alignment_data")
+    @patch("itzuli_nlp.alignment_server.server.analyze_both_texts")
+    def test_job_with_failed_claude_call_fails(
+        self, mock_analyze, mock_enrich, client, job_cache, mock_analysis_data, mock_alignment_data
+    ):
+        source_analysis, target_analysis, translated_text = mock_analysis_data
+        mock_analyze.return_value = (translated_text, source_analysis, target_analysis)
+        # A failed Claude call leaves the scaffold with empty layers
+        mock_enrich.return_value = mock_alignment_data
+
+        request_data = {"text": "Kaixo mundua", "source_lang": "eu", "target_lang": "en"}
+
+        job_id = client.post("/jobs", json=request_data).json()["job_id"]
+        data = client.get(f"/jobs/{job_id}", params={"wait": 5}).json()
+
+        assert data["status"] == "failed"
+        assert "Alignment incomplete" in data["error"]
+        assert data["result"] is None
+        assert job_cache.get("Kaixo mundua", "eu", "en") is None
+
+    @patch.dict(os.environ, {"ITZULI_API_KEY": "test-key", "CLAUDE_API_KEY": "claude-key"})
+    @patch("itzuli_nlp.alignment_server.server.analyze_both_texts")
+    def test_cache_hit_completes_immediately(self, mock_analyze, client, job_cache, mock_alignment_data):
+        job_cache.set("Kaixo mundua", "eu", "en", mock_alignment_data)
+
+        request_data = {"text": "Kaixo mundua", "source_lang": "eu", "target_lang": "en"}
+
+        response = client.post("/jobs", json=request_data)
+
+        assert response.json()["status"] == "succeeded"
+        assert response.json()["result"]["target"]["text"] == "Hello world"
+        mock_analyze.assert_not_called()
+
+    @patch.dict(os.environ, {"ITZULI_API_KEY": "test-key", "CLAUDE_API_KEY": "claude-key"})
+    def test_full_job_queue_is_too_many_requests(self, client, job_cache):
+        request_data = {"text": "Kaixo mundua", "source_lang": "eu", "target_lang": "en"}
+
+        with patch.object(server.jobs, "submit", side_effect=JobQueueFull("Too many pending jobs (1000)")):
+            response = client.post("/jobs", json=request_data)
+
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "30"
+
+    def test_unknown_job_returns_404(self, client):
+        response = client.get("/jobs/does-not-exist")
+
+        assert response.status_code == 404
+
+    @patch.dict(os.environ, {}, clear=True)
+    def test_submit_requires_api_keys(self, client):
+        request_data = {"text": "Kaixo mundua", "source_lang": "eu", "target_lang": "en"}
+
+        response = client.post("/jobs", json=request_data)
+
+        assert response.status_code == 500
+        assert "ITZULI_API_KEY not configured" in response.json()["detail"]
+
+
+class TestStaleCacheEntries:
+    """Entries of an earlier pipeline version are served while they are regenerated."""
+
+    @pytest.fixture
+    def cache_dir(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            yield temp_dir
+
+    @pytest.fixture
+    def refresh_jobs(self):
+        manager = JobManager(server._run_alignment_job, max_workers=1)
+        with patch("itzuli_nlp.alignment_server.server.jobs", manager):
+            yield manager
+        manager.shutdown()
+
+    @staticmethod
+    def _current_cache(cache_dir, old_version, alignment_data):
+        AlignmentCache(cache_dir=cache_dir, version=old_version).set("Kaixo mundua", "eu", "en", alignment_data)
+        return AlignmentCache(cache_dir=cache_dir, version=f"{analysis_fingerprint()}-current")
+
+    @patch.dict(os.environ, {"ITZULI_API_KEY": "test-key", "CLAUDE_API_KEY": "claude-key"})
+    @patch("itzuli_nlp.alignment_server.server.create_enriched_alignment_data")
+    @patch("itzuli_nlp.alignment_server.server.analyze_both_texts")
+    def test_stale_entry_is_served_and_regenerated(
+        self, mock_analyze, mock_enrich, client, cache_dir, refresh_jobs, mock_analysis_data, mock_alignment_data
+    ):
+        source_analysis, target_analysis, translated_text = mock_analysis_data
+        mock_analyze.return_value = (translated_text, source_analysis, target_analysis)
+        mock_enrich.return_value = _with_layers(mock_alignment_data)
+        current = self._current_cache(cache_dir, "before", mock_alignment_data)
+        request_data = {"text": "Kaixo mundua", "source_lang": "eu", "target_lang": "en", "sentence_id": "stale-001"}
+
+        with patch("itzuli_nlp.alignment_server.server.cache", current):
+            response = client.post("/analyze-and-scaffold", json=request_data)
+            refresh_jobs.shutdown(wait=True)
+
+        assert response.status_code == 200
+        assert response.json()["id"] == "stale-001"
+        assert response.json()["layers"]["lexical"] == []
+        mock_analyze.assert_called_once()
+        assert current.get("Kaixo mundua", "eu", "en").sentences[0].layers == LEXICAL_LAYERS
+        assert current.get_stale("Kaixo mundua", "eu", "en") is None
+
+    @patch.dict(os.environ, {"ITZULI_API_KEY": "test-key", "CLAUDE_API_KEY": "claude-key"})
+    @patch("itzuli_nlp.alignment_server.server.generate_alignments_for_scaffold")
+    @patch("itzuli_nlp.alignment_server.server.analyze_both_texts")
+    def test_alignment_only_change_reuses_stale_scaffold(
+        self, mock_analyze, mock_generate, client, cache_dir, refresh_jobs, mock_alignment_data
+    ):
+        mock_generate.side_effect = lambda scaffold, *args, **kwargs: _with_layers(scaffold)
+        current = self._current_cache(cache_dir, f"{analysis_fingerprint()}-oldprompt", mock_alignment_data)
+        request_data = {"text": "Kaixo mundua", "source_lang": "eu", "target_lang": "en"}
+
+        with patch("itzuli_nlp.alignment_server.server.cache", current):
+            client.post("/analyze-and-scaffold/stream", json=request_data)
+            refresh_jobs.shutdown(wait=True)
+
+        mock_analyze.assert_not_called()
+        scaffold = mock_generate.call_args.args[0].sentences[0]
+        assert scaffold.target.text == "Hello world"
+        assert scaffold.layers == AlignmentLayers()
+        assert current.get("Kaixo mundua", "eu", "en") is not None
+
+    @patch.dict(os.environ, {"ITZULI_API_KEY": "test-key", "CLAUDE_API_KEY": "claude-key"})
+    @patch("itzuli_nlp.alignment_server.server.create_enriched_alignment_data")
+    @patch("itzuli_nlp.alignment_server.server.analyze_both_texts")
+    def test_stale_entries_are_misses_when_disabled(
+        self, mock_analyze, mock_enrich, client, cache_dir, refresh_jobs, mock_analysis_data, mock_alignment_data
+    ):
+        source_analysis, target_analysis, translated_text = mock_analysis_data
+        mock_analyze.return_value = (translated_text, source_analysis, target_analysis)
+        mock_enrich.return_value = _with_layers(mock_alignment_data)
+        current = self._current_cache(cache_dir, "before", mock_alignment_data)
+        request_data = {"text": "Kaixo mundua", "source_lang": "eu", "target_lang": "en"}
+
+        with patch("itzuli_nlp.alignment_server.server.cache", current), \
+                patch("itzuli_nlp.alignment_server.server.SERVE_STALE_CACHE", False):
+            response = client.post("/analyze-and-scaffold", json=request_data)
+
+        assert response.json()["layers"] == LEXICAL_LAYERS.model_dump()
+        mock_analyze.assert_called_once()
+
+
+class TestBackgroundCacheWrites:
+    """Generated results are written to the cache after the response has been sent."""
+
+    @pytest.fixture
+    def temp_cache(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_cache = AlignmentCache(cache_dir=temp_dir)
+            with patch("itzuli_nlp.alignment_server.server.cache", temp_cache):
+                yield temp_cache
+
+    @staticmethod
+    async def _post(path, payload, events):
+        body = json.dumps(payload).encode()
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0", "spec_version": "2.4"},
+            "http_version": "1.1",
+            "method": "POST",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+            "client": ("testclient", 50000),
+            "server": ("testserver", 80),
+        }
+
+        async def receive():
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send(message):
+            if message["type"] == "http.response.body" and not message.get("more_body"):
+                events.append("response sent")
+
+        await app(scope, receive, send)
+
+    @pytest.mark.anyio
+    @pytest.mark.parametrize("path", ["/analyze-and-scaffold", "/analyze-and-scaffold/stream"])
+    @patch.dict(os.environ, {"ITZULI_API_KEY": "test-key", "CLAUDE_API_KEY": "claude-key"})
+    @patch("itzuli_nlp.alignment_server.server.ClaudeClient")
+    @patch("itzuli_nlp.alignment_server.server.create_enriched_alignment_data")
+    @patch("itzuli_nlp.alignment_server.server.create_scaffold_from_dual_analysis")
+    @patch("itzuli_nlp.alignment_server.server.analyze_both_texts")
+    async def test_result_is_cached_after_response(
+        self, mock_analyze, mock_create_scaffold, mock_enrich, mock_claude_class, path, temp_cache,
+        mock_analysis_data, mock_alignment_data
+    ):
+        source_analysis, target_analysis, translated_text = mock_analysis_data
+        mock_analyze.return_value = (translated_text, source_analysis, target_analysis)
+        mock_create_scaffold.return_value = mock_alignment_data
+        mock_enrich.return_value = _with_layers(mock_alignment_data)
+        mock_claude_class.return_value.stream_alignment_layers.return_value = iter(
+            [(name, getattr(LEXICAL_LAYERS, name)) for name in ("lexical", "grammatical_relations", "features")]
+        )
+        events = []
+        original_set = temp_cache.set
+
+        def recording_set(*args):
+            events.append("cached")
+            original_set(*args)
+
+        with patch.object(temp_cache, "set", recording_set):
+            await self._post(path, {"text": "Kaixo mundua", "source_lang": "eu", "target_lang": "en"}, events)
+
+        assert events == ["response sent", "cached"]
+        assert temp_cache.get("Kaixo mundua", "eu", "en").sentences[0].layers == LEXICAL_LAYERS
+
+
+class TestMetricsEndpoint:
+    def test_exposes_prometheus_text(self, client):
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert "# TYPE alignment_http_requests_total counter" in response.text
+        assert "# TYPE alignment_stage_duration_seconds histogram" in response.text
+
+    def test_requests_are_labelled_by_route_template(self, client):
+        client.get("/health")
+        client.get("/jobs/does-not-exist")
+
+        body = client.get("/metrics").text
+
+        assert 'alignment_http_requests_total{method="GET",route="/health",status="200"}' in body
+        assert 'alignment_http_requests_total{method="GET",route="/jobs/{job_id}",status="404"}' in body
+        assert "does-not-exist" not in body
+
+    def test_counts_cache_hits_and_misses(self, client):
+        def counter_value(body, result):
+            prefix = f'alignment_cache_requests_total{{result="{result}"}} '
+            lines = [line for line in body.splitlines() if line.startswith(prefix)]
+            return float(lines[0][len(prefix):]) if lines else 0.0
+
+        before = client.get("/metrics").text
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_cache = AlignmentCache(cache_dir=temp_dir)
+            temp_cache.get("Kaixo", "eu", "en")
+            temp_cache.set("Kaixo", "eu", "en", AlignmentData(sentences=[]))
+            temp_cache.get("Kaixo", "eu", "en")
+        after = client.get("/metrics").text
+
+        assert counter_value(after, "miss") == counter_value(before, "miss") + 1
+        assert counter_value(after, "hit") == counter_value(before, "hit") + 1
+
+    @pytest.mark.anyio
+    async def test_pool_gauges_return_to_zero(self, client):
+        await run_stage("cache", lambda: None)
+
+        body = client.get("/metrics").text
+        assert 'alignment_pool_waiting{pool="cache"} 0.0' in body
+        assert 'alignment_pool_running{pool="cache"} 0.0' in body
+        assert 'alignment_pool_wait_seconds_count{pool="cache"}' in body
+
+
+class TestAdmissionControl:
+    @pytest.fixture
+    def saturated(self):
+        """Fill the alignment gate so new misses are shed."""
+        gate = get_gate("alignment")
+        with patch.object(gate, "max_queue", 0):
+            gate.acquire(gate.capacity)
+            try:
+                yield gate
+            finally:
+                gate.release(gate.capacity)
+
+    @pytest.fixture
+    def temp_cache(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_cache = AlignmentCache(cache_dir=temp_dir)
+            with patch("itzuli_nlp.alignment_server.server.cache", temp_cache):
+                yield temp_cache
+
+    @patch.dict(os.environ, {"ITZULI_API_KEY": "test-key", "CLAUDE_API_KEY": "claude-key"})
+    @patch("itzuli_nlp.alignment_server.server.analyze_both_texts")
+    def test_miss_is_rejected_with_retry_after(self, mock_analyze, client, temp_cache, saturated):
+        request_data = {"text": "Kaixo mundua", "source_lang": "eu", "target_lang": "en"}
+
+        response = client.post("/analyze-and-scaffold", json=request_data)
+
+        # The queue bound was hit
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+        assert "alignment stage overloaded" in response.json()["detail"]
+        mock_analyze.assert_not_called()
+        assert get_gate("analysis").in_flight == 0
+
+    @patch.dict(os.environ, {"ITZULI_API_KEY": "test-key", "CLAUDE_API_KEY": "claude-key"})
+    def test_stream_is_rejected_before_it_starts(self, client, temp_cache, saturated):
+        request_data = {"text": "Kaixo mundua", "source_lang": "eu", "target_lang": "en"}
+
+        response = client.post("/analyze-and-scaffold/stream", json=request_data)
+
+        assert response.status_code == 429
+        assert "Retry-After" in response.headers
+
+    @patch.dict(os.environ, {"ITZULI_API_KEY": "test-key", "CLAUDE_API_KEY": "claude-key"})
+    @patch("itzuli_nlp.alignment_server.server.analyze_both_texts")
+    def test_expected_wait_over_target_is_service_unavailable(self, mock_analyze, client, temp_cache):
+        request_data = {"text": "Kaixo mundua", "source_lang": "eu", "target_lang": "en"}
+        gate = get_gate("alignment")
+
+        # Room in the queue, but a new unit would wait longer than the target
+        with patch.object(gate, "target_wait", 0.0):
+            gate.acquire(gate.capacity)
+            try:
+                response = client.post("/analyze-and-scaffold", json=request_data)
+            finally:
+                gate.release(gate.capacity)
+
+        assert response.status_code == 503
+        assert "expected wait" in response.json()["detail"]
+        assert int(response.headers["Retry-After"]) >= 1
+        mock_analyze.assert_not_called()
+
+    @patch.dict(os.environ, {"ITZULI_API_KEY": "test-key", "CLAUDE_API_KEY": "claude-key"})
+    def test_cache_hits_bypass_admission(self, client, temp_cache, saturated, mock_alignment_data):
+        temp_cache.set("Kaixo mundua", "eu", "en", mock_alignment_data)
+        request_data = {"text": "Kaixo mundua", "source_lang": "eu", "target_lang": "en"}
+
+        response = client.post("/analyze-and-scaffold", json=request_data)
+
+        assert response.status_code == 200
+        assert response.json()["target"]["text"] == "Hello world"
+
+    @patch.dict(os.environ, {"ITZULI_API_KEY": "test-key", "CLAUDE_API_KEY": "claude-key"})
+    @patch("itzuli_nlp.alignment_server.server.create_enriched_alignment_data")
+    @patch("itzuli_nlp.alignment_server.server.analyze_both_texts")
+    def test_admitted_request_releases_its_gates(
+        self, mock_analyze, mock_enrich, client, temp_cache, mock_analysis_data, mock_alignment_data
+    ):
+        source_analysis, target_analysis, translated_text = mock_analysis_data
+        mock_analyze.return_value = (translated_text, source_analysis, target_analysis)
+        mock_enrich.return_value = mock_alignment_data
+        request_data = {"text": "Kaixo mundua", "source_lang": "eu", "target_lang": "en"}
+
+        response = client.post("/analyze-and-scaffold", json=request_data)
+
+        assert response.status_code == 200
+        assert get_gate("analysis").in_flight == 0
+        assert get_gate("alignment").in_flight == 0
+
+
+    @patch.dict(os.environ, {"ITZULI_API_KEY": "test-key", "CLAUDE_API_KEY": "claude-key"})
+    @patch("itzuli_nlp.alignment_server.server.BATCH_ALIGNMENT_WINDOW", 2)
+    @patch("itzuli_nlp.alignment_server.server.create_enriched_alignment_data")
+    @patch("itzuli_nlp.alignment_server.server.analyze_many_texts")
+    def test_batch_larger_than_queue_is_admitted_in_windows(self, mock_analyze_many, mock_enrich, client, temp_cache):
+        gate = get_gate("alignment")
+        held = []
+        mock_analyze_many.side_effect = lambda **kwargs: [
+            TestAnalyzeAndScaffoldBatchEndpoint._dual_item(t) for t in kwargs["texts"]
+        ]
+
+        def enrich(**kwargs):
+            held.append(gate.in_flight)
+            return TestAnalyzeAndScaffoldBatchEndpoint._enriched(**kwargs)
+
+        mock_enrich.side_effect = enrich
+        items = [{"text": f"Esaldia {i}"} for i in range(gate.capacity + 5)]
+        request_data = {"source_lang": "eu", "target_lang": "en", "items": items}
+
+        # Another request is in flight, and the batch is larger than the whole queue
+        with patch.object(gate, "max_queue", 0):
+            gate.acquire()
+            try:
+                response = client.post("/analyze-and-scaffold/batch", json=request_data)
+            finally:
+                gate.release()
+
+        assert response.status_code == 200
+        assert len(response.json()["sentences"]) == len(items)
+        assert max(held) <= 3
+        assert gate.in_flight == 0
+
+
+class TestInputNormalization:
+    @pytest.fixture
+    def temp_cache(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_cache = AlignmentCache(cache_dir=temp_dir)
+            with patch("itzuli_nlp.alignment_server.server.cache", temp_cache):
+                yield temp_cache
+
+    @patch.dict(os.environ, {"ITZULI_API_KEY": "test-key", "CLAUDE_API_KEY": "claude-key"})
+    def test_cache_hit_is_served_as_stored_json(self, client, temp_cache, mock_alignment_data):
+        temp_cache.set("Kaixo mundua", "eu", "en", mock_alignment_data)
+        request_data = {"text": "Kaixo mundua", "source_lang": "eu", "target_lang": "en", "sentence_id": "raw-1"}
+
+        first = client.post("/analyze-and-scaffold", json=request_data)
+        second = client.post("/analyze-and-scaffold", json={**request_data, "sentence_id": "raw-2"})
+
+        assert first.status_code == 200
+        assert first.headers["content-type"] == "application/json"
+        expected = mock_alignment_data.sentences[0].model_copy(update={"id": "raw-1"})
+        assert first.content == expected.model_dump_json().encode()
+        assert first.headers["etag"] == client.post("/analyze-and-scaffold", json=request_data).headers["etag"]
+        assert first.headers["etag"] != second.headers["etag"]
+
+    @patch.dict(os.environ, {"ITZULI_API_KEY": "test-key", "CLAUDE_API_KEY": "claude-key"})
+    @patch("itzuli_nlp.alignment_server.server.create_enriched_alignment_data")
+    @patch("itzuli_nlp.alignment_server.server.analyze_both_texts")
+    def test_upstreams_receive_canonical_text(
+        self, mock_analyze, mock_enrich, client, temp_cache, mock_analysis_data, mock_alignment_data
+    ):
+        source_analysis, target_analysis, translated_text = mock_analysis_data
+        mock_analyze.return_value = (translated_text, source_analysis, target_analysis)
+        mock_enrich.return_value = mock_alignment_data
+        request_data = {"text": "  Kaixo   mundua\n", "source_lang": "eu", "target_lang": "en"}
+
+        client.post("/analyze-and-scaffold", json=request_data)
+
+        assert mock_analyze.call_args.kwargs["text"] == "Kaixo mundua"
+        assert mock_enrich.call_args.kwargs["source_text"] == "Kaixo mundua"
+
+    @patch.dict(os.environ, {"ITZULI_API_KEY": "test-key", "CLAUDE_API_KEY": "claude-key"})
+    @patch("itzuli_nlp.alignment_server.server.analyze_both_texts")
+    def test_variant_spelling_hits_cache_with_callers_sentence_id(
+        self, mock_analyze, client, temp_cache, mock_alignment_data
+    ):
+        temp_cache.set("Kaixo mundua", "eu", "en", mock_alignment_data)
+        request_data = {"text": "Kaixo   mundua ", "source_lang": "eu", "target_lang": "en", "sentence_id": "mine-7"}
+
+        response = client.post("/analyze-and-scaffold", json=request_data)
+
+        assert response.status_code == 200
+        assert response.json()["id"] == "mine-7"
+        mock_analyze.assert_not_called()
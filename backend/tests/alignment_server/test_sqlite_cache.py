@@ -0,0 +1,297 @@
+"""Tests for the SQLite alignment cache backend."""
+
+import multiprocessing
+import sqlite3
+import tempfile
+import time
+import zlib
+from unittest.mock import patch
+
+import pytest
+
+from itzuli_nlp.alignment_server import cache as cache_module
+from itzuli_nlp.alignment_server.cache import AlignmentCache, create_cache
+from itzuli_nlp.alignment_server.sqlite_cache import SQLiteAlignmentCache
+from itzuli_nlp.alignment_server.types import (
+    AlignmentData,
+    AlignmentLayers,
+    SentencePair,
+    TokenizedSentence,
+)
+
+
+def make_data(text: str, lang: str = "eu") -> AlignmentData:
+    pair = SentencePair(
+        id=f"id-{text}",
+        source=TokenizedSentence(lang=lang, text=text, tokens=[]),
+        target=TokenizedSentence(lang="en", text=f"{text} (en)", tokens=[]),
+        layers=AlignmentLayers(),
+    )
+    return AlignmentData(sentences=[pair])
+
+
+@pytest.fixture
+def cache_dir():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        yield temp_dir
+
+
+def _write_entries(cache_dir: str, prefix: str, count: int) -> None:
+    cache = SQLiteAlignmentCache(cache_dir=cache_dir, memory_entries=0)
+    for i in range(count):
+        cache.set(f"{prefix}-{i}", "eu", "en", make_data(f"{prefix}-{i}"))
+
+
+class TestSQLiteAlignmentCache:
+    def test_set_and_get(self, cache_dir):
+        cache = SQLiteAlignmentCache(cache_dir=cache_dir, memory_entries=0)
+        cache.set("Kaixo", "eu", "en", make_data("Kaixo"))
+
+        result = cache.get("Kaixo", "eu", "en")
+
+        assert result.sentences[0].target.text == "Kaixo (en)"
+        assert cache.get("Agur", "eu", "en") is None
+
+    def test_responses_are_served_as_stored_json(self, cache_dir):
+        SQLiteAlignmentCache(cache_dir=cache_dir).set("Kaixo", "eu", "en", make_data("Kaixo"))
+        cache = SQLiteAlignmentCache(cache_dir=cache_dir, memory_entries=0)
+
+        body = cache.get_response("Kaixo", "eu", "en", "mine")
+
+        assert body == make_data("Kaixo").sentences[0].model_copy(update={"id": "mine"}).model_dump_json().encode()
+
+    def test_uses_wal_and_compressed_payloads(self, cache_dir):
+        cache = SQLiteAlignmentCache(cache_dir=cache_dir)
+        cache.set("Kaixo", "eu", "en", make_data("Kaixo"))
+
+        connection = sqlite3.connect(cache.db_path)
+        assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        payload, size = connection.execute("SELECT payload, size FROM entries").fetchone()
+        assert size == len(payload)
+        assert AlignmentData.model_validate_json(zlib.decompress(payload)) == make_data("Kaixo")
+
+    def test_memory_tier_is_charged_for_uncompressed_json(self, cache_dir):
+        json_size = len(make_data("Kaixo").model_dump_json().encode("utf-8"))
+        written = SQLiteAlignmentCache(cache_dir=cache_dir)
+        written.set("Kaixo", "eu", "en", make_data("Kaixo"))
+        assert written.memory.size_bytes == json_size
+
+        read = SQLiteAlignmentCache(cache_dir=cache_dir)
+        read.get("Kaixo", "eu", "en")
+        assert read.memory.size_bytes == json_size
+
+    def test_entries_are_shared_between_instances(self, cache_dir):
+        SQLiteAlignmentCache(cache_dir=cache_dir).set("Kaixo", "eu", "en", make_data("Kaixo"))
+
+        assert SQLiteAlignmentCache(cache_dir=cache_dir).get("Kaixo", "eu", "en") is not None
+
+    def test_list_entries_paginates_and_filters(self, cache_dir):
+        cache = SQLiteAlignmentCache(cache_dir=cache_dir)
+        for i in range(5):
+            cache.set(f"Esaldia {i}", "eu", "en", make_data(f"Esaldia {i}"))
+        cache.set("Frase", "es", "eu", make_data("Frase", lang="es"))
+
+        first, cursor = cache.list_entries(limit=2)
+        second, cursor = cache.list_entries(after=cursor, limit=2)
+        rest, end = cache.list_entries(after=cursor, limit=10)
+
+        assert [entry["text"] for entry in first + second + rest] == [f"Esaldia {i}" for i in range(5)] + ["Frase"]
+        assert end is None
+        spanish, _ = cache.list_entries(source_lang="es")
+        assert [entry["text"] for entry in spanish] == ["Frase"]
+        assert spanish[0]["key"] == cache._get_cache_key("Frase", "es", "eu")
+
+    def test_rewritten_entry_moves_to_the_end(self, cache_dir):
+        cache = SQLiteAlignmentCache(cache_dir=cache_dir)
+        cache.set("a", "eu", "en", make_data("a"))
+        cache.set("b", "eu", "en", make_data("b"))
+        cache.set("a", "eu", "en", make_data("a"))
+
+        entries, _ = cache.list_entries()
+
+        assert [entry["text"] for entry in entries] == ["b", "a"]
+
+    def test_expired_entries_are_misses_and_evicted(self, cache_dir):
+        cache = SQLiteAlignmentCache(cache_dir=cache_dir, ttl_seconds=60)
+        cache.set("Kaixo", "eu", "en", make_data("Kaixo"))
+
+        with patch("time.time", return_value=time.time() + 120):
+            assert cache.get("Kaixo", "eu", "en") is None
+            assert cache.evict() == 1
+        assert cache.stats()["entries"] == 0
+
+    def test_size_budget_evicts_least_recently_used(self, cache_dir):
+        cache = SQLiteAlignmentCache(cache_dir=cache_dir, memory_entries=0)
+        for text in ("a", "b", "c"):
+            cache.set(text, "eu", "en", make_data(text))
+        size = cache.stats()["size_bytes"] // 3
+        connection = sqlite3.connect(cache.db_path)
+        for accessed_at, text in ((3, "a"), (1, "b"), (2, "c")):
+            key = cache._get_cache_key(text, "eu", "en")
+            connection.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (accessed_at, key))
+        connection.commit()
+
+        cache.max_bytes = size * 2 + 1
+        removed = cache.evict()
+
+        assert removed == 1
+        assert cache.get("b", "eu", "en") is None
+        assert cache.get("a", "eu", "en") is not None
+        assert cache.get("c", "eu", "en") is not None
+
+    def test_evicted_entries_leave_the_memory_tier(self, cache_dir):
+        cache = SQLiteAlignmentCache(cache_dir=cache_dir)
+        for text in ("a", "b"):
+            cache.set(text, "eu", "en", make_data(text))
+        connection = sqlite3.connect(cache.db_path)
+        connection.execute("UPDATE entries SET accessed_at = 1 WHERE key = ?", (cache._get_cache_key("a", "eu", "en"),))
+        connection.commit()
+
+        cache.max_bytes = cache.stats()["size_bytes"] - 1
+        assert cache.evict() == 1
+
+        assert cache.get("a", "eu", "en") is None
+        assert len(cache.memory) == 1
+
+    def test_superseding_write_is_one_transaction(self, cache_dir):
+        SQLiteAlignmentCache(cache_dir=cache_dir, version="old").set("Kaixo", "eu", "en", make_data("Kaixo"))
+        cache = SQLiteAlignmentCache(cache_dir=cache_dir, version="new")
+        statements = []
+        cache._connection().set_trace_callback(statements.append)
+
+        cache.set("Kaixo", "eu", "en", make_data("Kaixo"))
+
+        begin, commit = statements.index("BEGIN IMMEDIATE"), statements.index("COMMIT")
+        written = [statement.split()[0] for statement in statements[begin + 1:commit]]
+        assert written == ["INSERT", "SELECT", "DELETE"]
+        assert cache.stats()["entries"] == 1
+
+    def test_transaction_rolls_back_on_error(self, cache_dir):
+        cache = SQLiteAlignmentCache(cache_dir=cache_dir)
+        cache.set("Kaixo", "eu", "en", make_data("Kaixo"))
+
+        with pytest.raises(RuntimeError):
+            with cache._transaction() as connection:
+                connection.execute("DELETE FROM entries")
+                raise RuntimeError("boom")
+
+        assert cache.stats()["entries"] == 1
+
+    def test_lfu_budget_evicts_least_frequently_used(self, cache_dir):
+        cache = SQLiteAlignmentCache(cache_dir=cache_dir, memory_entries=0, eviction_policy="lfu")
+        for text in ("a", "b", "c"):
+            cache.set(text, "eu", "en", make_data(text))
+        size = cache.stats()["size_bytes"] // 3
+        connection = sqlite3.connect(cache.db_path)
+        for hits, accessed_at, text in ((5, 1, "a"), (1, 3, "b"), (3, 2, "c")):
+            key = cache._get_cache_key(text, "eu", "en")
+            connection.execute(
+                "UPDATE entries SET hits = ?, accessed_at = ? WHERE key = ?", (hits, accessed_at, key)
+            )
+        connection.commit()
+
+        cache.max_bytes = size * 2 + 1
+        cache.evict()
+
+        assert cache.get("b", "eu", "en") is None
+        assert cache.get("a", "eu", "en") is not None
+
+    def test_reads_refresh_access_time(self, cache_dir):
+        cache = SQLiteAlignmentCache(cache_dir=cache_dir, memory_entries=0)
+        cache.set("Kaixo", "eu", "en", make_data("Kaixo"))
+        key = cache._get_cache_key("Kaixo", "eu", "en")
+        connection = sqlite3.connect(cache.db_path)
+        connection.execute("UPDATE entries SET accessed_at = 0 WHERE key = ?", (key,))
+        connection.commit()
+
+        cache.get("Kaixo", "eu", "en")
+
+        accessed_at, hits = connection.execute(
+            "SELECT accessed_at, hits FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        assert accessed_at > 0
+        assert hits == 1
+
+    def test_clear(self, cache_dir):
+        cache = SQLiteAlignmentCache(cache_dir=cache_dir)
+        cache.set("Kaixo", "eu", "en", make_data("Kaixo"))
+
+        cache.clear()
+
+        assert cache.get("Kaixo", "eu", "en") is None
+        assert cache.list_entries() == ([], None)
+
+    def test_concurrent_writers_in_separate_processes(self, cache_dir):
+        SQLiteAlignmentCache(cache_dir=cache_dir)
+        context = multiprocessing.get_context("spawn")
+        processes = [
+            context.Process(target=_write_entries, args=(cache_dir, f"p{n}", 20)) for n in range(3)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(timeout=60)
+
+        assert all(process.exitcode == 0 for process in processes)
+        assert SQLiteAlignmentCache(cache_dir=cache_dir).stats()["entries"] == 60
+
+
+class TestCreateCache:
+    def test_defaults_to_file_backend(self, cache_dir):
+        assert isinstance(create_cache(cache_dir=cache_dir), AlignmentCache)
+
+    def test_selects_sqlite_backend(self, cache_dir):
+        with patch.dict("os.environ", {"ALIGNMENT_CACHE_BACKEND": "sqlite"}):
+            assert isinstance(create_cache(cache_dir=cache_dir), SQLiteAlignmentCache)
+
+    def test_unknown_backend_raises(self, cache_dir):
+        with pytest.raises(ValueError, match="Unknown cache backend: redis"):
+            create_cache("redis", cache_dir=cache_dir)
+
+
+def test_eviction_runs_periodically_on_write(cache_dir):
+    cache = SQLiteAlignmentCache(cache_dir=cache_dir)
+    with patch.object(cache_module, "EVICTION_INTERVAL", 2), patch.object(cache, "evict") as evict:
+        for text in ("a", "b", "c", "d"):
+            cache.set(text, "eu", "en", make_data(text))
+
+    assert evict.call_count == 2
+
+
+class TestVersionedKeys:
+    def test_stale_entries_are_found_and_replaced(self, cache_dir):
+        SQLiteAlignmentCache(cache_dir=cache_dir, version="old").set("Kaixo", "eu", "en", make_data("Kaixo"))
+        cache = SQLiteAlignmentCache(cache_dir=cache_dir, memory_entries=0, version="new")
+
+        assert cache.get("Kaixo", "eu", "en") is None
+        assert cache.get_stale("Kaixo", "eu", "en") == (make_data("Kaixo"), "old")
+
+        cache.set("Kaixo", "eu", "en", make_data("Kaixo"))
+
+        assert cache.get_stale("Kaixo", "eu", "en") is None
+        assert [entry["version"] for entry in cache.list_entries()[0]] == ["new"]
+
+    def test_upgrades_database_created_before_versioning(self, cache_dir):
+        cache = SQLiteAlignmentCache(cache_dir=cache_dir, memory_entries=0)
+        base_key = cache._get_base_key("Kaixo", "eu", "en")
+        connection = sqlite3.connect(cache.db_path)
+        connection.executescript(
+            "DROP TABLE entries;"
+            "CREATE TABLE entries (seq INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT NOT NULL UNIQUE,"
+            " text TEXT NOT NULL, source_lang TEXT NOT NULL, target_lang TEXT NOT NULL, payload BLOB NOT NULL,"
+            " size INTEGER NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL,"
+            " hits INTEGER NOT NULL DEFAULT 0);"
+        )
+        payload = zlib.compress(make_data("Kaixo").model_dump_json().encode())
+        connection.execute(
+            "INSERT INTO entries (key, text, source_lang, target_lang, payload, size, created_at, accessed_at)"
+            " VALUES (?, 'Kaixo', 'eu', 'en', ?, ?, ?, ?)",
+            (base_key, payload, len(payload), time.time(), time.time()),
+        )
+        connection.commit()
+        connection.close()
+
+        upgraded = SQLiteAlignmentCache(cache_dir=cache_dir, memory_entries=0)
+
+        assert upgraded.get("Kaixo", "eu", "en") is None
+        assert upgraded.get_stale("Kaixo", "eu", "en") == (make_data("Kaixo"), "")
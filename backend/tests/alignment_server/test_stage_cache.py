@@ -0,0 +1,153 @@
+"""Tests for per-stage pipeline checkpoints."""
+
+import tempfile
+import time
+from unittest.mock import patch
+
+import pytest
+
+from itzuli_nlp.alignment_server.alignment_generator import generate_alignments_for_scaffold
+from itzuli_nlp.alignment_server.stage_cache import (
+    LayerCheckpointer,
+    StageCache,
+    layers_complete,
+    load_layers,
+    scaffold_fingerprint,
+)
+from itzuli_nlp.alignment_server.types import (
+    Alignment,
+    AlignmentData,
+    AlignmentLayers,
+    SentencePair,
+    Token,
+    TokenizedSentence,
+)
+
+LEXICAL = [Alignment(source=["s0"], target=["t0"], label="kaixo → hello")]
+FEATURES = [Alignment(source=["s0"], target=["t0"], label="number: singular")]
+
+
+def make_pair(sentence_id: str = "s1", layers: AlignmentLayers = None) -> SentencePair:
+    return SentencePair(
+        id=sentence_id,
+        source=TokenizedSentence(
+            lang="eu", text="Kaixo", tokens=[Token(id="s0", form="Kaixo", lemma="kaixo", pos="intj")]
+        ),
+        target=TokenizedSentence(
+            lang="en", text="Hello", tokens=[Token(id="t0", form="Hello", lemma="hello", pos="intj")]
+        ),
+        layers=layers or AlignmentLayers(),
+    )
+
+
+@pytest.fixture
+def checkpoints():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        yield StageCache(cache_dir=temp_dir)
+
+
+class TestStageCache:
+    def test_set_and_get(self, checkpoints):
+        checkpoints.set("translation", "Hello", "Kaixo", "eu", "en")
+
+        assert checkpoints.get("translation", "Kaixo", "eu", "en") == "Hello"
+        assert checkpoints.get("translation", "Kaixo", "eu", "es") is None
+
+    def test_unknown_stage_raises(self, checkpoints):
+        with pytest.raises(ValueError, match="Unknown pipeline stage: claude"):
+            checkpoints.get("claude", "Kaixo")
+
+    def test_expired_checkpoints_are_ignored_and_swept(self, checkpoints):
+        checkpoints.set("analysis", [], "Kaixo", "eu")
+
+        with patch("time.time", return_value=time.time() + checkpoints.ttl_seconds + 1):
+            assert checkpoints.get("analysis", "Kaixo", "eu") is None
+            assert checkpoints.sweep() == 1
+
+    def test_clear(self, checkpoints):
+        checkpoints.set("translation", "Hello", "Kaixo", "eu", "en")
+
+        checkpoints.clear()
+
+        assert checkpoints.get("translation", "Kaixo", "eu", "en") is None
+
+
+class TestLayerCheckpoints:
+    def test_fingerprint_ignores_sentence_id_and_layers(self):
+        assert scaffold_fingerprint(make_pair("a")) == scaffold_fingerprint(
+            make_pair("b", AlignmentLayers(lexical=LEXICAL))
+        )
+
+    def test_empty_layers_are_saved_only_alongside_alignments(self, checkpoints):
+        pair = make_pair()
+        failed = LayerCheckpointer(checkpoints, pair)
+        for layer_name in ("lexical", "grammatical_relations", "features"):
+            failed.add(layer_name, [])
+        failed.finish()
+
+        assert load_layers(checkpoints, pair) == {}
+
+        succeeded = LayerCheckpointer(checkpoints, pair)
+        succeeded.add("lexical", LEXICAL)
+        succeeded.add("grammatical_relations", [])
+        succeeded.finish()
+
+        assert load_layers(checkpoints, pair) == {"lexical": LEXICAL, "grammatical_relations": []}
+
+    def test_layers_complete(self, checkpoints):
+        assert not layers_complete(checkpoints, make_pair())
+        assert layers_complete(checkpoints, make_pair(layers=AlignmentLayers(lexical=LEXICAL)))
+
+        # Lexical came from a checkpoint but the call for the other layers failed
+        checkpointer = LayerCheckpointer(checkpoints, make_pair())
+        checkpointer.add("lexical", LEXICAL)
+        checkpointer.finish()
+        assert not layers_complete(checkpoints, make_pair(layers=AlignmentLayers(lexical=LEXICAL)))
+
+
+class TestResumingAlignmentGeneration:
+    @patch("itzuli_nlp.alignment_server.alignment_generator.ClaudeClient")
+    def test_only_missing_layers_are_requested(self, mock_claude_class, checkpoints):
+        checkpointer = LayerCheckpointer(checkpoints, make_pair())
+        checkpointer.add("lexical", LEXICAL)
+        checkpointer.finish()
+        mock_claude_class.return_value.generate_alignments.return_value = AlignmentLayers(features=FEATURES)
+
+        result = generate_alignments_for_scaffold(
+            AlignmentData(sentences=[make_pair()]), claude_api_key="key", checkpoints=checkpoints
+        )
+
+        assert mock_claude_class.return_value.generate_alignments.call_args.kwargs["layers"] == (
+            "grammatical_relations",
+            "features",
+        )
+        layers = result.sentences[0].layers
+        assert (layers.lexical, layers.grammatical_relations, layers.features) == (LEXICAL, [], FEATURES)
+        assert layers_complete(checkpoints, result.sentences[0])
+
+    @patch("itzuli_nlp.alignment_server.alignment_generator.ClaudeClient")
+    def test_fully_checkpointed_scaffold_skips_claude(self, mock_claude_class, checkpoints):
+        checkpointer = LayerCheckpointer(checkpoints, make_pair())
+        checkpointer.add("lexical", LEXICAL)
+        checkpointer.add("grammatical_relations", [])
+        checkpointer.add("features", FEATURES)
+        checkpointer.finish()
+
+        result = generate_alignments_for_scaffold(
+            AlignmentData(sentences=[make_pair("retry")]), claude_api_key="key", checkpoints=checkpoints
+        )
+
+        mock_claude_class.return_value.generate_alignments.assert_not_called()
+        assert result.sentences[0].id == "retry"
+        assert result.sentences[0].layers.features == FEATURES
+
+    @patch("itzuli_nlp.alignment_server.alignment_generator.ClaudeClient")
+    def test_failed_call_is_not_checkpointed(self, mock_claude_class, checkpoints):
+        mock_claude_class.return_value.generate_alignments.return_value = AlignmentLayers()
+
+        result = generate_alignments_for_scaffold(
+            AlignmentData(sentences=[make_pair()]), claude_api_key="key", checkpoints=checkpoints
+        )
+
+        assert load_layers(checkpoints, make_pair()) == {}
+        assert not layers_complete(checkpoints, result.sentences[0])
@@ -1,8 +1,11 @@
 import json
 
-from itzuli_nlp.core.types import AnalysisRow, TranslationResult
+from itzuli_nlp.core.types import AnalysisResult, AnalysisRow, BatchItemResult, TranslationResult
 from itzuli_nlp.core.formatters import (
+    format_analysis_as_markdown_table,
+    format_as_compact_dict,
     format_as_markdown_table,
+    format_batch_as_markdown,
     format_as_json,
     format_as_dict_list,
     apply_friendly_mappings,
@@ -124,6 +127,107 @@ class TestFormatAsMarkdownTable:
         assert "| test | (test) | noun | — |" in output
 
 
+class TestTranslationOnlyAndAnalysisOnly:
+    def test_omits_analysis_table_when_disabled(self):
+        result = TranslationResult(
+            source_text="Kaixo!",
+            source_language="eu",
+            translated_text="Hello!",
+            target_language="en",
+            translation_id="trans-123",
+            analysis_rows=[],
+        )
+
+        output = format_as_markdown_table(result, "en", include_analysis=False)
+
+        assert output == "Source: Kaixo! (Basque)\nTranslation: Hello! (English)"
+
+    def test_formats_analysis_only_result(self):
+        result = AnalysisResult(
+            text="Kaixo mundua",
+            language="eu",
+            analysis_rows=[AnalysisRow("mundua", "mundu", "NOUN", "Case=Abs|Definite=Def|Number=Sing")],
+        )
+
+        output = format_analysis_as_markdown_table(result, "es")
+
+        assert output.startswith("Origen: Kaixo mundua (vasco)")
+        assert "Traducción" not in output
+        assert "Análisis Morfológico:" in output
+        assert "| mundua | (mundu) | sustantivo | absolutivo (suj/obj), definido (el/la), singular |" in output
+
+
+class TestFormatBatchAsMarkdown:
+    def test_formats_results_and_errors_in_order(self):
+        result = TranslationResult(
+            source_text="Kaixo!",
+            source_language="eu",
+            translated_text="Hello!",
+            target_language="en",
+            translation_id="trans-123",
+            analysis_rows=[AnalysisRow("Kaixo", "kaixo", "INTJ", "")],
+        )
+        items = [
+            BatchItemResult(index=0, source_text="Kaixo!", result=result),
+            BatchItemResult(index=1, source_text="???", error="Invalid status code: 500"),
+        ]
+
+        output = format_batch_as_markdown(items, "en")
+
+        assert output.index("### 1/2") < output.index("### 2/2")
+        assert "Translation: Hello! (English)" in output
+        assert "| Kaixo | (kaixo) | interjection | — |" in output
+        assert "Error: Invalid status code: 500" in output
+
+    def test_localizes_error_label(self):
+        items = [BatchItemResult(index=0, source_text="???", error="boom")]
+
+        output = format_batch_as_markdown(items, "eu")
+
+        assert "Jatorria: ???" in output
+        assert "Errorea: boom" in output
+
+
+class TestFormatAsCompactDict:
+    def _result(self):
+        return TranslationResult(
+            source_text="Kaixo mundua!",
+            source_language="eu",
+            translated_text="Hello world!",
+            target_language="en",
+            translation_id="trans-123",
+            analysis_rows=[
+                AnalysisRow("Kaixo", "kaixo", "INTJ", ""),
+                AnalysisRow("mundua", "mundu", "NOUN", "Case=Abs|Number=Sing"),
+            ],
+        )
+
+    def test_uses_abbreviated_keys_and_friendly_labels(self):
+        output = format_as_compact_dict(self._result(), "en")
+
+        assert output == {
+            "src": "Kaixo mundua!",
+            "sl": "eu",
+            "tr": "Hello world!",
+            "tl": "en",
+            "id": "trans-123",
+            "a": [
+                {"w": "Kaixo", "l": "kaixo", "p": "interjection"},
+                {"w": "mundua", "l": "mundu", "p": "noun", "f": "absolutive (sub/obj), singular"},
+            ],
+        }
+
+    def test_raw_mode_skips_friendly_expansion(self):
+        output = format_as_compact_dict(self._result(), "en", friendly=False)
+
+        assert output["a"][1] == {"w": "mundua", "l": "mundu", "p": "NOUN", "f": "Case=Abs|Number=Sing"}
+
+    def test_localizes_friendly_labels(self):
+        output = format_as_compact_dict(self._result(), "eu")
+
+        assert output["a"][1]["p"] == "izena"
+
+
 class TestFormatAsJson:
     def test_formats_translation_result_as_json(self):
         rows = [
@@ -0,0 +1,164 @@
+"""Tests for the Prometheus-style metrics registry."""
+
+import json
+import os
+
+import pytest
+
+from itzuli_nlp.core import metrics
+from itzuli_nlp.core.metrics import Counter, Gauge, Histogram, Registry, track_stage
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """Register test metrics in a throwaway registry."""
+    fresh = Registry()
+    monkeypatch.setattr(metrics, "REGISTRY", fresh)
+    return fresh
+
+
+class TestCounter:
+    def test_renders_help_type_and_labelled_samples(self, registry):
+        counter = Counter("test_requests_total", "Requests.", ("route",))
+        counter.labels("/a").inc()
+        counter.labels("/a").inc(2)
+        counter.labels("/b").inc()
+
+        lines = registry.render().splitlines()
+
+        assert lines[0] == "# HELP test_requests_total Requests."
+        assert lines[1] == "# TYPE test_requests_total counter"
+        assert 'test_requests_total{route="/a"} 3.0' in lines
+        assert 'test_requests_total{route="/b"} 1.0' in lines
+
+    def test_unlabelled_counter_renders_without_braces(self, registry):
+        counter = Counter("test_total", "Total.")
+        counter.inc()
+
+        assert "test_total 1.0" in registry.render().splitlines()
+
+    def test_wrong_label_count_raises(self, registry):
+        counter = Counter("test_total", "Total.", ("a", "b"))
+
+        with pytest.raises(ValueError, match="expects labels"):
+            counter.labels("only-one")
+
+    def test_label_values_are_escaped(self, registry):
+        counter = Counter("test_total", "Total.", ("route",))
+        counter.labels('say "hi"\n').inc()
+
+        assert 'test_total{route="say \\"hi\\"\\n"} 1.0' in registry.render()
+
+
+class TestGauge:
+    def test_goes_up_and_down(self, registry):
+        gauge = Gauge("test_in_flight", "In flight.")
+        gauge.inc()
+        gauge.inc()
+        gauge.dec()
+
+        assert "test_in_flight 1.0" in registry.render().splitlines()
+
+    def test_set(self, registry):
+        gauge = Gauge("test_value", "Value.")
+        gauge.set(7)
+
+        assert "test_value 7.0" in registry.render().splitlines()
+
+
+class TestHistogram:
+    def test_renders_cumulative_buckets_sum_and_count(self, registry):
+        histogram = Histogram("test_seconds", "Latency.", buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.7, 5.0):
+            histogram.observe(value)
+
+        lines = registry.render().splitlines()
+
+        assert 'test_seconds_bucket{le="0.1"} 1' in lines
+        assert 'test_seconds_bucket{le="1.0"} 3' in lines
+        assert 'test_seconds_bucket{le="+Inf"} 4' in lines
+        assert "test_seconds_sum 6.25" in lines
+        assert "test_seconds_count 4" in lines
+
+    def test_boundary_value_falls_in_its_bucket(self, registry):
+        histogram = Histogram("test_seconds", "Latency.", buckets=(1.0,))
+        histogram.observe(1.0)
+
+        assert 'test_seconds_bucket{le="1.0"} 1' in registry.render().splitlines()
+
+
+class TestSharedMetrics:
+    DEAD_PID = 99999999
+
+    @pytest.fixture
+    def shared(self, registry, tmp_path):
+        registry.share(tmp_path, interval=60)
+        yield registry
+        registry.stop_sharing()
+
+    @staticmethod
+    def _write_snapshot(directory, pid, snapshot):
+        (directory / f"{pid}-1.json").write_text(json.dumps(snapshot))
+
+    def test_sums_samples_over_workers(self, shared, tmp_path):
+        counter = Counter("test_requests_total", "Requests.", ("route",))
+        histogram = Histogram("test_seconds", "Latency.", buckets=(1.0,))
+        counter.labels("/a").inc()
+        histogram.observe(0.5)
+        self._write_snapshot(tmp_path, os.getppid(), {
+            "test_requests_total": [[["/a"], 2.0], [["/b"], 1.0]],
+            "test_seconds": [[[], [[1, 1], 3.0]]],
+        })
+
+        lines = shared.render().splitlines()
+
+        assert 'test_requests_total{route="/a"} 3.0' in lines
+        assert 'test_requests_total{route="/b"} 1.0' in lines
+        assert 'test_seconds_bucket{le="1.0"} 2' in lines
+        assert 'test_seconds_bucket{le="+Inf"} 3' in lines
+        assert "test_seconds_sum 3.5" in lines
+
+    def test_exited_workers_keep_counters_but_not_gauges(self, shared, tmp_path):
+        counter = Counter("test_total", "Total.")
+        gauge = Gauge("test_in_flight", "In flight.")
+        counter.inc()
+        gauge.inc()
+        self._write_snapshot(tmp_path, self.DEAD_PID, {"test_total": [[[], 5.0]], "test_in_flight": [[[], 4.0]]})
+
+        lines = shared.render().splitlines()
+
+        assert "test_total 6.0" in lines
+        assert "test_in_flight 1.0" in lines
+
+    def test_flush_writes_own_snapshot(self, shared, tmp_path):
+        counter = Counter("test_total", "Total.")
+        counter.inc(2)
+
+        shared.flush()
+
+        (own,) = tmp_path.glob(f"{os.getpid()}-*.json")
+        assert json.loads(own.read_text())["test_total"] == [[[], 2.0]]
+
+    def test_clear_shared_removes_earlier_snapshots(self, tmp_path):
+        self._write_snapshot(tmp_path, self.DEAD_PID, {})
+
+        metrics.clear_shared(tmp_path)
+
+        assert list(tmp_path.glob("*.json")) == []
+
+
+class TestTrackStage:
+    def test_records_duration(self):
+        with track_stage("test-ok"):
+            pass
+
+        assert sum(metrics.STAGE_SECONDS.labels("test-ok").counts) == 1
+        assert metrics.STAGE_ERRORS.labels("test-ok").get() == 0
+
+    def test_counts_errors_and_reraises(self):
+        with pytest.raises(RuntimeError):
+            with track_stage("test-error"):
+                raise RuntimeError("upstream down")
+
+        assert metrics.STAGE_ERRORS.labels("test-error").get() == 1
+        assert sum(metrics.STAGE_SECONDS.labels("test-error").counts) == 1
@@ -1,6 +1,6 @@
 from unittest.mock import Mock
 
-from itzuli_nlp.core.nlp import process_raw_analysis, create_pipeline
+from itzuli_nlp.core.nlp import process_raw_analysis, process_raw_analysis_batch, create_pipeline
 from itzuli_nlp.core.types import AnalysisRow
 
 
@@ -88,6 +88,39 @@ class TestProcessRawAnalysis:
         assert result[1].word == "mundua"
 
 
+class TestProcessRawAnalysisBatch:
+    def _mock_doc(self, text):
+        mock_word = Mock()
+        mock_word.text = text
+        mock_word.lemma = text.lower()
+        mock_word.upos = "NOUN"
+        mock_word.feats = None
+        mock_sentence = Mock()
+        mock_sentence.words = [mock_word]
+        mock_doc = Mock()
+        mock_doc.sentences = [mock_sentence]
+        return mock_doc
+
+    def test_returns_rows_per_text_in_order(self):
+        mock_pipeline = Mock()
+        mock_pipeline.bulk_process.return_value = [self._mock_doc("Etxea"), self._mock_doc("Mendia")]
+
+        result = process_raw_analysis_batch(mock_pipeline, ["Etxea", "Mendia"])
+
+        assert len(result) == 2
+        assert result[0][0].word == "Etxea"
+        assert result[1][0].word == "Mendia"
+        mock_pipeline.bulk_process.assert_called_once()
+        docs = mock_pipeline.bulk_process.call_args.args[0]
+        assert [doc.text for doc in docs] == ["Etxea", "Mendia"]
+
+    def test_empty_input_skips_pipeline(self):
+        mock_pipeline = Mock()
+
+        assert process_raw_analysis_batch(mock_pipeline, []) == []
+        mock_pipeline.bulk_process.assert_not_called()
+
+
 class TestCreatePipeline:
     def test_creates_basque_pipeline(self):
         # This is more of an integration test - we can't easily mock Stanza
@@ -1,6 +1,16 @@
 from unittest.mock import Mock, patch
 
-from itzuli_nlp.core.workflow import process_translation_with_analysis, get_cached_stanza_pipeline
+from itzuli_nlp.core import workflow
+from itzuli_nlp.core.workflow import (
+    analyze_batch_with_fallback,
+    translate_concurrently,
+    process_analysis,
+    process_analysis_batch,
+    process_translation_with_analysis,
+    process_batch_translation_with_analysis,
+    get_cached_stanza_pipeline,
+    start_background_warmup,
+)
 from itzuli_nlp.core.types import AnalysisRow, TranslationResult
 
 
@@ -104,11 +114,143 @@ class TestProcessTranslationWithAnalysis:
         assert result.translation_id == ""
 
 
+class TestTranslationWithoutAnalysis:
+    @patch("itzuli_nlp.core.workflow.get_cached_stanza_pipeline")
+    @patch("itzuli_nlp.core.workflow.process_raw_analysis")
+    @patch("itzuli_nlp.core.workflow.Itzuli")
+    def test_skips_stanza_when_analysis_disabled(self, mock_itzuli_class, mock_process_raw_analysis, mock_get_pipeline):
+        mock_itzuli_class.return_value.getTranslation.return_value = {"translated_text": "Hello!", "id": "trans-123"}
+
+        result = process_translation_with_analysis(
+            api_key="test-key", text="Kaixo!", source_language="eu", target_language="en", include_analysis=False
+        )
+
+        assert result.translated_text == "Hello!"
+        assert result.analysis_rows == []
+        mock_get_pipeline.assert_not_called()
+        mock_process_raw_analysis.assert_not_called()
+
+
+class TestProcessAnalysis:
+    @patch("itzuli_nlp.core.workflow.get_cached_stanza_pipeline")
+    @patch("itzuli_nlp.core.workflow.process_raw_analysis")
+    @patch("itzuli_nlp.core.workflow.Itzuli")
+    def test_analyzes_without_translating(self, mock_itzuli_class, mock_process_raw_analysis, mock_get_pipeline):
+        mock_process_raw_analysis.return_value = [AnalysisRow("Hola", "hola", "INTJ", "")]
+
+        result = process_analysis("Hola", "es")
+
+        assert result.text == "Hola"
+        assert result.language == "es"
+        assert result.analysis_rows[0].word == "Hola"
+        mock_get_pipeline.assert_called_once_with("es")
+        mock_itzuli_class.assert_not_called()
+
+
+class TestProcessAnalysisBatch:
+    @patch("itzuli_nlp.core.workflow.get_cached_stanza_pipeline")
+    @patch("itzuli_nlp.core.workflow.process_raw_analysis_batch")
+    def test_analyzes_all_texts_in_one_call(self, mock_process_batch, mock_get_pipeline):
+        mock_process_batch.return_value = [[AnalysisRow("Hello", "hello", "INTJ", "")], []]
+
+        result = process_analysis_batch(["Hello", ""], "en")
+
+        assert result == mock_process_batch.return_value
+        mock_get_pipeline.assert_called_once_with("en")
+        mock_process_batch.assert_called_once_with(mock_get_pipeline.return_value, ["Hello", ""])
+
+    @patch("itzuli_nlp.core.workflow.get_cached_stanza_pipeline")
+    def test_empty_input_skips_pipeline(self, mock_get_pipeline):
+        assert process_analysis_batch([], "eu") == []
+        mock_get_pipeline.assert_not_called()
+
+
+class TestBatchHelpers:
+    def test_translate_concurrently_returns_errors_in_place(self):
+        def translate(text):
+            if text == "Broken":
+                raise Exception("Invalid status code: 500")
+            return {"translated_text": text.upper()}
+
+        results = translate_concurrently(translate, ["a", "Broken", "b"], max_workers=2)
+
+        assert results[0] == {"translated_text": "A"}
+        assert isinstance(results[1], Exception)
+        assert results[2] == {"translated_text": "B"}
+
+    @patch("itzuli_nlp.core.workflow.get_cached_stanza_pipeline")
+    @patch("itzuli_nlp.core.workflow.process_raw_analysis")
+    @patch("itzuli_nlp.core.workflow.process_raw_analysis_batch")
+    def test_analyze_batch_falls_back_per_item(self, mock_process_batch, mock_process_raw_analysis, mock_get_pipeline):
+        mock_process_batch.side_effect = Exception("batch failed")
+        mock_process_raw_analysis.side_effect = [[AnalysisRow("Hola", "hola", "INTJ", "")], Exception("bad text")]
+
+        results = analyze_batch_with_fallback(["Hola", "???"], "es")
+
+        assert results[0][0].word == "Hola"
+        assert str(results[1]) == "bad text"
+        mock_get_pipeline.assert_called_with("es")
+
+
+class TestProcessBatchTranslationWithAnalysis:
+    @patch("itzuli_nlp.core.workflow.get_cached_stanza_pipeline")
+    @patch("itzuli_nlp.core.workflow.process_raw_analysis_batch")
+    @patch("itzuli_nlp.core.workflow.Itzuli")
+    def test_returns_results_in_order_with_per_item_errors(
+        self, mock_itzuli_class, mock_process_batch, mock_get_pipeline
+    ):
+        translations = {"Hello": {"translated_text": "Kaixo", "id": "t1"}, "House": {"translated_text": "Etxea", "id": "t3"}}
+
+        def get_translation(text, source, target):
+            if text == "Broken":
+                raise Exception("Invalid status code: 500")
+            return translations[text]
+
+        mock_itzuli_class.return_value.getTranslation.side_effect = get_translation
+        mock_process_batch.return_value = [
+            [AnalysisRow("Kaixo", "kaixo", "INTJ", "")],
+            [AnalysisRow("Etxea", "etxe", "NOUN", "Case=Abs")],
+        ]
+
+        items = process_batch_translation_with_analysis(
+            api_key="test-key", texts=["Hello", "Broken", "House"], source_language="en", target_language="eu"
+        )
+
+        assert [item.index for item in items] == [0, 1, 2]
+        assert items[0].result.translated_text == "Kaixo"
+        assert items[0].result.analysis_rows[0].word == "Kaixo"
+        assert items[1].result is None
+        assert "500" in items[1].error
+        assert items[2].result.translation_id == "t3"
+        assert items[2].result.analysis_rows[0].lemma == "etxe"
+
+        # Only successful translations are analyzed, in one batched call
+        mock_process_batch.assert_called_once_with(mock_get_pipeline.return_value, ["Kaixo", "Etxea"])
+
+    @patch("itzuli_nlp.core.workflow.get_cached_stanza_pipeline")
+    @patch("itzuli_nlp.core.workflow.process_raw_analysis")
+    @patch("itzuli_nlp.core.workflow.process_raw_analysis_batch")
+    @patch("itzuli_nlp.core.workflow.Itzuli")
+    def test_falls_back_to_per_item_analysis(
+        self, mock_itzuli_class, mock_process_batch, mock_process_raw_analysis, mock_get_pipeline
+    ):
+        mock_itzuli_class.return_value.getTranslation.return_value = {"translated_text": "Hello", "id": "t1"}
+        mock_process_batch.side_effect = Exception("batch failed")
+        mock_process_raw_analysis.side_effect = [[AnalysisRow("Kaixo", "kaixo", "INTJ", "")], Exception("bad text")]
+
+        items = process_batch_translation_with_analysis(
+            api_key="test-key", texts=["Kaixo", "???"], source_language="eu", target_language="en"
+        )
+
+        assert items[0].result.analysis_rows[0].word == "Kaixo"
+        assert items[1].result is None
+        assert items[1].error == "bad text"
+
+
 class TestGetCachedStanzaPipeline:
     def test_caches_pipeline(self):
         # Clear any existing cached pipeline
-        if hasattr(get_cached_stanza_pipeline, "_pipeline"):
-            delattr(get_cached_stanza_pipeline, "_pipeline")
+        workflow._pipelines.clear()
 
         with patch("itzuli_nlp.core.workflow.create_pipeline") as mock_create:
             mock_pipeline = Mock()
@@ -124,3 +266,40 @@ class TestGetCachedStanzaPipeline:
             assert pipeline2 == mock_pipeline
             assert pipeline1 is pipeline2
             assert mock_create.call_count == 1  # Should not be called again
+
+    def test_caches_pipeline_per_language(self):
+        workflow._pipelines.clear()
+
+        with patch("itzuli_nlp.core.workflow.create_pipeline", side_effect=lambda lang: Mock(name=lang)) as mock_create:
+            basque = get_cached_stanza_pipeline("eu")
+            spanish = get_cached_stanza_pipeline("es")
+
+            assert basque is not spanish
+            assert get_cached_stanza_pipeline("es") is spanish
+            assert [call.args[0] for call in mock_create.call_args_list] == ["eu", "es"]
+
+        workflow._pipelines.clear()
+
+
+class TestStartBackgroundWarmup:
+    def test_loads_pipelines_off_the_calling_thread(self):
+        workflow._pipelines.clear()
+
+        with patch("itzuli_nlp.core.workflow.create_pipeline") as mock_create:
+            thread = start_background_warmup(["eu", "es"])
+            thread.join(timeout=5)
+
+            assert thread.daemon
+            assert set(workflow._pipelines) == {"eu", "es"}
+            assert mock_create.call_count == 2
+
+        workflow._pipelines.clear()
+
+    def test_warmup_failure_is_logged_not_raised(self):
+        workflow._pipelines.clear()
+
+        with patch("itzuli_nlp.core.workflow.create_pipeline", side_effect=Exception("no models")):
+            thread = start_background_warmup(["eu"])
+            thread.join(timeout=5)
+
+        assert workflow._pipelines == {}
@@ -0,0 +1,155 @@
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+from itzuli_nlp.mcp_server.feedback_spool import FeedbackSpool
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestFeedbackSpool:
+    def test_enqueue_persists_entry_without_sending(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            send = Mock()
+            spool = FeedbackSpool(send, spool_dir=temp_dir)
+
+            spool.enqueue("translation-123", "Hola!", 4)
+
+            files = list(Path(temp_dir).glob("*.json"))
+            assert len(files) == 1
+            entry = json.loads(files[0].read_text())
+            assert entry["translation_id"] == "translation-123"
+            assert entry["evaluation"] == 4
+            send.assert_not_called()
+
+    def test_flush_delivers_in_fifo_order_and_removes_entries(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            send = Mock(return_value={"success": True})
+            spool = FeedbackSpool(send, spool_dir=temp_dir)
+            spool.enqueue("t1", "a", 1)
+            spool.enqueue("t2", "b", 2)
+
+            assert spool.flush() == 2
+
+            assert [call.args[0] for call in send.call_args_list] == ["t1", "t2"]
+            assert spool.pending() == 0
+
+    def test_flush_respects_batch_size(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            spool = FeedbackSpool(Mock(), spool_dir=temp_dir, batch_size=2)
+            for i in range(5):
+                spool.enqueue(f"t{i}", "x", 3)
+
+            assert spool.flush() == 2
+            assert spool.pending() == 3
+
+    def test_failure_schedules_retry_with_backoff(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            clock = FakeClock()
+            send = Mock(side_effect=[Exception("Invalid status code: 503"), {"success": True}])
+            spool = FeedbackSpool(send, spool_dir=temp_dir, base_backoff=2.0, clock=clock)
+            spool.enqueue("t1", "x", 3)
+
+            assert spool.flush() == 0
+            assert spool.pending() == 1
+
+            # Not due yet
+            clock.now += 1
+            assert spool.flush() == 0
+            assert send.call_count == 1
+
+            clock.now += 2
+            assert spool.flush() == 1
+            assert spool.pending() == 0
+
+    def test_gives_up_after_max_attempts(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            clock = FakeClock()
+            spool = FeedbackSpool(
+                Mock(side_effect=Exception("Invalid API key or expired")),
+                spool_dir=temp_dir,
+                max_attempts=2,
+                clock=clock,
+            )
+            spool.enqueue("t1", "x", 3)
+
+            spool.flush()
+            clock.now += 100
+            spool.flush()
+
+            assert spool.pending() == 0
+            assert len(list((Path(temp_dir) / "failed").glob("*.json"))) == 1
+
+    def test_entries_survive_restart(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            FeedbackSpool(Mock(), spool_dir=temp_dir).enqueue("t1", "x", 3)
+
+            send = Mock()
+            restarted = FeedbackSpool(send, spool_dir=temp_dir)
+
+            assert restarted.flush() == 1
+            send.assert_called_once_with("t1", "x", 3)
+
+    def test_background_thread_flushes_queued_entries(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            send = Mock()
+            spool = FeedbackSpool(send, spool_dir=temp_dir, flush_interval=10)
+            spool.start()
+            try:
+                spool.enqueue("t1", "x", 3)
+                deadline = time.monotonic() + 5
+                while spool.pending() and time.monotonic() < deadline:
+                    time.sleep(0.01)
+            finally:
+                spool.stop()
+
+            send.assert_called_once_with("t1", "x", 3)
+
+    def test_spools_sharing_a_directory_deliver_each_entry_once(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            send = Mock()
+            first = FeedbackSpool(send, spool_dir=temp_dir)
+            second = FeedbackSpool(send, spool_dir=temp_dir)
+            for i in range(4):
+                first.enqueue(f"t{i}", "x", 3)
+
+            def send_and_race(translation_id, correction, evaluation):
+                # The other process flushes while this one is sending
+                if translation_id == "t0":
+                    assert second.flush() == 3
+
+            send.side_effect = send_and_race
+            assert first.flush() == 1
+
+            assert sorted(call.args[0] for call in send.call_args_list) == ["t0", "t1", "t2", "t3"]
+            assert first.pending() == 0
+
+    def test_abandoned_claims_are_requeued(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            FeedbackSpool(Mock(), spool_dir=temp_dir).enqueue("t1", "x", 3)
+            # A process claimed the entry and died before sending it
+            entry_path = next(Path(temp_dir).glob("*.json"))
+            claimed_path = Path(temp_dir) / "inflight" / entry_path.name
+            entry_path.replace(claimed_path)
+            os.utime(claimed_path, (0, 0))
+
+            send = Mock()
+            assert FeedbackSpool(send, spool_dir=temp_dir).flush() == 1
+            send.assert_called_once_with("t1", "x", 3)
+
+    def test_defaults_to_user_cache_directory(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with patch.dict(os.environ, {"XDG_CACHE_HOME": temp_dir}):
+                os.environ.pop("ITZULI_FEEDBACK_SPOOL_DIR", None)
+                spool = FeedbackSpool(Mock())
+
+            assert spool.spool_dir == Path(temp_dir) / "itzuli-mcp" / "feedback"
@@ -0,0 +1,43 @@
+"""Import-time guards for MCP server cold start.
+
+MCP clients spawn the server on demand, so importing it must not pull in
+stanza/torch; those load lazily on the first analysis.
+"""
+
+import os
+import subprocess
+import sys
+
+# Generous budget: the server imported in ~3s when stanza/torch loaded eagerly, ~0.8s lazily
+IMPORT_BUDGET_SECONDS = float(os.environ.get("ITZULI_IMPORT_BUDGET_SECONDS", 2.0))
+
+
+def _run_in_fresh_interpreter(code: str) -> str:
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+    result = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    return result.stdout.strip()
+
+
+class TestServerImport:
+    def test_import_does_not_load_stanza_or_torch(self):
+        output = _run_in_fresh_interpreter(
+            "import sys, itzuli_nlp.mcp_server.server; "
+            "print(','.join(m for m in ('stanza', 'torch') if m in sys.modules))"
+        )
+
+        assert output == ""
+
+    def test_import_time_within_budget(self):
+        # Best of three to smooth out filesystem cache noise
+        timings = [
+            float(
+                _run_in_fresh_interpreter(
+                    "import time; start = time.perf_counter(); import itzuli_nlp.mcp_server.server; "
+                    "print(time.perf_counter() - start)"
+                ).splitlines()[-1]
+            )
+            for _ in range(3)
+        ]
+
+        assert min(timings) < IMPORT_BUDGET_SECONDS, f"server import took {min(timings):.2f}s"
@@ -1,42 +1,52 @@
+import contextvars
 import json
-from unittest.mock import patch
+import threading
+import time
+from unittest.mock import AsyncMock, Mock, PropertyMock, patch
+
+import anyio
+from mcp.types import CallToolResult
 
 import pytest
 from mcp.server.fastmcp.exceptions import ToolError
 
-from itzuli_nlp.mcp_server.server import translate, get_quota, send_feedback
+from itzuli_nlp.mcp_server.server import analyze, api_key, translate, translate_batch, get_quota, send_feedback
 
 
 class TestTranslate:
-    def test_returns_translated_text_on_success(self):
+    @pytest.mark.anyio
+    async def test_returns_translated_text_on_success(self):
 
         with patch(
             "itzuli_nlp.mcp_server.services.translate_with_analysis",
             return_value="Source: Kaixo! (euskera)\nTranslation: Hola! (español)\n\nMorphological Analysis:\n| Word | Lemma | Part of Speech | Features |\n|------|-------|---------------|----------|\n| Hola | (hola) | interjection | — |",
         ):
-            result = translate("Kaixo!", "eu", "es")
+            result = await translate("Kaixo!", "eu", "es")
 
         assert "Kaixo!" in result
         assert "Hola!" in result
 
-    def test_raises_tool_error_on_api_failure(self):
+    @pytest.mark.anyio
+    async def test_raises_tool_error_on_api_failure(self):
         with patch(
             "itzuli_nlp.mcp_server.services.translate_with_analysis",
             side_effect=Exception("Invalid API key or expired"),
         ):
             with pytest.raises(ToolError, match="Translation with analysis failed"):
-                translate("Kaixo!", "eu", "es")
+                await translate("Kaixo!", "eu", "es")
 
-    def test_rejects_translation_without_basque(self):
-        result = translate("Hello!", "en", "es")
+    @pytest.mark.anyio
+    async def test_rejects_translation_without_basque(self):
+        result = await translate("Hello!", "en", "es")
         assert "Basque (eu) must be either the source or target language" in result
 
-    def test_result_format_has_four_columns(self):
+    @pytest.mark.anyio
+    async def test_result_format_has_four_columns(self):
         with patch(
             "itzuli_nlp.mcp_server.services.translate_with_analysis",
             return_value="Source: Kaixo! (euskera)\nTranslation: Hola! (español)\n\nMorphological Analysis:\n| Word | Lemma | Part of Speech | Features |\n|------|-------|---------------|----------|\n| Kaixo | (kaixo) | interjection | Animacy=Inan |",
         ):
-            result = translate("Kaixo!", "eu", "es")
+            result = await translate("Kaixo!", "eu", "es")
 
         lines = result.split("\n")
 
@@ -60,40 +70,320 @@ class TestTranslate:
         assert "|------|-------|---------------|----------|" in result
 
 
+class TestLongTranslations:
+    @pytest.mark.anyio
+    async def test_returns_one_chunk_per_paragraph_in_order(self):
+        with patch(
+            "itzuli_nlp.mcp_server.services.translate_with_analysis",
+            side_effect=lambda api_key, text, *args, **kwargs: f"Source: {text}",
+        ) as mock_translate:
+            result = await translate("Kaixo.\n\nZer moduz?\n  \nAgur.", "eu", "es")
+
+        assert result == ["Source: Kaixo.", "Source: Zer moduz?", "Source: Agur."]
+        assert mock_translate.call_count == 3
+
+    @pytest.mark.anyio
+    async def test_reports_progress_per_paragraph(self):
+        ctx = Mock()
+        ctx.report_progress = AsyncMock()
+
+        with patch("itzuli_nlp.mcp_server.services.translate_with_analysis", return_value="ok"):
+            await translate("Kaixo.\n\nAgur.", "eu", "es", ctx=ctx)
+
+        progress = [(call.args[0], call.args[1]) for call in ctx.report_progress.call_args_list]
+        assert progress == [(0, 2), (1, 2), (2, 2)]
+
+    @pytest.mark.anyio
+    async def test_translates_paragraphs_concurrently(self):
+        both_started = threading.Barrier(2, timeout=5)
+
+        def translate_paragraph(api_key, text, *args, **kwargs):
+            # Fails with BrokenBarrierError unless both paragraphs are in flight at once
+            both_started.wait()
+            return f"Source: {text}"
+
+        with patch("itzuli_nlp.mcp_server.services.translate_with_analysis", side_effect=translate_paragraph):
+            result = await translate("Kaixo.\n\nAgur.", "eu", "es")
+
+        assert result == ["Source: Kaixo.", "Source: Agur."]
+
+    @pytest.mark.anyio
+    async def test_failing_paragraph_raises_tool_error(self):
+        def translate_paragraph(api_key, text, *args, **kwargs):
+            if text == "Agur.":
+                raise Exception("Invalid API key or expired")
+            return "ok"
+
+        with patch("itzuli_nlp.mcp_server.services.translate_with_analysis", side_effect=translate_paragraph):
+            with pytest.raises(ToolError, match="Invalid API key"):
+                await translate("Kaixo.\n\nAgur.", "eu", "es")
+
+    @pytest.mark.anyio
+    async def test_progress_failure_does_not_fail_translation(self):
+        ctx = Mock()
+        ctx.report_progress = AsyncMock(side_effect=ValueError("Context is not available outside of a request"))
+
+        with patch("itzuli_nlp.mcp_server.services.translate_with_analysis", return_value="ok"):
+            result = await translate("Kaixo.", "eu", "es", ctx=ctx)
+
+        assert result == "ok"
+
+
+class TestStructuredOutput:
+    @pytest.mark.anyio
+    async def test_json_mode_returns_compact_structured_content(self):
+        compact = {"src": "Kaixo!", "sl": "eu", "tr": "Hola!", "tl": "es", "id": "t1", "a": []}
+
+        with patch(
+            "itzuli_nlp.mcp_server.services.translate_with_analysis_compact", return_value=compact
+        ) as mock_compact:
+            result = await translate("Kaixo!", "eu", "es", output_format="json", friendly=False)
+
+        assert isinstance(result, CallToolResult)
+        assert result.structuredContent == {"items": [compact]}
+        assert json.loads(result.content[0].text) == {"items": [compact]}
+        assert " " not in result.content[0].text.replace("Kaixo!", "").replace("Hola!", "")
+        assert mock_compact.call_args.kwargs["friendly"] is False
+
+    @pytest.mark.anyio
+    async def test_json_mode_collects_one_item_per_paragraph(self):
+        with patch(
+            "itzuli_nlp.mcp_server.services.translate_with_analysis_compact",
+            side_effect=lambda api_key, text, *args, **kwargs: {"src": text},
+        ):
+            result = await translate("Kaixo.\n\nAgur.", "eu", "es", output_format="json")
+
+        assert result.structuredContent == {"items": [{"src": "Kaixo."}, {"src": "Agur."}]}
+
+
+class TestTranslationOnly:
+    @pytest.mark.anyio
+    async def test_passes_include_analysis_flag(self):
+        with patch(
+            "itzuli_nlp.mcp_server.services.translate_with_analysis",
+            return_value="Source: Kaixo! (Basque)\nTranslation: Hola! (Spanish)",
+        ) as mock_translate:
+            result = await translate("Kaixo!", "eu", "es", include_analysis=False)
+
+        assert "Morphological Analysis" not in result
+        assert mock_translate.call_args.kwargs["include_analysis"] is False
+
+
+class TestAnalyze:
+    @pytest.mark.anyio
+    async def test_returns_analysis_without_translation(self):
+        with patch(
+            "itzuli_nlp.mcp_server.services.analyze_text",
+            return_value="Source: Kaixo (Basque)\n\nMorphological Analysis:\n| Kaixo | (kaixo) | interjection | — |",
+        ) as mock_analyze:
+            result = await analyze("Kaixo", "eu")
+
+        assert "Morphological Analysis" in result
+        mock_analyze.assert_called_once_with("Kaixo", "eu", "en")
+
+    @pytest.mark.anyio
+    async def test_accepts_non_basque_language(self):
+        with patch("itzuli_nlp.mcp_server.services.analyze_text", return_value="ok") as mock_analyze:
+            await analyze("Hola", "es", "fr")
+
+        mock_analyze.assert_called_once_with("Hola", "es", "fr")
+
+    @pytest.mark.anyio
+    async def test_rejects_unsupported_language(self):
+        result = await analyze("Ciao", "it")
+        assert "Unsupported language" in result
+
+    @pytest.mark.anyio
+    async def test_raises_tool_error_on_failure(self):
+        with patch("itzuli_nlp.mcp_server.services.analyze_text", side_effect=Exception("model missing")):
+            with pytest.raises(ToolError, match="Analysis failed"):
+                await analyze("Kaixo", "eu")
+
+
+class TestTranslateBatch:
+    @pytest.mark.anyio
+    async def test_returns_batch_result_on_success(self):
+        with patch(
+            "itzuli_nlp.mcp_server.services.translate_batch_with_analysis",
+            return_value="### 1/2\nSource: Hello (English)\n\n### 2/2\nSource: House (English)",
+        ) as mock_batch:
+            result = await translate_batch(["Hello", "House"], "en", "eu")
+
+        assert "### 1/2" in result
+        assert "### 2/2" in result
+        assert mock_batch.call_args.args[1] == ["Hello", "House"]
+
+    @pytest.mark.anyio
+    async def test_rejects_batch_without_basque(self):
+        result = await translate_batch(["Hello"], "en", "es")
+        assert "Basque (eu) must be either the source or target language" in result
+
+    @pytest.mark.anyio
+    async def test_rejects_oversized_batch(self):
+        with patch("itzuli_nlp.mcp_server.server.MAX_BATCH_SIZE", 2):
+            result = await translate_batch(["a", "b", "c"], "en", "eu")
+        assert "Too many texts" in result
+
+    @pytest.mark.anyio
+    async def test_raises_tool_error_on_failure(self):
+        with patch(
+            "itzuli_nlp.mcp_server.services.translate_batch_with_analysis",
+            side_effect=Exception("Invalid API key or expired"),
+        ):
+            with pytest.raises(ToolError, match="Batch translation with analysis failed"):
+                await translate_batch(["Hello"], "en", "eu")
+
+
 class TestGetQuota:
-    def test_returns_quota_info_on_success(self):
+    @pytest.mark.anyio
+    async def test_returns_quota_info_on_success(self):
         mock_response = {"remaining": 5000, "total": 10000, "used": 5000}
 
         with patch("itzuli_nlp.mcp_server.services.get_quota", return_value=mock_response):
-            result = get_quota()
+            result = await get_quota()
 
         parsed = json.loads(result)
         assert parsed["remaining"] == 5000
         assert parsed["total"] == 10000
 
-    def test_raises_tool_error_on_api_failure(self):
+    @pytest.mark.anyio
+    async def test_raises_tool_error_on_api_failure(self):
         with patch(
             "itzuli_nlp.mcp_server.services.get_quota",
             side_effect=Exception("Invalid status code: 500"),
         ):
             with pytest.raises(ToolError, match="Quota check failed"):
-                get_quota()
+                await get_quota()
 
 
 class TestSendFeedback:
-    def test_returns_confirmation_on_success(self):
-        mock_response = {"success": True}
+    @pytest.mark.anyio
+    async def test_queues_feedback_without_waiting_on_upstream(self):
+        mock_response = {"queued": True, "spool_id": "0001-abcd", "pending": 1}
 
-        with patch("itzuli_nlp.mcp_server.services.send_feedback", return_value=mock_response):
-            result = send_feedback("translation-123", "Hola!", 4)
+        with (
+            patch("itzuli_nlp.mcp_server.services.queue_feedback", return_value=mock_response) as mock_queue,
+            patch("itzuli_nlp.mcp_server.services.send_feedback") as mock_send,
+        ):
+            result = await send_feedback("translation-123", "Hola!", 4)
 
         parsed = json.loads(result)
-        assert parsed["success"] is True
+        assert parsed["queued"] is True
+        mock_queue.assert_called_once_with(api_key, "translation-123", "Hola!", 4)
+        mock_send.assert_not_called()
 
-    def test_raises_tool_error_on_api_failure(self):
+    @pytest.mark.anyio
+    async def test_raises_tool_error_on_spool_failure(self):
         with patch(
-            "itzuli_nlp.mcp_server.services.send_feedback",
-            side_effect=Exception("Invalid status code: 403"),
+            "itzuli_nlp.mcp_server.services.queue_feedback",
+            side_effect=OSError("No space left on device"),
         ):
             with pytest.raises(ToolError, match="Feedback submission failed"):
-                send_feedback("translation-123", "Hola!", 4)
+                await send_feedback("translation-123", "Hola!", 4)
+
+
+class TestConcurrency:
+    @pytest.mark.anyio
+    async def test_blocking_calls_do_not_serialize_on_event_loop(self):
+        def slow_quota(api_key):
+            time.sleep(0.2)
+            return {"remaining": 1}
+
+        with patch("itzuli_nlp.mcp_server.services.get_quota", side_effect=slow_quota):
+            start = time.monotonic()
+            async with anyio.create_task_group() as tg:
+                for _ in range(4):
+                    tg.start_soon(get_quota)
+            elapsed = time.monotonic() - start
+
+        assert elapsed < 0.6
+
+    @pytest.mark.anyio
+    async def test_concurrency_is_bounded_by_limiter(self):
+        active = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def tracked_quota(api_key):
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.05)
+            with lock:
+                active -= 1
+            return {"remaining": 1}
+
+        with (
+            patch("itzuli_nlp.mcp_server.server._blocking_limiter", anyio.CapacityLimiter(2)),
+            patch("itzuli_nlp.mcp_server.services.get_quota", side_effect=tracked_quota),
+        ):
+            async with anyio.create_task_group() as tg:
+                for _ in range(6):
+                    tg.start_soon(get_quota)
+
+        assert peak == 2
+
+
+class FakeSession:
+    """Stands in for an MCP ServerSession; limiters are keyed by session identity."""
+
+
+class TestClientConcurrency:
+    def _ctx(self, session):
+        ctx = Mock()
+        ctx.session = session
+        return ctx
+
+    def test_reuses_limiter_per_session(self):
+        from itzuli_nlp.mcp_server.server import _client_limiter
+
+        first, second = FakeSession(), FakeSession()
+
+        assert _client_limiter(self._ctx(first)) is _client_limiter(self._ctx(first))
+        assert _client_limiter(self._ctx(first)) is not _client_limiter(self._ctx(second))
+
+    def test_no_limiter_outside_a_request(self):
+        from itzuli_nlp.mcp_server.server import _client_limiter
+
+        ctx = Mock()
+        type(ctx).session = PropertyMock(side_effect=ValueError("Context is not available outside of a request"))
+
+        assert _client_limiter(None) is None
+        assert _client_limiter(ctx) is None
+
+    @pytest.mark.anyio
+    async def test_one_client_cannot_use_every_worker(self):
+        active = {}
+        peak = {}
+        lock = threading.Lock()
+
+        def tracked_quota(api_key):
+            name = current.get()
+            with lock:
+                active[name] = active.get(name, 0) + 1
+                peak[name] = max(peak.get(name, 0), active[name])
+            time.sleep(0.05)
+            with lock:
+                active[name] -= 1
+            return {"remaining": 1}
+
+        current = contextvars.ContextVar("client")
+        busy, quiet = FakeSession(), FakeSession()
+
+        async def call(name, session):
+            current.set(name)
+            await get_quota(ctx=self._ctx(session))
+
+        with (
+            patch("itzuli_nlp.mcp_server.server.CLIENT_CONCURRENCY", 2),
+            patch("itzuli_nlp.mcp_server.server._blocking_limiter", anyio.CapacityLimiter(8)),
+            patch("itzuli_nlp.mcp_server.services.get_quota", side_effect=tracked_quota),
+        ):
+            async with anyio.create_task_group() as tg:
+                for _ in range(6):
+                    tg.start_soon(call, "busy", busy)
+                tg.start_soon(call, "quiet", quiet)
+
+        assert peak["busy"] == 2
+        assert peak["quiet"] == 1
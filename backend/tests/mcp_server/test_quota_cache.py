@@ -0,0 +1,89 @@
+from unittest.mock import Mock, patch
+
+from itzuli_nlp.core.types import TranslationResult
+from itzuli_nlp.mcp_server import services
+from itzuli_nlp.mcp_server.quota_cache import QuotaCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestQuotaCache:
+    def test_serves_cached_value_within_ttl(self):
+        clock = FakeClock()
+        cache = QuotaCache(ttl_seconds=60, clock=clock)
+        fetch = Mock(return_value={"remaining": 5000})
+
+        assert cache.get_or_fetch(fetch) == {"remaining": 5000}
+        clock.now += 59
+        assert cache.get_or_fetch(fetch) == {"remaining": 5000}
+        assert fetch.call_count == 1
+
+    def test_refetches_after_expiry(self):
+        clock = FakeClock()
+        cache = QuotaCache(ttl_seconds=60, clock=clock)
+        fetch = Mock(side_effect=[{"remaining": 5000}, {"remaining": 4000}])
+
+        cache.get_or_fetch(fetch)
+        clock.now += 61
+
+        assert cache.get_or_fetch(fetch) == {"remaining": 4000}
+        assert fetch.call_count == 2
+
+    def test_invalidate_forces_refetch(self):
+        cache = QuotaCache(ttl_seconds=60)
+        cache.set({"remaining": 1})
+
+        cache.invalidate()
+
+        assert cache.get() is None
+
+    def test_fetch_errors_are_not_cached(self):
+        cache = QuotaCache(ttl_seconds=60)
+        fetch = Mock(side_effect=[Exception("Invalid status code: 500"), {"remaining": 1}])
+
+        try:
+            cache.get_or_fetch(fetch)
+        except Exception:
+            pass
+
+        assert cache.get_or_fetch(fetch) == {"remaining": 1}
+
+
+class TestServiceQuotaCaching:
+    def setup_method(self):
+        services.quota_cache.invalidate()
+
+    def teardown_method(self):
+        services.quota_cache.invalidate()
+
+    @patch("itzuli_nlp.mcp_server.services.Itzuli")
+    def test_get_quota_hits_upstream_once_within_ttl(self, mock_itzuli_class):
+        mock_itzuli_class.return_value.getQuota.return_value = {"remaining": 5000}
+
+        assert services.get_quota("test-key") == {"remaining": 5000}
+        assert services.get_quota("test-key") == {"remaining": 5000}
+        assert mock_itzuli_class.return_value.getQuota.call_count == 1
+
+    @patch("itzuli_nlp.mcp_server.services.process_translation_with_analysis")
+    @patch("itzuli_nlp.mcp_server.services.Itzuli")
+    def test_translation_response_quota_refreshes_cache(self, mock_itzuli_class, mock_process):
+        mock_process.return_value = TranslationResult(
+            source_text="Kaixo",
+            source_language="eu",
+            translated_text="Hola",
+            target_language="es",
+            translation_id="t1",
+            analysis_rows=[],
+            quota={"remaining": 42},
+        )
+
+        services.translate_with_analysis("test-key", "Kaixo", "eu", "es")
+
+        assert services.get_quota("test-key") == {"remaining": 42}
+        mock_itzuli_class.return_value.getQuota.assert_not_called()
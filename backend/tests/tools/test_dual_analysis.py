@@ -0,0 +1,64 @@
+"""Tests for dual analysis checkpointing."""
+
+import tempfile
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from itzuli_nlp.alignment_server.stage_cache import StageCache
+from itzuli_nlp.core.types import AnalysisRow
+from tools.dual_analysis import analyze_both_texts, analyze_many_texts
+
+
+def fake_analysis(text, language):
+    return MagicMock(analysis_rows=[AnalysisRow(word=text, lemma=text.lower(), upos="X", feats="")])
+
+
+@pytest.fixture
+def checkpoints():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        yield StageCache(cache_dir=temp_dir)
+
+
+class TestCheckpointedAnalysis:
+    @patch("tools.dual_analysis.process_analysis", side_effect=fake_analysis)
+    @patch("tools.dual_analysis.Itzuli")
+    def test_retry_reuses_translation_and_analyses(self, mock_itzuli, mock_process, checkpoints):
+        mock_itzuli.return_value.getTranslation.return_value = {"translated_text": "Hello"}
+
+        first = analyze_both_texts("key", "Kaixo", "eu", "en", checkpoints=checkpoints)
+        second = analyze_both_texts("key", "Kaixo", "eu", "en", checkpoints=checkpoints)
+
+        assert first == second == ("Hello", [AnalysisRow("Kaixo", "kaixo", "X", "")], [AnalysisRow("Hello", "hello", "X", "")])
+        assert mock_itzuli.return_value.getTranslation.call_count == 1
+        assert mock_process.call_count == 2
+
+    @patch("tools.dual_analysis.process_analysis", side_effect=fake_analysis)
+    @patch("tools.dual_analysis.Itzuli")
+    def test_failed_analysis_keeps_translation(self, mock_itzuli, mock_process, checkpoints):
+        mock_itzuli.return_value.getTranslation.return_value = {"translated_text": "Hello"}
+        mock_process.side_effect = [fake_analysis("Kaixo", "eu"), RuntimeError("stanza crashed")]
+
+        with pytest.raises(RuntimeError):
+            analyze_both_texts("key", "Kaixo", "eu", "en", checkpoints=checkpoints)
+        mock_process.side_effect = fake_analysis
+        analyze_both_texts("key", "Kaixo", "eu", "en", checkpoints=checkpoints)
+
+        assert mock_itzuli.return_value.getTranslation.call_count == 1
+        assert [c.args for c in mock_process.call_args_list] == [("Kaixo", "eu"), ("Hello", "en"), ("Hello", "en")]
+
+    @patch("itzuli_nlp.core.workflow.process_analysis_batch")
+    @patch("tools.dual_analysis.Itzuli")
+    def test_batch_only_processes_uncheckpointed_texts(self, mock_itzuli, mock_batch, checkpoints):
+        mock_itzuli.return_value.getTranslation.side_effect = lambda text, *_: {"translated_text": f"{text} (en)"}
+        mock_batch.side_effect = lambda texts, language: [[AnalysisRow(t, t, "X", "")] for t in texts]
+        analyze_many_texts("key", ["Kaixo"], "eu", "en", checkpoints=checkpoints)
+        mock_itzuli.reset_mock()
+        mock_batch.reset_mock()
+
+        items = analyze_many_texts("key", ["Kaixo", "Etxea"], "eu", "en", checkpoints=checkpoints)
+
+        assert [item.translated_text for item in items] == ["Kaixo (en)", "Etxea (en)"]
+        assert [item.source_analysis[0].word for item in items] == ["Kaixo", "Etxea"]
+        assert [c.args[0] for c in mock_itzuli.return_value.getTranslation.call_args_list] == ["Etxea"]
+        assert [c.args[0] for c in mock_batch.call_args_list] == [["Etxea"], ["Etxea (en)"]]
@@ -0,0 +1,80 @@
+"""Tests for the gradual cache migration tool."""
+
+import tempfile
+
+import pytest
+
+from itzuli_nlp.alignment_server.cache import AlignmentCache
+from itzuli_nlp.alignment_server.jobs import JobManager
+from itzuli_nlp.alignment_server.types import AlignmentData, AlignmentLayers, SentencePair, TokenizedSentence
+from tools.migrate_cache import count_versions, migrate, stale_entries
+
+
+def make_data(text: str) -> AlignmentData:
+    pair = SentencePair(
+        id=f"id-{text}",
+        source=TokenizedSentence(lang="eu", text=text, tokens=[]),
+        target=TokenizedSentence(lang="en", text=f"{text} (en)", tokens=[]),
+        layers=AlignmentLayers(),
+    )
+    return AlignmentData(sentences=[pair])
+
+
+@pytest.fixture
+def cache():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        old = AlignmentCache(cache_dir=temp_dir, version="old")
+        for text in ("a", "b", "c"):
+            old.set(text, "eu", "en", make_data(text))
+        current = AlignmentCache(cache_dir=temp_dir, version="new")
+        current.set("d", "eu", "en", make_data("d"))
+        yield current
+
+
+def regenerating_jobs(cache, fail=(), incomplete=()):
+    def run_job(job):
+        if job.text in fail:
+            raise RuntimeError("upstream failed")
+        data = make_data(job.text)
+        data.sentences[0].id = job.sentence_id
+        if job.text not in incomplete:
+            cache.set(job.text, job.source_lang, job.target_lang, data)
+        return data
+
+    return JobManager(run_job, max_workers=2)
+
+
+class TestMigrateCache:
+    def test_lists_stale_entries_and_versions(self, cache):
+        assert [entry["text"] for entry in stale_entries(cache)] == ["a", "b", "c"]
+        assert count_versions(cache) == {"old": 3, "new": 1}
+
+    def test_regenerates_up_to_the_limit_in_paced_rounds(self, cache):
+        jobs = regenerating_jobs(cache)
+        pauses = []
+
+        result = migrate(cache, jobs, limit=2, concurrency=1, interval=5.0, sleep=pauses.append)
+
+        assert result == (2, 0)
+        assert pauses == [5.0]
+        assert count_versions(cache) == {"old": 1, "new": 3}
+
+    def test_failures_are_counted_and_left_stale(self, cache):
+        jobs = regenerating_jobs(cache, fail=("b",))
+
+        assert migrate(cache, jobs, concurrency=2) == (2, 1)
+        assert [entry["text"] for entry in stale_entries(cache)] == ["b"]
+
+    def test_jobs_that_wrote_no_current_entry_count_as_failed(self, cache):
+        # Incomplete layers are not cached, whatever status the job ends with
+        jobs = regenerating_jobs(cache, incomplete=("a",))
+
+        assert migrate(cache, jobs, concurrency=3) == (2, 1)
+        assert [entry["text"] for entry in stale_entries(cache)] == ["a"]
+
+    def test_regenerated_entries_keep_their_stored_ids(self, cache):
+        jobs = regenerating_jobs(cache)
+
+        migrate(cache, jobs, concurrency=3)
+
+        assert [cache.get(text, "eu", "en").sentences[0].id for text in ("a", "b", "c")] == ["id-a", "id-b", "id-c"]
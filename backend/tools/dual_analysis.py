@@ -12,29 +12,33 @@ import json
 import logging
 import os
 import sys
-from typing import Tuple, List
+from dataclasses import asdict, dataclass, field
+from typing import TYPE_CHECKING, Dict, Optional, Tuple, List
 
 from dotenv import load_dotenv
 from Itzuli import Itzuli
 
-from itzuli_nlp.core.nlp import create_pipeline, process_raw_analysis
+from itzuli_nlp.core.metrics import track_stage
 from itzuli_nlp.core.types import AnalysisRow, LanguageCode
+from itzuli_nlp.core.workflow import (
+    DEFAULT_BATCH_CONCURRENCY,
+    analyze_batch_with_fallback,
+    get_cached_stanza_pipeline,
+    process_analysis,
+    translate_concurrently,
+)
+
+if TYPE_CHECKING:
+    from itzuli_nlp.alignment_server.stage_cache import StageCache
 
 load_dotenv()
 
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 logger = logging.getLogger(__name__)
 
-# Cache pipelines to avoid recreating them
-_pipelines = {}
-
-
 def get_cached_pipeline(language: LanguageCode):
-    """Get or create a Stanza pipeline for the specified language."""
-    if language not in _pipelines:
-        logger.info(f"Creating Stanza pipeline for language: {language}")
-        _pipelines[language] = create_pipeline(language)
-    return _pipelines[language]
+    """Get or create a Stanza pipeline for the specified language (shared with the core workflow cache)."""
+    return get_cached_stanza_pipeline(language)
 
 
 def analyze_both_texts(
@@ -42,6 +46,7 @@ def analyze_both_texts(
     text: str,
     source_language: LanguageCode,
     target_language: LanguageCode,
+    checkpoints: Optional["StageCache"] = None,
 ) -> Tuple[str, List[AnalysisRow], List[AnalysisRow]]:
     """
     Translate text and analyze both source and translated text.
@@ -51,32 +56,160 @@ def analyze_both_texts(
         text: Source text to translate
         source_language: Source language code
         target_language: Target language code
+        checkpoints: Optional store of earlier translations and analyses; only the
+            steps missing from it are run, and their results are added to it
         
     Returns:
         Tuple of (translated_text, source_analysis, translation_analysis)
     """
     # Get translation
-    itzuli_client = Itzuli(api_key)
-    translation_data = itzuli_client.getTranslation(text, source_language, target_language)
-    translated_text = translation_data.get("translated_text", "")
+    translated_text = _checkpoint(checkpoints, "translation", text, source_language, target_language)
+    if translated_text is None:
+        itzuli_client = Itzuli(api_key)
+        with track_stage("itzuli"):
+            translation_data = itzuli_client.getTranslation(text, source_language, target_language)
+        translated_text = translation_data.get("translated_text", "")
+        if checkpoints is not None and translated_text:
+            checkpoints.set("translation", translated_text, text, source_language, target_language)
     
     logger.info(f"Translation: '{text}' -> '{translated_text}'")
     
-    # Get pipelines for both languages
-    source_pipeline = get_cached_pipeline(source_language)
-    target_pipeline = get_cached_pipeline(target_language)
-    
-    # Analyze source text
-    source_analysis = process_raw_analysis(source_pipeline, text)
+    # Analyze source text (pipelines are cached and Stanza calls serialized per language,
+    # so this is safe to call from several worker threads)
+    source_analysis = _analyze_text(text, source_language, checkpoints)
     logger.info(f"Source analysis: {len(source_analysis)} tokens")
     
     # Analyze translated text
-    translation_analysis = process_raw_analysis(target_pipeline, translated_text)
+    translation_analysis = _analyze_text(translated_text, target_language, checkpoints)
     logger.info(f"Translation analysis: {len(translation_analysis)} tokens")
     
     return translated_text, source_analysis, translation_analysis
 
 
+def _checkpoint(checkpoints: Optional["StageCache"], stage: str, *parts):
+    return None if checkpoints is None else checkpoints.get(stage, *parts)
+
+
+def _analyze_text(text: str, language: LanguageCode, checkpoints: Optional["StageCache"]) -> List[AnalysisRow]:
+    stored = _checkpoint(checkpoints, "analysis", text, language)
+    if stored is not None:
+        return [AnalysisRow(**row) for row in stored]
+    
+    with track_stage("stanza"):
+        rows = process_analysis(text, language).analysis_rows
+    if checkpoints is not None:
+        checkpoints.set("analysis", [asdict(row) for row in rows], text, language)
+    return rows
+
+
+@dataclass
+class DualAnalysisItem:
+    """Dual analysis of one text in a batch; error is set when the item failed."""
+
+    text: str
+    translated_text: str = ""
+    source_analysis: List[AnalysisRow] = field(default_factory=list)
+    target_analysis: List[AnalysisRow] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+def analyze_many_texts(
+    api_key: str,
+    texts: List[str],
+    source_language: LanguageCode,
+    target_language: LanguageCode,
+    max_workers: int = DEFAULT_BATCH_CONCURRENCY,
+    checkpoints: Optional["StageCache"] = None,
+) -> List[DualAnalysisItem]:
+    """
+    Translate several texts concurrently and analyze each side in one batched Stanza call.
+    
+    Args:
+        api_key: Itzuli API key
+        texts: Source texts, all sharing the same language pair
+        source_language: Source language code
+        target_language: Target language code
+        max_workers: Maximum number of concurrent Itzuli requests
+        checkpoints: Optional store of earlier translations and analyses; only the
+            missing ones are computed, and the new results are added to it
+        
+    Returns:
+        One DualAnalysisItem per input text, in input order. Failures are reported
+        per item instead of aborting the whole batch.
+    """
+    items = [DualAnalysisItem(text=text) for text in texts]
+    if not texts:
+        return items
+
+    to_translate = []
+    for item in items:
+        stored = _checkpoint(checkpoints, "translation", item.text, source_language, target_language)
+        if stored is None:
+            to_translate.append(item)
+        else:
+            item.translated_text = stored
+
+    if to_translate:
+        itzuli_client = Itzuli(api_key)
+
+        def translate(text: str) -> dict:
+            with track_stage("itzuli"):
+                return itzuli_client.getTranslation(text, source_language, target_language)
+
+        translations = translate_concurrently(translate, [item.text for item in to_translate], max_workers)
+        for item, translation_data in zip(to_translate, translations):
+            if isinstance(translation_data, Exception):
+                logger.warning(f"Batch translation failed for '{item.text[:50]}': {translation_data}")
+                item.error = str(translation_data)
+                continue
+            item.translated_text = translation_data.get("translated_text", "")
+            if checkpoints is not None and item.translated_text:
+                checkpoints.set("translation", item.translated_text, item.text, source_language, target_language)
+
+    translated = [item for item in items if item.error is None]
+    logger.info(f"Batch translation: {len(translated)}/{len(items)} succeeded")
+
+    source_rows = _analyze_batch_checkpointed([item.text for item in translated], source_language, checkpoints)
+    target_rows = _analyze_batch_checkpointed(
+        [item.translated_text for item in translated], target_language, checkpoints
+    )
+    for item, source_result, target_result in zip(translated, source_rows, target_rows):
+        for result in (source_result, target_result):
+            if isinstance(result, Exception):
+                item.error = str(result)
+        if item.error is None:
+            item.source_analysis = source_result
+            item.target_analysis = target_result
+
+    return items
+
+
+def _analyze_batch_checkpointed(
+    texts: List[str], language: LanguageCode, checkpoints: Optional["StageCache"]
+) -> List[List[AnalysisRow] | Exception]:
+    if checkpoints is None:
+        return _analyze_batch(texts, language)
+
+    results: Dict[str, List[AnalysisRow] | Exception] = {}
+    for text in texts:
+        stored = checkpoints.get("analysis", text, language)
+        if stored is not None:
+            results[text] = [AnalysisRow(**row) for row in stored]
+
+    # Only the texts without a checkpoint go to Stanza, still as one batch
+    missing = list(dict.fromkeys(text for text in texts if text not in results))
+    for text, result in zip(missing, _analyze_batch(missing, language) if missing else []):
+        results[text] = result
+        if not isinstance(result, Exception):
+            checkpoints.set("analysis", [asdict(row) for row in result], text, language)
+    return [results[text] for text in texts]
+
+
+def _analyze_batch(texts: List[str], language: LanguageCode) -> List[List[AnalysisRow] | Exception]:
+    with track_stage("stanza"):
+        return analyze_batch_with_fallback(texts, language)
+
+
 def format_analysis_output(
     source_text: str,
     translated_text: str,
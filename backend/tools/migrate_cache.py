@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Gradually regenerate alignment cache entries written by an earlier pipeline version.
+
+Entries of other versions keep being served (see ALIGNMENT_CACHE_SERVE_STALE) and
+are refreshed as they are requested; this script refreshes the rest ahead of time,
+a few at a time, through the same job workers and cache as the alignment server.
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+
+from itzuli_nlp.alignment_server.cache import BaseAlignmentCache
+from itzuli_nlp.alignment_server.jobs import JobManager, JobStatus
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 500
+
+
+def stale_entries(
+    cache: BaseAlignmentCache, source_lang: Optional[str] = None, target_lang: Optional[str] = None
+) -> Iterator[dict]:
+    """Yield listed cache entries not written by the cache's current version, oldest first."""
+    after = -1
+    while True:
+        entries, next_seq = cache.list_entries(
+            after=after, limit=PAGE_SIZE, source_lang=source_lang, target_lang=target_lang
+        )
+        for entry in entries:
+            if entry.get("version", "") != cache.version:
+                yield entry
+        if next_seq is None:
+            return
+        after = next_seq
+
+
+def count_versions(cache: BaseAlignmentCache) -> Dict[str, int]:
+    """Number of cache entries per pipeline version ("" for entries written before versioning)."""
+    counts: Counter = Counter()
+    after = -1
+    while True:
+        entries, next_seq = cache.list_entries(after=after, limit=PAGE_SIZE)
+        counts.update(entry.get("version", "") for entry in entries)
+        if next_seq is None:
+            return dict(counts)
+        after = next_seq
+
+
+def stored_sentence_id(cache: BaseAlignmentCache, entry: dict) -> str:
+    """Sentence id stored in a listed entry, or its cache key if the entry cannot be read."""
+    data = cache.get_many_by_key([entry["key"]])[0]
+    if data is None or not data.sentences:
+        return entry["key"]
+    return data.sentences[0].id
+
+
+def migrate(
+    cache: BaseAlignmentCache,
+    jobs: JobManager,
+    limit: Optional[int] = None,
+    concurrency: int = 1,
+    interval: float = 0.0,
+    source_lang: Optional[str] = None,
+    target_lang: Optional[str] = None,
+    sleep: Callable[[float], None] = time.sleep,
+) -> Tuple[int, int]:
+    """
+    Regenerate stale entries in rounds of `concurrency` jobs, pausing `interval` seconds between rounds.
+
+    Args:
+        cache: Cache whose stale entries to regenerate
+        jobs: Job manager whose jobs write their results to that cache
+        limit: Maximum number of entries to regenerate (None for all)
+        concurrency: Jobs submitted per round
+        interval: Seconds to wait between rounds, to spread the upstream load
+        source_lang: Only regenerate entries with this source language
+        target_lang: Only regenerate entries with this target language
+        sleep: Function used to wait between rounds
+
+    Returns:
+        Tuple of (entries regenerated, entries that failed)
+    """
+    regenerated = failed = 0
+    pending = []
+
+    def finish_round() -> None:
+        nonlocal regenerated, failed
+        for entry, job in pending:
+            job.wait()
+            # Only a current-version entry in the cache counts, whatever the job reported
+            current = cache.get(entry["text"], entry["source_lang"], entry["target_lang"])
+            if job.status == JobStatus.SUCCEEDED and current is not None:
+                regenerated += 1
+            else:
+                failed += 1
+                error = job.error or "no current-version entry was written"
+                logger.warning(f"Could not regenerate '{entry['text'][:50]}': {error}")
+        pending.clear()
+
+    for entry in stale_entries(cache, source_lang=source_lang, target_lang=target_lang):
+        if limit is not None and regenerated + failed + len(pending) >= limit:
+            break
+        if not pending and regenerated + failed:
+            sleep(interval)
+        # The regenerated entry keeps the id it was stored with
+        sentence_id = stored_sentence_id(cache, entry)
+        job = jobs.submit(entry["text"], entry["source_lang"], entry["target_lang"], sentence_id)
+        pending.append((entry, job))
+        if len(pending) >= concurrency:
+            finish_round()
+            logger.info(f"Regenerated {regenerated} entries ({failed} failed)")
+    finish_round()
+    return regenerated, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Regenerate alignment cache entries of earlier pipeline versions")
+    parser.add_argument("--limit", "-n", type=int, help="Maximum number of entries to regenerate")
+    parser.add_argument("--concurrency", "-c", type=int, default=1, help="Entries regenerated at a time")
+    parser.add_argument("--interval", "-i", type=float, default=0.0, help="Seconds to wait between rounds")
+    parser.add_argument("--source", "-s", choices=["eu", "es", "en", "fr"], help="Only this source language")
+    parser.add_argument("--target", "-t", choices=["eu", "es", "en", "fr"], help="Only this target language")
+    parser.add_argument("--dry-run", action="store_true", help="Only report the number of entries per version")
+
+    args = parser.parse_args()
+
+    # The server module holds the configured cache and the job workers that write to it
+    from itzuli_nlp.alignment_server.server import cache, jobs
+
+    counts = count_versions(cache)
+    for version, count in sorted(counts.items(), key=lambda item: -item[1]):
+        marker = " (current)" if version == cache.version else ""
+        print(f"{version or 'unversioned'}{marker}: {count} entries")
+    if args.dry_run:
+        return
+
+    for variable in ("ITZULI_API_KEY", "CLAUDE_API_KEY"):
+        if not os.environ.get(variable):
+            logger.error(f"{variable} environment variable required")
+            sys.exit(1)
+
+    try:
+        regenerated, failed = migrate(
+            cache,
+            jobs,
+            limit=args.limit,
+            concurrency=args.concurrency,
+            interval=args.interval,
+            source_lang=args.source,
+            target_lang=args.target,
+        )
+    finally:
+        jobs.shutdown()
+
+    print(f"Regenerated {regenerated} entries, {failed} failed")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,9 +9,17 @@ import { config } from './config'
 function App() {
   const [mode, setMode] = useState<'input' | 'examples'>('input')
   
-  // Hook for loading example sentences (fixture data only)
-  const { selectedSentence, selectedId, setSelectedId, availableSentences, loading: fixtureLoading, error: fixtureError } =
-    useSelectedSentence()
+  // Hook for loading example sentences (fixtures or the backend /sentences listing)
+  const {
+    selectedSentence,
+    selectedId,
+    setSelectedId,
+    availableSentences,
+    hasMore,
+    loadMore,
+    loading: fixtureLoading,
+    error: fixtureError,
+  } = useSelectedSentence()
   
   // Hook for submitting new translation requests
   const { data: translationData, loading: translationLoading, error: translationError, submitRequest, reset } =
@@ -128,10 +136,18 @@ function App() {
                 >
                   {availableSentences.map((sentence) => (
                     <option key={sentence.id} value={sentence.id}>
-                      {sentence.id}: {sentence.source.text}
+                      {sentence.source.text}
                     </option>
                   ))}
                 </select>
+                {hasMore && (
+                  <button
+                    onClick={loadMore}
+                    className="px-3 py-2 text-sm font-medium text-sage-600 hover:bg-slate-100 rounded-lg transition-colors"
+                  >
+                    Load more
+                  </button>
+                )}
               </div>
             </div>
           )}
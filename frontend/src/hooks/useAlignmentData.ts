@@ -3,70 +3,81 @@
  */
 
 import { useCallback, useEffect, useState } from 'react'
-import { fetchAlignmentData, getDataSourceConfig } from '../services/alignmentApi'
-import type { DataSourceConfig, UseAlignmentDataResult } from '../types/alignment'
+import { fetchSentence, fetchSentencePage, getDataSourceConfig } from '../services/alignmentApi'
+import type {
+  DataSourceConfig,
+  SentencePair,
+  SentenceSummary,
+  UseAlignmentDataResult,
+} from '../types/alignment'
 
 /**
- * Hook for loading alignment data with loading states and error handling
+ * Hook for listing sentence pairs page by page, with loading states and error handling
  * Abstracts whether data comes from fixtures or API
  */
 export function useAlignmentData(config?: DataSourceConfig): UseAlignmentDataResult {
-  const [data, setData] = useState<UseAlignmentDataResult['data']>(null)
+  const [sentences, setSentences] = useState<SentenceSummary[]>([])
+  const [cursor, setCursor] = useState<string | null>(null)
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState<string | null>(null)
 
   const effectiveConfig = config ?? getDataSourceConfig()
 
-  const loadData = useCallback(async () => {
-    // Skip loading if fixtures are disabled and we're trying to use API mode
-    // (since there's no /sentences endpoint on the backend)
-    if (!effectiveConfig.useFixtures) {
-      setData({ sentences: [] })
-      setLoading(false)
-      setError(null)
-      return
-    }
+  const loadPage = useCallback(
+    async (after: string | null) => {
+      try {
+        // Later pages load behind the picker instead of replacing it with the loading screen
+        if (!after) setLoading(true)
+        setError(null)
+        const page = await fetchSentencePage(after, effectiveConfig)
+        setSentences((previous) => (after ? [...previous, ...page.sentences] : page.sentences))
+        setCursor(page.next_cursor)
+      } catch (err) {
+        const errorMessage = err instanceof Error ? err.message : 'Failed to load alignment data'
+        setError(errorMessage)
+        console.error('Error loading alignment data:', err)
+      } finally {
+        setLoading(false)
+      }
+    },
+    [effectiveConfig]
+  )
 
-    try {
-      setLoading(true)
-      setError(null)
-      const result = await fetchAlignmentData(effectiveConfig)
-      setData(result)
-    } catch (err) {
-      const errorMessage = err instanceof Error ? err.message : 'Failed to load alignment data'
-      setError(errorMessage)
-      console.error('Error loading alignment data:', err)
-    } finally {
-      setLoading(false)
+  const loadMore = useCallback(() => {
+    if (cursor) {
+      loadPage(cursor)
     }
-  }, [effectiveConfig])
+  }, [cursor, loadPage])
 
   const refetch = useCallback(() => {
-    loadData()
-  }, [loadData])
+    loadPage(null)
+  }, [loadPage])
 
   useEffect(() => {
-    loadData()
-  }, [loadData])
+    loadPage(null)
+  }, [loadPage])
 
   return {
-    data,
+    sentences,
+    hasMore: cursor !== null,
     loading,
     error,
+    loadMore,
     refetch,
   }
 }
 
 /**
  * Hook for managing selected sentence pair
+ * Only the selected pair is loaded with its alignment layers
  */
 export function useSelectedSentence(initialId?: string) {
   const [selectedId, setSelectedId] = useState<string | null>(initialId ?? null)
+  const [selectedSentence, setSelectedSentence] = useState<SentencePair | null>(null)
+  const [sentenceError, setSentenceError] = useState<string | null>(null)
 
-  const { data, loading, error, refetch } = useAlignmentData()
-
-  const selectedSentence = data?.sentences.find((s) => s.id === selectedId) ?? null
-  const availableSentences = data?.sentences ?? []
+  const { sentences: availableSentences, hasMore, loading, error, loadMore, refetch } =
+    useAlignmentData()
 
   // Auto-select first sentence if none selected and data is available
   useEffect(() => {
@@ -75,13 +86,36 @@ export function useSelectedSentence(initialId?: string) {
     }
   }, [selectedId, availableSentences])
 
+  useEffect(() => {
+    if (!selectedId) {
+      return
+    }
+    let cancelled = false
+    setSelectedSentence(null)
+    setSentenceError(null)
+    fetchSentence(selectedId)
+      .then((sentence) => {
+        if (!cancelled) setSelectedSentence(sentence)
+      })
+      .catch((err) => {
+        if (cancelled) return
+        setSentenceError(err instanceof Error ? err.message : 'Failed to load sentence')
+        console.error('Error loading sentence:', err)
+      })
+    return () => {
+      cancelled = true
+    }
+  }, [selectedId])
+
   return {
     selectedSentence,
     selectedId,
     setSelectedId,
     availableSentences,
+    hasMore,
+    loadMore,
     loading,
-    error,
+    error: error ?? sentenceError,
     refetch,
   }
 }
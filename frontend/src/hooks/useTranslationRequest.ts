@@ -3,7 +3,7 @@
  */
 
 import { useState, useCallback } from 'react'
-import { submitTranslationRequest, type AnalysisRequest } from '../services/alignmentApi'
+import { streamTranslationRequest, type AnalysisRequest } from '../services/alignmentApi'
 import type { AlignmentData, LanguageCode } from '../types/alignment'
 
 export type UseTranslationRequestResult = {
@@ -15,7 +15,8 @@ export type UseTranslationRequestResult = {
 }
 
 /**
- * Hook for submitting translation requests and managing their state
+ * Hook for submitting translation requests and managing their state.
+ * Results stream in, so data is set (and loading cleared) before all layers are ready.
  */
 export function useTranslationRequest(): UseTranslationRequestResult {
   const [data, setData] = useState<AlignmentData | null>(null)
@@ -34,7 +35,11 @@ export function useTranslationRequest(): UseTranslationRequestResult {
         sentence_id: crypto.randomUUID(),
       }
       
-      const result = await submitTranslationRequest(request)
+      // Render tokens as soon as the scaffold arrives; layers fill in as they stream
+      const result = await streamTranslationRequest(request, (partial) => {
+        setData(partial)
+        setLoading(false)
+      })
       setData(result)
     } catch (err) {
       const errorMessage = err instanceof Error ? err.message : 'Failed to analyze translation'
@@ -4,7 +4,14 @@
  */
 
 import { config } from '../config'
-import type { AlignmentData, DataSourceConfig, LanguageCode } from '../types/alignment'
+import type {
+  AlignmentData,
+  AlignmentLayers,
+  DataSourceConfig,
+  LanguageCode,
+  SentencePair,
+  SentencesPage,
+} from '../types/alignment'
 
 /**
  * Request model for translation analysis
@@ -35,36 +42,57 @@ async function loadFixtureData(): Promise<AlignmentData> {
   return response.json()
 }
 
+const JSON_HEADERS = {
+  Accept: 'application/json',
+  'Content-Type': 'application/json',
+}
+
 /**
- * Load alignment data from backend API
- * Matches the backend alignment server endpoints
+ * Load one page of sentence pairs for the example picker, without alignment layers.
+ * Pass the previous page's next_cursor to continue; fixtures come as a single page.
  */
-async function loadApiData(config: DataSourceConfig): Promise<AlignmentData> {
-  const url = `${config.apiBaseUrl}/sentences`
-  const response = await fetch(url, {
-    headers: {
-      Accept: 'application/json',
-      'Content-Type': 'application/json',
-    },
-  })
+export async function fetchSentencePage(
+  cursor: string | null = null,
+  config: DataSourceConfig = DEFAULT_CONFIG
+): Promise<SentencesPage> {
+  if (config.useFixtures) {
+    const { sentences } = await loadFixtureData()
+    return { sentences, next_cursor: null }
+  }
+
+  const params = new URLSearchParams({ fields: 'source,target' })
+  if (cursor) params.set('cursor', cursor)
+  const response = await fetch(`${config.apiBaseUrl}/sentences?${params}`, { headers: JSON_HEADERS })
 
   if (!response.ok) {
     throw new Error(`API request failed: ${response.status} ${response.statusText}`)
   }
-
   return response.json()
 }
 
 /**
- * Main function to fetch alignment data based on configuration
+ * Load one sentence pair with all its alignment layers, by the id the listing gave it
  */
-export async function fetchAlignmentData(
+export async function fetchSentence(
+  id: string,
   config: DataSourceConfig = DEFAULT_CONFIG
-): Promise<AlignmentData> {
+): Promise<SentencePair> {
   if (config.useFixtures) {
-    return loadFixtureData()
+    const sentence = (await loadFixtureData()).sentences.find((s) => s.id === id)
+    if (!sentence) {
+      throw new Error(`Unknown sentence: ${id}`)
+    }
+    return sentence
   }
-  return loadApiData(config)
+
+  const response = await fetch(`${config.apiBaseUrl}/sentences/${encodeURIComponent(id)}`, {
+    headers: JSON_HEADERS,
+  })
+
+  if (!response.ok) {
+    throw new Error(`API request failed: ${response.status} ${response.statusText}`)
+  }
+  return response.json()
 }
 
 /**
@@ -129,3 +157,95 @@ export async function submitTranslationRequest(request: AnalysisRequest): Promis
     sentences: [alignmentData]
   }
 }
+
+/**
+ * Server-sent event from the streaming analyze-and-scaffold endpoint
+ */
+type StreamEvent =
+  | { event: 'translation'; data: { source_text: string; target_text: string } }
+  | { event: 'scaffold'; data: SentencePair }
+  | { event: 'layer'; data: { layer: keyof AlignmentLayers; alignments: AlignmentLayers[keyof AlignmentLayers] } }
+  | { event: 'done'; data: SentencePair }
+  | { event: 'error'; data: { detail: string } }
+
+function parseStreamEvent(block: string): StreamEvent | null {
+  let event = ''
+  let data = ''
+  for (const line of block.split('\n')) {
+    if (line.startsWith('event: ')) event = line.slice(7)
+    else if (line.startsWith('data: ')) data += line.slice(6)
+  }
+  return event && data ? ({ event, data: JSON.parse(data) } as StreamEvent) : null
+}
+
+/**
+ * Submit text for translation analysis and receive results incrementally.
+ * onUpdate is called with the token scaffold as soon as it is ready, then again
+ * as each alignment layer arrives. Resolves with the complete data.
+ */
+export async function streamTranslationRequest(
+  request: AnalysisRequest,
+  onUpdate: (data: AlignmentData) => void
+): Promise<AlignmentData> {
+  const url = `${config.apiBaseUrl}/analyze-and-scaffold/stream`
+
+  const response = await fetch(url, {
+    method: 'POST',
+    headers: {
+      Accept: 'text/event-stream',
+      'Content-Type': 'application/json',
+    },
+    body: JSON.stringify({
+      text: request.text,
+      source_lang: request.source_lang,
+      target_lang: request.target_lang,
+      sentence_id: request.sentence_id || crypto.randomUUID(),
+    }),
+  })
+
+  if (!response.ok || !response.body) {
+    const errorData = await response.json().catch(() => ({}))
+    const errorMessage = errorData.detail || `API request failed: ${response.status} ${response.statusText}`
+    throw new Error(errorMessage)
+  }
+
+  const reader = response.body.pipeThrough(new TextDecoderStream()).getReader()
+  let buffer = ''
+  let sentence: SentencePair | null = null
+
+  for (;;) {
+    const { value, done } = await reader.read()
+    if (done) break
+    buffer += value
+
+    let boundary = buffer.indexOf('\n\n')
+    while (boundary !== -1) {
+      const message = parseStreamEvent(buffer.slice(0, boundary))
+      buffer = buffer.slice(boundary + 2)
+      boundary = buffer.indexOf('\n\n')
+      if (!message) continue
+
+      switch (message.event) {
+        case 'error':
+          throw new Error(message.data.detail)
+        case 'scaffold':
+        case 'done':
+          sentence = message.data
+          break
+        case 'layer':
+          if (!sentence) continue
+          sentence = { ...sentence, layers: { ...sentence.layers, [message.data.layer]: message.data.alignments } }
+          break
+        default:
+          continue
+      }
+      onUpdate({ sentences: [sentence] })
+    }
+  }
+
+  if (!sentence) {
+    throw new Error('Stream ended before any result was received')
+  }
+  return { sentences: [sentence] }
+}
+
@@ -106,6 +106,20 @@ export type AlignmentData = {
   sentences: SentencePair[]
 }
 
+/**
+ * A sentence pair as listed in the example picker: its tokens without alignment layers.
+ * The full pair is loaded separately once it is selected.
+ */
+export type SentenceSummary = Omit<SentencePair, 'layers'>
+
+/**
+ * One page of the backend /sentences listing
+ */
+export type SentencesPage = {
+  sentences: SentenceSummary[]
+  next_cursor: string | null
+}
+
 /**
  * Configuration for data source (fixture vs API)
  */
@@ -118,8 +132,10 @@ export type DataSourceConfig = {
  * Hook return type for alignment data loading
  */
 export type UseAlignmentDataResult = {
-  data: AlignmentData | null
+  sentences: SentenceSummary[]
+  hasMore: boolean
   loading: boolean
   error: string | null
+  loadMore: () => void
   refetch: () => void
 }